@@ -1,12 +1,14 @@
+import cProfile
 import logging
 
 import click
 import coloredlogs
-from click_plugins import with_plugins
-from pkg_resources import iter_entry_points
 from tqdm import tqdm
 
 from autochangelog.changelog_context import ChangelogContext
+from autochangelog.lazy_plugin_group import LazyPluginGroup
+from autochangelog.metrics import reset_metrics
+from autochangelog.profiler import PipelineProfiler, set_profiler
 
 VERBOSE = 15
 NOTICE = 25
@@ -24,8 +26,20 @@ user_logger = logging.getLogger('user')
 @click.group()
 @click.option('--debug/--no-debug',  default=False)
 @click.option('--verbose/--no-verbose',  default=False)
+@click.option('--progress/--no-progress', default=True, help="Show the progress of the releases generated")
+@click.option('--metrics-file', type=click.Path(dir_okay=False, writable=True), default=None,
+              help="Write the metrics of the run to a json file")
+@click.option('--profile/--no-profile', default=False,
+              help="Report the wall time, CPU time, peak memory and items of each command in the pipeline")
+@click.option('--profile-stats', type=click.Path(dir_okay=False, writable=True), default=None,
+              help="Write cProfile stats of the run to a file that can be loaded with pstats. Implies --profile")
+@click.option('--profile-trace', type=click.Path(dir_okay=False, writable=True), default=None,
+              help="Write the commands as a Chrome trace json file. Implies --profile")
+@click.option('--concurrent-sources/--sequential-sources', default=False,
+              help="Load consecutive sources, like git followed by github, concurrently in background threads")
 @click.pass_context
-def cli(ctx, debug: bool, verbose: bool,):
+def cli(ctx, debug: bool, verbose: bool, progress: bool, metrics_file: str, profile: bool, profile_stats: str,
+        profile_trace: str, concurrent_sources: bool):
     default_level = logging.DEBUG if debug else logging.INFO
     if not debug:
         default_level = VERBOSE if verbose else default_level
@@ -39,30 +53,76 @@ def cli(ctx, debug: bool, verbose: bool,):
     ctx.obj = ChangelogContext(src=None, debug=debug, verbose=verbose)
 
 
-@with_plugins(iter_entry_points('autochangelog.cli_src_plugins'))
-@cli.group(chain=True)
+@cli.group(chain=True, cls=LazyPluginGroup, entry_point_group='autochangelog.cli_src_plugins')
 def generate():
     pass
 
 
+@cli.command(name='export-github',
+             help="Export the labels, tags and closed issues of a Github repo to a snapshot file. The github source "
+                  "reads the snapshot without network access with --snapshot")
+@click.argument('src')
+@click.argument('output', type=click.Path(dir_okay=False, writable=True))
+@click.option("--token", default=None, help="Github Token. You can also use the GITHUB_TOKEN environment variable")
+@click.option("--api-url", default='https://api.github.com', help="Url of the Github API")
+@click.option("--concurrency", type=click.IntRange(min=1), default=4, help="Number of concurrent requests to Github")
+def export_github(src: str, output: str, token: str, api_url: str, concurrency: int):
+    # imported here so the CLI does not load the Github dependencies for other commands
+    from autochangelog.github_issues_source import export_snapshot
+    export_snapshot(src, output, token, api_url, concurrency)
+
+
 @cli.resultcallback()
-def process_commands(processors, **kwargs):
+def process_commands(processors, progress: bool = True, metrics_file: str = None, profile: bool = False,
+                     profile_stats: str = None, profile_trace: str = None, concurrent_sources: bool = False,
+                     **kwargs):
     """
     This result callback is invoked with an iterable of all the chained
     subcommands.  As in this example each subcommand returns a function
     we can chain them together to feed one into the other, similar to how
     a pipe on unix works.
-    """
-    # Start with an empty iterable.
-    stream = ()
 
-    # Pipe it through all stream processors.
-    for processor in processors:
-        stream = processor(stream)
+    The sources and outputs report their progress into the metrics of the run, which are shown in the progress bar
+    and written to the metrics file at exit. When profiling, each processor is a stage of the profile.
+
+    With --concurrent-sources, consecutive sources are run concurrently, see
+    :func:`autochangelog.source_runner.build_stream`.
+    """
+    if processors is None:
+        # only generate returns processors
+        return
+    # imported here so the CLI does not load the source runner for other commands
+    from autochangelog.source_runner import build_stream
+    bar = tqdm(unit=' releases', desc='Generating', disable=not progress)
+    metrics = reset_metrics(bar if progress else None)
+    profiler = None
+    if profile or profile_stats or profile_trace:
+        profiler = PipelineProfiler(record_events=profile_trace is not None)
+        set_profiler(profiler)
+        profiler.start()
+    stats = cProfile.Profile() if profile_stats else None
+    if stats:
+        stats.enable()
+    try:
+        # Pipe an empty iterable through all stream processors.
+        stream = build_stream(processors, concurrent_sources)
 
-    # Evaluate the stream and throw away the items.
-    for _ in tqdm(stream, total=len(processors)):
-        pass
+        # Evaluate the stream and throw away the items.
+        for _ in stream:
+            pass
+    finally:
+        if stats:
+            stats.disable()
+            stats.dump_stats(profile_stats)
+        bar.close()
+        if profiler:
+            profiler.stop()
+            set_profiler(None)
+            click.echo(profiler.get_report(), err=True)
+            if profile_trace:
+                profiler.dump_trace(profile_trace)
+        if metrics_file:
+            metrics.dump(metrics_file)
 
 
 if __name__ == "__main__":
@@ -1,8 +1,238 @@
+from collections import namedtuple
 from dataclasses import dataclass
-from typing import Dict, List, Any
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, List, Any, Optional, Tuple
+
+# Version of the tuple layout of IssueRecord. Bump when the layout changes so cached records are reloaded
+ISSUE_RECORD_VERSION = 1
+GITHUB_DATE_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+# formats of datetime.isoformat for dates without timezone, with and without microseconds
+ISO_DATE_FORMAT = '%Y-%m-%dT%H:%M:%S'
+ISO_DATE_FORMAT_MICROSECONDS = '%Y-%m-%dT%H:%M:%S.%f'
+
+LabelRecord = namedtuple('LabelRecord', ['name'])
+AuthorRecord = namedtuple('AuthorRecord', ['name', 'email'])
+
+
+def parse_isoformat(value: str) -> datetime:
+    """
+    Parse a date without timezone written with datetime.isoformat. datetime.fromisoformat needs Python 3.7
+
+    Args:
+        value: Date to parse
+
+    Returns:
+        Parsed date
+    """
+    return datetime.strptime(value, ISO_DATE_FORMAT_MICROSECONDS if '.' in value else ISO_DATE_FORMAT)
 
 
 @dataclass
 class SrcData:
     items: Dict[str, List[Any]]
-    src: str
\ No newline at end of file
+    src: str
+
+
+class IssueRecord:
+    """
+    Compact view of a Github issue with only the fields used by the changelog. Records are stored in caches as plain
+    tuples so they do not depend on the PyGithub version.
+    """
+    __slots__ = ('number', 'title', 'state', 'closed_at', 'labels', 'pull_request_url', 'html_url', 'author')
+
+    def __init__(self, number: int, title: str, state: str, closed_at: Optional[datetime],
+                 labels: Tuple[LabelRecord, ...], pull_request_url: Optional[str], html_url: str, author: str):
+        self.number = number
+        self.title = title
+        self.state = state
+        self.closed_at = closed_at
+        self.labels = labels
+        self.pull_request_url = pull_request_url
+        self.html_url = html_url
+        self.author = author
+
+    def __repr__(self):
+        return f'IssueRecord(number={self.number}, title={self.title!r})'
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> 'IssueRecord':
+        """
+        Create a record from an issue returned by the Github API
+
+        Args:
+            data: Decoded issue json
+
+        Returns:
+            New record
+        """
+        closed_at = datetime.strptime(data['closed_at'], GITHUB_DATE_FORMAT) if data.get('closed_at') else None
+        pull_request = data.get('pull_request')
+        return cls(
+            number=data['number'],
+            title=data['title'],
+            state=data['state'],
+            closed_at=closed_at,
+            labels=tuple(LabelRecord(label['name']) for label in data.get('labels', [])),
+            pull_request_url=pull_request.get('html_url') if pull_request else None,
+            html_url=data['html_url'],
+            author=data['user']['login'] if data.get('user') else None
+        )
+
+    @classmethod
+    def from_issue(cls, issue) -> 'IssueRecord':
+        """
+        Create a record from a PyGithub issue
+
+        Args:
+            issue: PyGithub issue
+
+        Returns:
+            New record
+        """
+        return cls(
+            number=issue.number,
+            title=issue.title,
+            state=issue.state,
+            closed_at=issue.closed_at.replace(tzinfo=None) if issue.closed_at else None,
+            labels=tuple(LabelRecord(label.name) for label in issue.labels),
+            pull_request_url=issue.pull_request.html_url if issue.pull_request else None,
+            html_url=issue.html_url,
+            author=issue.user.login if issue.user else None
+        )
+
+    def to_tuple(self) -> tuple:
+        """
+        Convert the record to a plain tuple for storage
+
+        Returns:
+            Tuple in the layout of ISSUE_RECORD_VERSION
+        """
+        return (self.number, self.title, self.state, self.closed_at, tuple(label.name for label in self.labels),
+                self.pull_request_url, self.html_url, self.author)
+
+    @classmethod
+    def from_tuple(cls, value: tuple) -> 'IssueRecord':
+        """
+        Create a record from a tuple created by to_tuple
+
+        Args:
+            value: Tuple in the layout of ISSUE_RECORD_VERSION
+
+        Returns:
+            New record
+        """
+        number, title, state, closed_at, labels, pull_request_url, html_url, author = value
+        return cls(number, title, state, closed_at, tuple(LabelRecord(name) for name in labels), pull_request_url,
+                   html_url, author)
+
+
+class CommitRecord:
+    """
+    Compact view of a git commit with only the fields used by the changelog. Unlike pygit2 commits, records do not
+    keep the repository alive and can be pickled.
+
+    Finding a unique short id needs a lookup in the repository, so it is only done when short_id is first used. The
+    records of a repository share the string of its path, and the path is not part of the stored tuples.
+    """
+    __slots__ = ('id', 'message', 'author', 'commit_time', 'path', '_short_id')
+
+    def __init__(self, id: str, message: str, author: Optional[AuthorRecord], commit_time: int, path: str,
+                 short_id: str = None):
+        self.id = id
+        self.message = message
+        self.author = author
+        self.commit_time = commit_time
+        self.path = path
+        self._short_id = short_id
+
+    def __repr__(self):
+        return f'CommitRecord(id={self.id!r}, summary={self.summary!r})'
+
+    @property
+    def summary(self) -> str:
+        """
+        First line of the commit message
+        """
+        return self.message.strip().partition('\n')[0]
+
+    @property
+    def short_id(self) -> str:
+        """
+        Shortest unique abbreviation of the commit id
+        """
+        if self._short_id is None:
+            self._short_id = open_repository(self.path)[self.id].short_id
+        return self._short_id
+
+    @classmethod
+    def from_commit(cls, commit, path: str) -> 'CommitRecord':
+        """
+        Create a record from a pygit2 commit
+
+        Args:
+            commit: pygit2 commit
+            path: Path of the repository of the commit
+
+        Returns:
+            New record
+        """
+        author = commit.author
+        return cls(str(commit.id), commit.message, get_author(author.name, author.email), commit.commit_time, path)
+
+    def to_tuple(self) -> tuple:
+        """
+        Convert the record to a plain tuple for storage
+
+        Returns:
+            Tuple of the record fields without the path
+        """
+        name, email = self.author if self.author else (None, None)
+        return self.id, self.message, name, email, self.commit_time, self._short_id
+
+    @classmethod
+    def from_tuple(cls, value: tuple, path: str) -> 'CommitRecord':
+        """
+        Create a record from a tuple created by to_tuple
+
+        Args:
+            value: Tuple of the record fields
+            path: Path of the repository of the commit
+
+        Returns:
+            New record
+        """
+        id, message, name, email, commit_time, short_id = value
+        author = get_author(name, email) if name is not None or email is not None else None
+        return cls(id, message, author, commit_time, path, short_id)
+
+
+@lru_cache(maxsize=1024)
+def get_author(name: Optional[str], email: Optional[str]) -> AuthorRecord:
+    """
+    Get the record of an author. A history has few authors, so records share them
+
+    Args:
+        name: Author name
+        email: Author email
+
+    Returns:
+        Author record
+    """
+    return AuthorRecord(name, email)
+
+
+@lru_cache(maxsize=8)
+def open_repository(path: str):
+    """
+    Open a repository once per process
+
+    Args:
+        path: Path of the repository
+
+    Returns:
+        pygit2 Repository
+    """
+    # only import pygit2 when a short id is looked up, so outputs and other sources do not load it
+    from pygit2 import Repository
+    return Repository(path)
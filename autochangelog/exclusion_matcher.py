@@ -0,0 +1,98 @@
+import re
+from dataclasses import dataclass, field
+from typing import List, Pattern
+
+# Rule kinds that can be used as a prefix of an exclusion rule, for example "regex:^Bump". Rules without a known kind
+# are plain substrings
+RULE_KINDS = ('substring', 'prefix', 'regex', 'type')
+# Escapes and group syntax of a regex. Numbered backreferences, references by name, conditionals and named groups do not
+# survive joining the rules, because the groups are renumbered and group names must be unique
+GROUP_SYNTAX = re.compile(r'\\.|\(\?P[=<]|\(\?\(')
+
+
+@dataclass()
+class ExclusionMatcher:
+    """
+    Match commit messages against exclusion rules. The rules are compiled into a single alternation regex once, so
+    each message is scanned once no matter how many rules there are.
+
+    Rules are in the form kind:value where kind is one of
+
+    * substring - message contains the value. This is the default for rules without a kind
+    * prefix - message starts with the value
+    * regex - regular expression searched in the message. Use scoped flags like (?i:...) instead of global flags
+    * type - conventional commit type, for example type:chore matches "chore: ...", "chore(deps): ..." and "chore!: ..."
+
+    Regex rules that refer to their groups, like (a)\\1 or (?P<word>\\w+) (?P=word), are compiled on their own.
+    """
+    rules: List[str] = field(default_factory=list)
+    summary_only: bool = False
+    expr: Pattern = field(default=None, init=False, repr=False)
+    # patterns of the rules that cannot be part of the alternation
+    separate: List[Pattern] = field(default_factory=list, init=False, repr=False)
+
+    def __post_init__(self):
+        patterns = []
+        for rule in self.rules:
+            pattern = self.get_pattern(rule)
+            if self.refers_to_groups(pattern):
+                self.separate.append(re.compile(pattern))
+            else:
+                patterns.append(pattern)
+        self.expr = re.compile('|'.join(patterns)) if patterns else None
+
+    @staticmethod
+    def refers_to_groups(pattern: str) -> bool:
+        """
+        Check if a pattern refers to its groups by number or by name. Octal escapes in character classes are
+        reported too, which only costs a separate search
+
+        Args:
+            pattern: Regular expression
+
+        Returns:
+            True when the pattern must be compiled on its own
+        """
+        return any(
+            token[0] != '\\' or token[1] in '123456789' for token in GROUP_SYNTAX.findall(pattern)
+        )
+
+    @staticmethod
+    def get_pattern(rule: str) -> str:
+        """
+        Convert a rule to a regular expression
+
+        Args:
+            rule: Exclusion rule
+
+        Returns:
+            Regular expression for the rule
+        """
+        kind, sep, value = rule.partition(':')
+        if not sep or kind not in RULE_KINDS:
+            return re.escape(rule)
+        if kind == 'prefix':
+            return r'\A' + re.escape(value)
+        elif kind == 'regex':
+            # compile alone first so errors point at the rule
+            re.compile(value)
+            return f'(?:{value})'
+        elif kind == 'type':
+            return r'\A' + re.escape(value) + r'(?:\([^)\n]*\))?!?:'
+        return re.escape(value)
+
+    def matches(self, message: str) -> bool:
+        """
+        Check if a commit message is excluded
+
+        Args:
+            message: Commit message
+
+        Returns:
+            True if any rule matches the message
+        """
+        if self.summary_only:
+            message = message.partition('\n')[0]
+        if self.expr is not None and self.expr.search(message) is not None:
+            return True
+        return any(expr.search(message) is not None for expr in self.separate)
@@ -0,0 +1,291 @@
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from logging import DEBUG, getLogger
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+import diskcache
+import requests
+from requests.adapters import HTTPAdapter
+from github import Github
+from autochangelog.metrics import get_metrics
+
+logger = getLogger(__name__)
+user_logger = getLogger('user')
+DEFAULT_API_URL = 'https://api.github.com'
+PAGE_SIZE = 100
+DEFAULT_CONCURRENCY = 4
+LINK_EXPR = re.compile(r'<([^>]+)>;\s*rel="(\w+)"')
+PAGE_EXPR = re.compile(r'[?&]page=(\d+)')
+# how many seconds a cached response is used before it is revalidated with a conditional request
+DEFAULT_EXPIRY = dict(issues=60 * 60 * 24, labels=60 * 60, tags=0, commits=60 * 60 * 24 * 30)
+# minimum time to keep responses so they can be revalidated
+RESPONSE_RETENTION = 60 * 60 * 24 * 7
+CACHED_HEADERS = ('ETag', 'Last-Modified', 'Link')
+# retries of a request rejected by the rate limit before it fails
+RATE_LIMIT_RETRIES = 5
+# seconds to wait before the first retry when the rate limit reset has already passed. Doubles on each retry
+RATE_LIMIT_BACKOFF = 1
+
+
+@dataclass()
+class RateLimiter:
+    """
+    Throttle requests globally using the X-RateLimit headers of the responses. When the remaining requests drop to
+    the reserve, every worker waits until the rate limit resets instead of failing mid-run.
+    """
+    reserve: int = field(default=1)
+    remaining: int = None
+    reset: float = 0
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def acquire(self):
+        """
+        Wait until a request can be issued and reserve it
+
+        Returns:
+            None
+        """
+        with self.lock:
+            if self.remaining is not None and self.remaining <= self.reserve:
+                delay = self.reset - time.time()
+                if delay > 0:
+                    user_logger.warning(f'Github rate limit reached. Waiting {int(delay) + 1} seconds for reset')
+                    get_metrics().increment('github.rate_limit_waits')
+                    get_metrics().increment('github.rate_limit_wait_seconds', delay + 1)
+                    # we hold the lock while we wait so no other worker issues a request either
+                    time.sleep(delay + 1)
+                # we don't know the limit again until we get the next response
+                self.remaining = None
+            if self.remaining is not None:
+                self.remaining -= 1
+
+    def update(self, headers: Dict[str, str]):
+        """
+        Update the limits from the headers of a response
+
+        Args:
+            headers: Response headers
+
+        Returns:
+            None
+        """
+        if 'X-RateLimit-Remaining' in headers:
+            with self.lock:
+                self.remaining = int(headers['X-RateLimit-Remaining'])
+                self.reset = float(headers.get('X-RateLimit-Reset', 0))
+
+
+@dataclass()
+class GithubFetcher:
+    """
+    Fetch layer for the Github API. Requests are issued from a bounded pool of workers and throttled by a shared
+    :class:`RateLimiter`. Responses are converted to PyGithub objects so they behave like objects loaded by PyGithub.
+
+    When a cache is set, responses are stored with their ETag and Last-Modified headers. They are reused until the
+    expiry of their resource type and then revalidated with a conditional request. Github does not count a 304
+    response against the rate limit.
+    """
+    token: str = None
+    base_url: str = DEFAULT_API_URL
+    concurrency: int = DEFAULT_CONCURRENCY
+    gh: Github = None
+    limiter: RateLimiter = field(default_factory=RateLimiter)
+    session: requests.Session = None
+    cache: diskcache.Cache = None
+    expiry: Dict[str, int] = field(default_factory=lambda: dict(DEFAULT_EXPIRY))
+
+    def __post_init__(self):
+        self.base_url = self.base_url.rstrip('/')
+        if self.gh is None:
+            self.gh = Github(self.token, base_url=self.base_url, per_page=PAGE_SIZE)
+        if self.session is None:
+            self.session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(self.concurrency, 1))
+            self.session.mount('http://', adapter)
+            self.session.mount('https://', adapter)
+            self.session.headers['Accept'] = 'application/vnd.github.v3+json'
+            if self.token:
+                self.session.headers['Authorization'] = f'token {self.token}'
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Issue a request once the rate limiter allows it. Requests rejected because the rate limit was exceeded are
+        retried after the reset, or after a backoff when the reset has already passed, up to RATE_LIMIT_RETRIES times.
+
+        Args:
+            method: HTTP method
+            url: Full url of the request
+            **kwargs: Arguments passed to requests
+
+        Returns:
+            Response
+
+        Raises:
+            requests.HTTPError: When the request is still rejected by the rate limit after the retries
+        """
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            self.limiter.acquire()
+            if logger.isEnabledFor(DEBUG):
+                logger.debug(f'{method} {url} {kwargs.get("params") or kwargs.get("json") or ""}')
+            started = time.perf_counter()
+            response = self.session.request(method, url, **kwargs)
+            get_metrics().increment('github.requests')
+            get_metrics().increment('github.request_seconds', time.perf_counter() - started)
+            self.limiter.update(response.headers)
+            if response.status_code not in (403, 429) or response.headers.get('X-RateLimit-Remaining') != '0':
+                return response
+            get_metrics().increment('github.rate_limit_rejections')
+            if attempt < RATE_LIMIT_RETRIES and self.limiter.reset <= time.time():
+                # the limiter only waits for a reset in the future, so back off instead of retrying right away
+                delay = RATE_LIMIT_BACKOFF * 2 ** attempt
+                user_logger.warning(f'Github rate limit exceeded after its reset. Retrying in {delay} seconds')
+                time.sleep(delay)
+        response.raise_for_status()
+        return response
+
+    def get(self, url: str, params: Dict[str, Any] = None, resource: str = None, max_age: int = None) -> \
+            Tuple[Any, Dict[str, str]]:
+        """
+        Get a resource
+
+        Args:
+            url: Url of resource. Urls without a scheme are relative to the base url
+            params: Query parameters
+            resource: Resource type used to cache the response. The response is not cached when not set
+            max_age: Seconds the cached response is used without revalidating. Defaults to the resource expiry
+
+        Returns:
+            Tuple of decoded json and the ETag, Last-Modified and Link headers
+        """
+        if '://' not in url:
+            url = f'{self.base_url}/{url.lstrip("/")}'
+        key, entry, request_headers = None, None, dict()
+        if resource and self.cache is not None:
+            key = ('response', url, tuple(sorted((params or dict()).items())))
+            entry = self.cache.get(key)
+            if max_age is None:
+                max_age = self.expiry.get(resource, 0)
+            if entry is not None:
+                if time.time() - entry['fetched_at'] < max_age:
+                    get_metrics().increment('github.cache_hits')
+                    return entry['data'], entry['headers']
+                if 'ETag' in entry['headers']:
+                    request_headers['If-None-Match'] = entry['headers']['ETag']
+                if 'Last-Modified' in entry['headers']:
+                    request_headers['If-Modified-Since'] = entry['headers']['Last-Modified']
+        response = self.request('GET', url, params=params, headers=request_headers)
+        if response.status_code == 304 and entry is not None:
+            if logger.isEnabledFor(DEBUG):
+                logger.debug(f'Not modified {url}')
+            get_metrics().increment('github.not_modified')
+            data, headers = entry['data'], entry['headers']
+        else:
+            if key is not None:
+                get_metrics().increment('github.cache_misses')
+            response.raise_for_status()
+            data = response.json()
+            headers = {name: response.headers[name] for name in CACHED_HEADERS if name in response.headers}
+        if key is not None:
+            self.cache.set(key, dict(fetched_at=time.time(), data=data, headers=headers),
+                           expire=max(self.expiry.get(resource, 0), RESPONSE_RETENTION))
+        return data, headers
+
+    def get_all(self, url: str, params: Dict[str, Any] = None, resource: str = None, max_age: int = None) -> \
+            List[Any]:
+        """
+        Get every page of a list resource. After the first page, the remaining pages are fetched concurrently when
+        the response tells us the last page.
+
+        Args:
+            url: Url of list resource
+            params: Query parameters
+            resource: Resource type used to cache the responses. The responses are not cached when not set
+            max_age: Seconds the cached responses are used without revalidating. Defaults to the resource expiry
+
+        Returns:
+            Items from all pages in order
+        """
+        params = dict(params or dict(), per_page=PAGE_SIZE)
+        items, headers = self.get(url, params, resource, max_age)
+        # copy so we never extend the list stored in the cache
+        items = list(items)
+        links = self.get_links(headers)
+        last_page = PAGE_EXPR.search(links['last']) if 'last' in links else None
+        if last_page:
+            pages = self.map(lambda page: self.get(url, dict(params, page=page), resource, max_age)[0],
+                             range(2, int(last_page.group(1)) + 1))
+            for page in pages:
+                items.extend(page)
+        else:
+            while 'next' in links:
+                page, headers = self.get(links['next'], resource=resource, max_age=max_age)
+                items.extend(page)
+                links = self.get_links(headers)
+        return items
+
+    @staticmethod
+    def get_links(headers: Dict[str, str]) -> Dict[str, str]:
+        """
+        Get the pagination links from the Link header
+
+        Args:
+            headers: Response headers
+
+        Returns:
+            Dictionary of rel to url
+        """
+        return {rel: url for url, rel in LINK_EXPR.findall(headers.get('Link', ''))}
+
+    def graphql(self, query: str, variables: Dict[str, Any] = None) -> Dict[str, Any]:
+        """
+        Run a GraphQL query. Github only allows authenticated GraphQL requests, so a token is required.
+
+        Args:
+            query: GraphQL query
+            variables: Query variables
+
+        Returns:
+            Data of the query result
+        """
+        # Github Enterprise serves the rest api from /api/v3 and GraphQL from /api/graphql
+        if self.base_url.endswith('/api/v3'):
+            url = f'{self.base_url[:-len("/v3")]}/graphql'
+        else:
+            url = f'{self.base_url}/graphql'
+        response = self.request('POST', url, json=dict(query=query, variables=variables or dict()))
+        response.raise_for_status()
+        result = response.json()
+        if result.get('errors'):
+            raise ValueError(f"GraphQL query failed: {'; '.join(e.get('message', '') for e in result['errors'])}")
+        return result['data']
+
+    def map(self, fn: Callable, items: Iterable) -> List[Any]:
+        """
+        Run fn over items using the worker pool
+
+        Args:
+            fn: Function to call for each item
+            items: Items
+
+        Returns:
+            Results in the order of items
+        """
+        if self.concurrency <= 1:
+            return [fn(item) for item in items]
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            return list(executor.map(fn, items))
+
+    def create(self, klass, data: Any):
+        """
+        Create a PyGithub object from data loaded by the fetcher
+
+        Args:
+            klass: PyGithub class
+            data: Decoded json
+
+        Returns:
+            New object
+        """
+        return self.gh.create_from_raw_data(klass, data)
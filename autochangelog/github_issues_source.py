@@ -1,24 +1,75 @@
 import json
 import os
 import pathlib
+import re
+import time
+from bisect import bisect_right
 from collections import defaultdict
 from dataclasses import dataclass, field
+from datetime import datetime, timezone
 from logging import DEBUG, getLogger
-from typing import List, Dict
+from typing import Iterable, List, Dict, Optional, Union
 import click
 import diskcache
 from dateutil.parser import parse
-from github import Github, UnknownObjectException, Tag
-from github.Issue import Issue
+from github.Tag import Tag
 from github.Label import Label
 from github.Repository import Repository
-from autochangelog.data import SrcData
+from autochangelog.data import SrcData, IssueRecord, LabelRecord, ISSUE_RECORD_VERSION, GITHUB_DATE_FORMAT, \
+    parse_isoformat
+from autochangelog.github_fetcher import GithubFetcher, DEFAULT_API_URL, DEFAULT_CONCURRENCY, DEFAULT_EXPIRY
+from autochangelog.github_snapshot import GithubSnapshot, TagRecord, write_snapshot
+from autochangelog.issue_store import IssueStore
+from autochangelog.label_router import LabelRouter, compile_rule
+from autochangelog.metrics import get_metrics
 from autochangelog.utils import generator
 
 
 logger = getLogger(__name__)
+user_logger = getLogger('user')
 UNCATEGORIZED = 'Uncategorized'
 CACHE_DIRECTORY = os.path.join(str(pathlib.Path.home()), '.autochangelog', 'github')
+CLOSED_ISSUES_KEY = f'closed_issues:v{ISSUE_RECORD_VERSION}'
+LEGACY_CLOSED_ISSUES_KEY = 'closed_issues'
+TAG_DATES_KEY = 'tag_dates'
+TAG_DATES_QUERY = """
+query($owner: String!, $name: String!, $cursor: String) {
+  repository(owner: $owner, name: $name) {
+    refs(refPrefix: "refs/tags/", first: 100, after: $cursor) {
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        name
+        target {
+          ... on Commit { committedDate }
+          ... on Tag { target { ... on Commit { committedDate } } }
+        }
+      }
+    }
+  }
+}
+"""
+
+
+def parse_cache_expiry(ctx, param, value) -> Dict[str, int]:
+    """
+    Parse the cache expiry options into a dictionary of resource type to seconds
+
+    Args:
+        ctx: Click context
+        param: Click parameter
+        value: List of RESOURCE=SECONDS values
+
+    Returns:
+        Expiry for every resource type
+    """
+    expiry = dict(DEFAULT_EXPIRY)
+    for item in value:
+        resource, _, seconds = item.partition('=')
+        if resource not in expiry or not seconds.isdigit():
+            raise click.BadParameter(f"{item} should be RESOURCE=SECONDS where RESOURCE is one of "
+                                     f"{', '.join(DEFAULT_EXPIRY)}")
+        expiry[resource] = int(seconds)
+    return expiry
 
 
 @click.command(help="Get changelog using a Git repo")
@@ -29,44 +80,64 @@ CACHE_DIRECTORY = os.path.join(str(pathlib.Path.home()), '.autochangelog', 'gith
 @click.option("--unlabeled-label", default=UNCATEGORIZED, help="Label for unlabeled issues")
 @click.option("--split-issues-between-topics/-split-issues-between-topics", default=False,
               help="Split issues with multiple labels across labels")
-@click.option("--ignore-labels-file", default=None, help="Path to json file that contains a list of labels to ignore")
-@click.option("--label-map-file", default=None, help="Path to json file that contains a map of label to topic")
+@click.option("--ignore-labels-file", default=None,
+              help="Path to json file that contains a list of labels to ignore. Labels can be glob: or regex: rules")
+@click.option("--label-map-file", default=None,
+              help="Path to json file that contains a map of topic to labels. Labels can be glob: or regex: rules")
 @click.option("--version", default=None, help="Load specific version")
 @click.option("--token", default=None, help="Github Token. You can also use the GITHUB_TOKEN environment variable")
+@click.option("--concurrency", type=click.IntRange(min=1), default=DEFAULT_CONCURRENCY,
+              help="Number of concurrent requests to Github")
+@click.option("--api-url", default=DEFAULT_API_URL, help="Url of the Github API")
+@click.option("--local-repo", type=click.Path(exists=True), default=None,
+              help="Path to a local clone of the repo. Used to read the dates of tags without api requests")
+@click.option("--cache-expiry", multiple=True, callback=parse_cache_expiry,
+              help="Seconds cached data is used before it is revalidated, as RESOURCE=SECONDS. Resources are "
+                   f"{', '.join(f'{k} (default {v})' for k, v in DEFAULT_EXPIRY.items())}. The closed issue list is "
+                   "checked for updates on every run and reloaded in full after the issues expiry")
+@click.option("--snapshot", type=click.Path(exists=True, dir_okay=False), default=None,
+              help="Read the repo from a snapshot created with autochangelog export-github instead of the Github API")
 @generator
 @click.pass_context
 def github(ctx, src: str, filter_pull_requests: bool, topics_from_labels: bool, filter_unlabeled: bool,
            unlabeled_label: str, split_issues_between_topics: bool, ignore_labels_file: str, label_map_file: str,
-           version: str, token: str = None):
-    gh = Github(os.getenv('GITHUB_TOKEN', token if token else ''))
-    # load the git data from source specified
-    repo = gh.get_repo(src)
+           version: str, token: str = None, concurrency: int = DEFAULT_CONCURRENCY, api_url: str = DEFAULT_API_URL,
+           cache_expiry: Dict[str, int] = None, local_repo: str = None, snapshot: str = None):
     label_map = None
     ignore_labels = []
     if label_map_file:
         label_map = load_label_map_file(label_map_file)
     if ignore_labels_file:
         ignore_labels = load_ignore_labels_file(ignore_labels_file)
-    gcs = GithubChangelogSource(repo=repo, label_map=label_map, ignore_labels=ignore_labels)
+    if snapshot:
+        gcs = SnapshotChangelogSource(snapshot=GithubSnapshot(snapshot), label_map=label_map,
+                                      ignore_labels=ignore_labels)
+        if gcs.snapshot.full_name != src:
+            user_logger.warning(f'Snapshot {snapshot} is of {gcs.snapshot.full_name}, not {src}')
+    else:
+        fetcher = GithubFetcher(token=os.getenv('GITHUB_TOKEN', token if token else ''), base_url=api_url,
+                                concurrency=concurrency, expiry=cache_expiry or dict(DEFAULT_EXPIRY))
+        # load the git data from source specified
+        repo = fetcher.gh.get_repo(src)
+        gcs = GithubChangelogSource(repo=repo, label_map=label_map, ignore_labels=ignore_labels, fetcher=fetcher,
+                                    local_repo=local_repo)
     ctx.obj.src = gcs
     if version is None:
         versions = gcs.get_versions()
-        prev_version = None
-        for ver in versions:
-            changes = gcs.get_changes_since(ver, filter_pull_requests, topics_from_labels, filter_unlabeled,
-                                            unlabeled_label, split_issues_between_topics, prev_version)
-            yield SrcData(items=changes, src='github')
-            prev_version = ver
+        changes = gcs.get_changes_by_version(versions, filter_pull_requests, topics_from_labels, filter_unlabeled,
+                                             unlabeled_label, split_issues_between_topics)
+        for ver, ver_changes in changes.items():
+            yield SrcData(items={ver: ver_changes}, src='github')
     else:
         # get previous version
         versions = gcs.get_versions()
         prev_version = None
-        if version in [v.name for v in versions]:
-            for idx, ver in enumerate(versions):
-                break
-            if idx < len(versions):
-                prev_version = versions[idx+1]
-            version = [v for v in versions if v.name == version][0]
+        names = [v.name for v in versions]
+        if version in names:
+            idx = names.index(version)
+            if idx > 0:
+                prev_version = versions[idx - 1]
+            version = versions[idx]
         else:
             raise ValueError(f"Cannot find version {version}")
         changes = gcs.get_changes_since(version, filter_pull_requests, topics_from_labels, filter_unlabeled,
@@ -76,13 +147,13 @@ def github(ctx, src: str, filter_pull_requests: bool, topics_from_labels: bool,
 
 def load_label_map_file(label_map_file: str) -> Dict[str, str]:
     """
-    Load the label map file
+    Load the label map file. The file maps each topic to a list of labels or label rules
 
     Args:
         label_map_file: Path to label map file
 
     Returns:
-        Dictionary of label to new label
+        Dictionary of label to new label in the order of the file
     """
     with open(label_map_file, 'r') as lmap_in:
         label_map = json.load(lmap_in)
@@ -91,6 +162,7 @@ def load_label_map_file(label_map_file: str) -> Dict[str, str]:
             for item in items:
                 new_label_map[item] = label
         label_map = new_label_map
+    validate_label_rules(label_map, '--label-map-file')
     return label_map
 
 
@@ -107,9 +179,28 @@ def load_ignore_labels_file(ignore_labels_file: str) -> List[str]:
     with open(ignore_labels_file, 'r') as ignore_in:
         ignore_labels = json.load(ignore_in)
     ignore_labels = set(ignore_labels)
+    validate_label_rules(ignore_labels, '--ignore-labels-file')
     return ignore_labels
 
 
+def validate_label_rules(rules: Iterable[str], param_hint: str):
+    """
+    Check the glob and regex rules of a labels file compile
+
+    Args:
+        rules: Label rules
+        param_hint: Option of the file
+
+    Returns:
+        None
+    """
+    for rule in rules:
+        try:
+            compile_rule(rule)
+        except re.error as e:
+            raise click.BadParameter(f"Invalid label rule {rule}: {e}", param_hint=param_hint)
+
+
 @dataclass()
 class GithubChangelogSource:
     repo: Repository
@@ -117,29 +208,172 @@ class GithubChangelogSource:
     label_map: Dict[str, List[str]] = field(default=None)
     labels: List[Label] = None
     ignore_labels: List[str] = field(default_factory=list)
+    closed_issues: List[IssueRecord] = None
+    fetcher: GithubFetcher = None
+    tag_dates: Dict[str, datetime] = field(default_factory=dict)
+    local_repo: str = None
+    router: LabelRouter = None
+    store: IssueStore = None
 
     def __post_init__(self):
-        self.labels = list(self.repo.get_labels())
         cache_dir = os.path.join(CACHE_DIRECTORY, self.repo.name)
         if logger.isEnabledFor(DEBUG):
             logger.debug(f'Caching issues to from {cache_dir}')
         self.cache = diskcache.Cache(cache_dir)
+        if self.store is None:
+            self.store = IssueStore(os.path.join(cache_dir, 'closed_issues'))
+        if CLOSED_ISSUES_KEY not in self.cache:
+            self.migrate_cache()
+        if self.fetcher is None:
+            self.fetcher = GithubFetcher()
+        if self.fetcher.cache is None:
+            self.fetcher.cache = self.cache
+        if self.router is None:
+            self.router = LabelRouter(self.label_map, self.ignore_labels)
+        self.labels = [
+            self.fetcher.create(Label, label)
+            for label in self.fetcher.get_all(f'{self.repo.url}/labels', resource='labels')
+        ]
+
+    def migrate_cache(self):
+        """
+        Convert the closed issue list written by older versions, which pickled PyGithub issues, to issue records.
+        Single issues and entries that can no longer be loaded are dropped.
+
+        Returns:
+            None
+        """
+        for key in list(self.cache.iterkeys()):
+            if key != LEGACY_CLOSED_ISSUES_KEY and not isinstance(key, int):
+                continue
+            try:
+                value, expire_time = self.cache.get(key, expire_time=True)
+                expire = max(expire_time - time.time(), 1) if expire_time else None
+                if key == LEGACY_CLOSED_ISSUES_KEY:
+                    issues = {number: IssueRecord.from_issue(issue).to_tuple()
+                              for number, issue in value['issues'].items()}
+                    self.cache.set(CLOSED_ISSUES_KEY, dict(value, issues=issues), expire=expire)
+            except Exception as e:
+                if logger.isEnabledFor(DEBUG):
+                    logger.debug(f'Dropping cache entry {key}: {e}')
+            self.cache.delete(key)
+
+    def get_tag_date(self, tag: Tag) -> datetime:
+        """
+        Get the date of a tag without timezone so it can be compared with issue close dates
+
+        Args:
+            tag: Tag to get date for
+
+        Returns:
+            Date of the tag's commit
+        """
+        if tag.name not in self.tag_dates:
+            self.tag_dates[tag.name] = self.parse_date(tag.commit.commit.last_modified)
+        return self.tag_dates[tag.name]
 
     @staticmethod
-    def sort_item(x):
-        m = parse(x.commit.commit.last_modified)
-        return m
+    def parse_date(value: str) -> datetime:
+        """
+        Parse a date from Github as a UTC date without timezone, which is how issue close dates are stored
 
-    def get_versions(self):
+        Args:
+            value: Date to parse
+
+        Returns:
+            Parsed date
+        """
+        date = parse(value)
+        return date.astimezone(timezone.utc).replace(tzinfo=None) if date.tzinfo else date
+
+    def fetch_tag_date(self, tag_data: dict) -> datetime:
         """
+        Fetch the date of a tag from the tag's commit
+
+        Args:
+            tag_data: Tag as returned by the tags api
+
+        Returns:
+            Date of the tag's commit without timezone
+        """
+        commit, headers = self.fetcher.get(f'{self.repo.url}/git/commits/{tag_data["commit"]["sha"]}',
+                                           resource='commits')
+        return self.parse_date(headers.get('Last-Modified', commit['committer']['date']))
+
+    def query_tag_dates(self) -> Dict[str, datetime]:
+        """
+        Query the dates of all tags with GraphQL, 100 tags per request
 
         Returns:
+            Dictionary of tag name to the date of the tag's commit
+        """
+        owner, name = self.repo.full_name.split('/', 1)
+        dates = dict()
+        cursor = None
+        while True:
+            data = self.fetcher.graphql(TAG_DATES_QUERY, dict(owner=owner, name=name, cursor=cursor))
+            refs = data['repository']['refs']
+            for node in refs['nodes']:
+                target = node['target']
+                # annotated tags point to a tag object that points to the commit
+                if 'target' in target:
+                    target = target['target']
+                if target and 'committedDate' in target:
+                    dates[node['name']] = self.parse_date(target['committedDate'])
+            if not refs['pageInfo']['hasNextPage']:
+                return dates
+            cursor = refs['pageInfo']['endCursor']
+
+    def resolve_tag_dates(self, tags_data: List[dict]) -> Dict[str, datetime]:
+        """
+        Resolve the dates of tags. Dates are stored in the cache by commit, so only tags on new commits are resolved.
+        They are read from the local clone when one is set. The rest are queried in bulk with GraphQL when we have a
+        token and any left over are fetched one commit per tag.
 
+        Args:
+            tags_data: Tags as returned by the tags api
+
+        Returns:
+            Dictionary of tag name to the date of the tag's commit
+        """
+        known = self.cache.get(TAG_DATES_KEY, dict())
+        missing = [tag for tag in tags_data if tag['commit']['sha'] not in known]
+        if not missing:
+            return {tag['name']: known[tag['commit']['sha']] for tag in tags_data}
+        if self.local_repo:
+            # only import pygit2 when a local clone is used
+            from pygit2 import Repository as GitRepository
+            local_repo = GitRepository(self.local_repo)
+            for tag in missing:
+                commit = local_repo.get(tag['commit']['sha'])
+                if commit is not None:
+                    known[tag['commit']['sha']] = datetime.utcfromtimestamp(commit.commit_time)
+            missing = [tag for tag in missing if tag['commit']['sha'] not in known]
+        if missing and self.fetcher.token:
+            queried = self.query_tag_dates()
+            for tag in missing:
+                if tag['name'] in queried:
+                    known[tag['commit']['sha']] = queried[tag['name']]
+            missing = [tag for tag in missing if tag['commit']['sha'] not in known]
+        if missing:
+            for tag, date in zip(missing, self.fetcher.map(self.fetch_tag_date, missing)):
+                known[tag['commit']['sha']] = date
+        self.cache.set(TAG_DATES_KEY, known)
+        return {tag['name']: known[tag['commit']['sha']] for tag in tags_data}
+
+    def get_versions(self):
+        """
+        Get the tags of the repo
+
+        Returns:
+            Tags sorted by date
         """
         if logger.isEnabledFor(DEBUG):
             logger.debug(f'Loading tags from {self.repo.name}')
-        tags = list(self.repo.get_tags())
-        tags.sort(key=self.sort_item)
+        tags_data = self.fetcher.get_all(f'{self.repo.url}/tags', resource='tags')
+        self.tag_dates.update(self.resolve_tag_dates(tags_data))
+        tags = [self.fetcher.create(Tag, tag_data) for tag_data in tags_data]
+        tags.sort(key=self.get_tag_date)
         return tags
 
     @staticmethod
@@ -155,10 +389,22 @@ class GithubChangelogSource:
         Returns:
 
         """
-        return (not filter_pull_requests or
-                (issue.pull_request is None or issue.pull_request.html_url != issue.html_url)
-                ) and issue.closed_at and tag_date.replace(tzinfo=None) > issue.closed_at and \
-               (not prev_ver_date or prev_ver_date < issue.closed_at)
+        return (not filter_pull_requests or not GithubChangelogSource.is_pull_request(issue)) and \
+            issue.closed_at and tag_date.replace(tzinfo=None) > issue.closed_at and \
+            (not prev_ver_date or prev_ver_date < issue.closed_at)
+
+    @staticmethod
+    def is_pull_request(issue) -> bool:
+        """
+        Is the issue a pull request
+
+        Args:
+            issue: Issue to check
+
+        Returns:
+            True if the issue is a pull request
+        """
+        return issue.pull_request_url is not None and issue.pull_request_url == issue.html_url
 
     def get_changes_since(self, tag: Tag, filter_pull_requests=True, topics_from_issues: bool = True,
                           filter_unlabeled: bool = True, unlabeled_label: str = UNCATEGORIZED,
@@ -178,61 +424,211 @@ class GithubChangelogSource:
 
         """
         # try to get the previous version first
-        prev_tag_date = prev_tag.commit.commit.last_modified if prev_tag else None
-        # and parse its date
-        prev_tag_date = parse(prev_tag_date).replace(tzinfo=None) if prev_tag_date else None
+        prev_tag_date = self.get_tag_date(prev_tag) if prev_tag else None
         # do the same current version
-        tag_date = tag.commit.commit.last_modified
-        tag_date = parse(tag_date)
+        tag_date = self.get_tag_date(tag)
         # now what kind of results. If we include topics, it is a dictionary of list
-        results = defaultdict(list) if topics_from_issues else list
-        # loop over issue numbers
-        for issue_number in range(1, 50000):
-            # try to get issue. If it fails, we are end of our issue list
-            try:
-                issue = self.get_issue(issue_number)
-            except UnknownObjectException:
-                break
+        results = defaultdict(list) if topics_from_issues else list()
+        # loop over closed issues
+        for issue in self.get_closed_issues_between(prev_tag_date, tag_date):
             # are we filtering issues and if so does the item meet the filter
             if self.filter(issue, filter_pull_requests, tag_date, prev_tag_date):
-                # are we getting topic
-                if topics_from_issues:
-                    # does the issue have labels
-                    if issue.labels:
-                        # do we have a label map
-                        if self.label_map:
-                            # should we split the issues across the map
-                            if split_issues_between_topics:
-                                for label in issue.labels:
-                                    if label.name in self.label_map and label.name not in self.ignore_labels:
-                                        results[self.label_map[label.name]].append(issue)
-                            # if the issues is not ignore
-                            elif all([x.name not in self.ignore_labels for x in issue.labels]):
-                                # execute in order of label map
-                                for label in self.label_map.keys():
-                                    llist = [x.name for x in issue.labels]
-                                    if label in llist:
-                                        results[self.label_map[label]].append(issue)
-                                        break
-                        else:
-                            # should we split the issue?
-                            if split_issues_between_topics:
-                                # loop through each label and add issue there
-                                for label in issue.labels:
-                                    if label.name not in self.ignore_labels:
-                                        results[label.name].append(issue)
-                            else:
-                                # use the first label
-                                results[issue.labels[0].name].append(issue)
-                    elif not filter_unlabeled:
-                        results[unlabeled_label].append(issue)
-
-                else:
-                    results.append(issue)
+                self.add_issue(results, issue, topics_from_issues, filter_unlabeled, unlabeled_label,
+                               split_issues_between_topics)
 
         return {tag.name: results}
 
-    def get_issue(self, issue_number) -> Issue:
+    def get_changes_by_version(self, tags: List[Tag], filter_pull_requests=True, topics_from_issues: bool = True,
+                               filter_unlabeled: bool = True, unlabeled_label: str = UNCATEGORIZED,
+                               split_issues_between_topics: bool = True) -> \
+            Dict[str, Union[Dict[str, List[IssueRecord]], List[IssueRecord]]]:
+        """
+        Get the changes for every version at once. Issues are loaded once and each issue is assigned to the first
+        tag created after it was closed using a binary search over the tag dates.
+
+        Args:
+            tags: Tags sorted by date, as returned by get_versions
+            filter_pull_requests: Should PRs be filtered out
+            topics_from_issues: Group issues by topics from their labels
+            filter_unlabeled: Should unlabeled issues be filtered out
+            unlabeled_label: Topic for unlabeled issues
+            split_issues_between_topics: Add issues with multiple labels to each topic
+
+        Returns:
+            Dictionary of tag name to the changes of that version
+        """
+        tag_dates = [self.get_tag_date(tag) for tag in tags]
+        results = {tag.name: defaultdict(list) if topics_from_issues else list() for tag in tags}
+        for issue in self.get_closed_issues():
+            if not issue.closed_at or (filter_pull_requests and self.is_pull_request(issue)):
+                continue
+            idx = bisect_right(tag_dates, issue.closed_at)
+            # issues closed after the last tag, or exactly when a tag was created, are not part of any version
+            if idx == len(tag_dates) or (idx > 0 and tag_dates[idx - 1] == issue.closed_at):
+                continue
+            self.add_issue(results[tags[idx].name], issue, topics_from_issues, filter_unlabeled, unlabeled_label,
+                           split_issues_between_topics)
+        return results
+
+    def add_issue(self, results: Union[Dict[str, List[IssueRecord]], List[IssueRecord]], issue: IssueRecord,
+                  topics_from_issues: bool = True, filter_unlabeled: bool = True,
+                  unlabeled_label: str = UNCATEGORIZED, split_issues_between_topics: bool = True):
+        """
+        Add an issue to the results of a version
+
+        Args:
+            results: Results of the version. A dictionary of topic to issues when topics_from_issues is set
+            issue: Issue to add
+            topics_from_issues: Group issues by topics from their labels
+            filter_unlabeled: Should unlabeled issues be filtered out
+            unlabeled_label: Topic for unlabeled issues
+            split_issues_between_topics: Add issues with multiple labels to each topic
+
+        Returns:
+            None
+        """
+        # are we getting topic
+        if topics_from_issues:
+            # does the issue have labels
+            if issue.labels:
+                # the router computes the topics once for each set of labels
+                for topic in self.router.get_topics(issue.labels, split_issues_between_topics):
+                    results[topic].append(issue)
+            elif not filter_unlabeled:
+                results[unlabeled_label].append(issue)
+
+        else:
+            results.append(issue)
+
+    def get_closed_issues(self) -> List[IssueRecord]:
+        """
+        Get all closed issues from github or cache. Issues are listed in bulk and only once per run. When the cache
+        has a previous listing, only issues updated since the newest issue in that listing are fetched. That
+        request is conditional, so it does not count against the rate limit when nothing changed.
+
+        Returns:
+            Closed issues sorted by number
+        """
+        if self.closed_issues is None:
+            cached = self.cache.get(CLOSED_ISSUES_KEY)
+            params = dict(state='closed', sort='updated', direction='asc')
+            if cached is None:
+                if logger.isEnabledFor(DEBUG):
+                    logger.debug(f'Loading closed issues from {self.repo.name}')
+                cached = dict(listed_at=datetime.utcnow(), synced_at=None, issues=dict())
+                listing = self.fetcher.get_all(f'{self.repo.url}/issues', params)
+            else:
+                since = cached['synced_at']
+                if isinstance(since, datetime):
+                    since = since.strftime(GITHUB_DATE_FORMAT)
+                if logger.isEnabledFor(DEBUG):
+                    logger.debug(f'Loading closed issues from {self.repo.name} updated since {since}')
+                params['since'] = since
+                listing = self.fetcher.get_all(f'{self.repo.url}/issues', params, resource='issues', max_age=0)
+            issues = cached['issues']
+            get_metrics().increment('github.issues_fetched', len(listing))
+            records = []
+            for issue in listing:
+                records.append(IssueRecord.from_json(issue))
+                issues[issue['number']] = records[-1].to_tuple()
+                # use the update time from github so the next since query is the same until an issue changes
+                if cached['synced_at'] is None or issue['updated_at'] > cached['synced_at']:
+                    cached['synced_at'] = issue['updated_at']
+            # expire relative to the first full listing so issues that are reopened or removed drop out
+            expire = self.fetcher.expiry['issues'] - (datetime.utcnow() - cached['listed_at']).total_seconds()
+            self.cache.set(CLOSED_ISSUES_KEY, cached, expire=max(expire, 1))
+            self.closed_issues = [IssueRecord.from_tuple(issues[number]) for number in sorted(issues)]
+            self.update_store(cached, records)
+        return self.closed_issues
+
+    def update_store(self, cached: dict, records: List[IssueRecord]):
+        """
+        Write the closed issues to the issue store when they changed since the store was written
+
+        Args:
+            cached: Cached closed issue listing
+            records: Issues fetched for the listing
+
+        Returns:
+            None
+        """
+        listed_at, synced_at = cached['listed_at'].isoformat(), cached['synced_at']
+        if isinstance(synced_at, datetime):
+            synced_at = synced_at.strftime(GITHUB_DATE_FORMAT)
+        meta = self.store.get_meta()
+        if meta is None or meta.get('listed_at') != listed_at or meta.get('synced_at') != synced_at or \
+                not self.store.contains_all(records, meta):
+            self.store.write(self.closed_issues, listed_at=listed_at, synced_at=synced_at)
+
+    def get_closed_issues_between(self, closed_after: datetime = None, closed_before: datetime = None) -> \
+            List[IssueRecord]:
+        """
+        Get the closed issues that can have been closed in a date range. Sources that index issues by date can
+        return less than all the closed issues. The issues still have to be filtered by date
+
+        Args:
+            closed_after: Start of the range
+            closed_before: End of the range
+
+        Returns:
+            Closed issues sorted by number
+        """
+        if self.closed_issues is None:
+            issues = self.get_stored_issues(closed_after, closed_before)
+            if issues is not None:
+                return issues
+        return self.get_closed_issues()
+
+    def get_stored_issues(self, closed_after: datetime = None, closed_before: datetime = None) -> \
+            Optional[List[IssueRecord]]:
+        """
+        Get the issues closed in a date range from the issue store. Issues updated since the store was written are
+        listed with a conditional request first and the store is only used when none of them changed, so the
+        result is the same as filtering all the closed issues
+
+        Args:
+            closed_after: Start of the range
+            closed_before: End of the range
+
+        Returns:
+            Closed issues sorted by number or None when the store cannot be used
+        """
+        meta = self.store.get_meta()
+        if meta is None or \
+                (datetime.utcnow() - parse_isoformat(meta['listed_at'])).total_seconds() >= \
+                self.fetcher.expiry['issues']:
+            return None
+        if logger.isEnabledFor(DEBUG):
+            logger.debug(f'Checking issues of {self.repo.name} updated since {meta["synced_at"]}')
+        params = dict(state='closed', sort='updated', direction='asc', since=meta['synced_at'])
+        listing = self.fetcher.get_all(f'{self.repo.url}/issues', params, resource='issues', max_age=0)
+        # since includes the issues updated at that time, which are already stored
+        if not self.store.contains_all((IssueRecord.from_json(issue) for issue in listing), meta):
+            return None
+        issues = self.store.get_issues(closed_after, closed_before, meta)
+        if issues is None:
+            return None
+        get_metrics().increment('github.stored_issues_read', len(issues))
+        return sorted(issues, key=lambda issue: issue.number)
+
+    def export_snapshot(self, path: str):
+        """
+        Export the labels, tags and closed issues of the repo to a snapshot that can be replayed without network
+        access
+
+        Args:
+            path: Path of the snapshot
+
+        Returns:
+            None
+        """
+        tags = [(tag.name, tag.commit.sha, self.get_tag_date(tag)) for tag in self.get_versions()]
+        issues = self.get_closed_issues()
+        write_snapshot(path, self.repo.full_name, [label.name for label in self.labels], tags, issues)
+        user_logger.info(f'Exported {len(tags)} tags and {len(issues)} closed issues of {self.repo.full_name} '
+                         f'to {path}')
+
+    def get_issue(self, issue_number) -> IssueRecord:
         """
         Gets an issues from github or cache
 
@@ -242,13 +638,79 @@ class GithubChangelogSource:
         Returns:
             Github issue
         """
-        issue = self.cache.get(issue_number)
-        if issue is None:
-            if logger.isEnabledFor(DEBUG):
-                logger.debug(f'Caching issue {issue_number}')
-            issue = self.repo.get_issue(issue_number)
-            if issue.closed_at:
-                self.cache.set(issue_number, issue, expire=60*60*24)
-            else:
-                self.cache.set(issue_number, issue, expire=60 * 60 * 1)
-        return issue
+        issue, _ = self.fetcher.get(f'{self.repo.url}/issues/{issue_number}', resource='issues')
+        return IssueRecord.from_json(issue)
+
+
+@dataclass()
+class SnapshotChangelogSource(GithubChangelogSource):
+    """
+    Github changelog source that reads a snapshot created with :meth:`GithubChangelogSource.export_snapshot`. It makes
+    no requests to Github and does not use the cache.
+    """
+    repo: Repository = None
+    snapshot: GithubSnapshot = None
+
+    def __post_init__(self):
+        self.labels = [LabelRecord(name) for name in self.snapshot.labels]
+        self.tag_dates.update(self.snapshot.tag_dates)
+        if self.router is None:
+            self.router = LabelRouter(self.label_map, self.ignore_labels)
+
+    def get_versions(self) -> List[TagRecord]:
+        """
+        Get the tags of the snapshot
+
+        Returns:
+            Tags sorted by date
+        """
+        tags = self.snapshot.tags
+        tags.sort(key=self.get_tag_date)
+        return tags
+
+    def get_closed_issues(self) -> List[IssueRecord]:
+        """
+        Get all closed issues of the snapshot
+
+        Returns:
+            Closed issues sorted by number
+        """
+        if self.closed_issues is None:
+            self.closed_issues = sorted(self.snapshot.get_issues(), key=lambda issue: issue.number)
+        return self.closed_issues
+
+    def get_closed_issues_between(self, closed_after: datetime = None, closed_before: datetime = None) -> \
+            List[IssueRecord]:
+        """
+        Get the closed issues of the blocks of the snapshot that overlap a date range
+
+        Args:
+            closed_after: Start of the range
+            closed_before: End of the range
+
+        Returns:
+            Closed issues sorted by number
+        """
+        if self.closed_issues is not None:
+            return self.closed_issues
+        return sorted(self.snapshot.get_issues(closed_after, closed_before), key=lambda issue: issue.number)
+
+
+def export_snapshot(src: str, output: str, token: str = None, api_url: str = DEFAULT_API_URL,
+                    concurrency: int = DEFAULT_CONCURRENCY):
+    """
+    Export a Github repo to a snapshot
+
+    Args:
+        src: Full name of the repo
+        output: Path of the snapshot
+        token: Github token
+        api_url: Url of the Github API
+        concurrency: Number of concurrent requests to Github
+
+    Returns:
+        None
+    """
+    fetcher = GithubFetcher(token=os.getenv('GITHUB_TOKEN', token if token else ''), base_url=api_url,
+                            concurrency=concurrency)
+    GithubChangelogSource(repo=fetcher.gh.get_repo(src), fetcher=fetcher).export_snapshot(output)
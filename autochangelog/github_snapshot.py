@@ -0,0 +1,148 @@
+import json
+import zipfile
+from collections import namedtuple
+from dataclasses import dataclass, field
+from datetime import datetime
+from logging import DEBUG, getLogger
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from autochangelog.data import IssueRecord, parse_isoformat
+from autochangelog.metrics import get_metrics
+
+logger = getLogger(__name__)
+SNAPSHOT_FORMAT = 'autochangelog-github-snapshot'
+SNAPSHOT_VERSION = 1
+META_ENTRY = 'meta.json'
+INDEX_ENTRY = 'index.json'
+# number of issues in each compressed block of the snapshot
+BLOCK_SIZE = 1000
+TagRecord = namedtuple('TagRecord', ['name', 'sha'])
+
+
+def encode_issue(issue: IssueRecord) -> str:
+    """
+    Encode an issue as a json line
+
+    Args:
+        issue: Issue
+
+    Returns:
+        Json array in the layout of IssueRecord.to_tuple
+    """
+    value = list(issue.to_tuple())
+    value[3] = issue.closed_at.isoformat() if issue.closed_at else None
+    return json.dumps(value, separators=(',', ':'))
+
+
+def decode_issue(line: str) -> IssueRecord:
+    """
+    Decode an issue encoded with encode_issue
+
+    Args:
+        line: Json line
+
+    Returns:
+        Issue
+    """
+    value = json.loads(line)
+    value[3] = parse_isoformat(value[3]) if value[3] else None
+    return IssueRecord.from_tuple(value)
+
+
+def write_snapshot(path: str, full_name: str, labels: List[str], tags: List[Tuple[str, str, datetime]],
+                   issues: List[IssueRecord], block_size: int = BLOCK_SIZE):
+    """
+    Write a snapshot of a Github repository. The snapshot is a zip file with the repository metadata, labels and tags
+    in meta.json and the issues as json lines sorted by the date they were closed. The issues are split in blocks
+    that are compressed separately and index.json has the range of close dates of each block, so the issues of a
+    release can be read without decompressing the others.
+
+    Args:
+        path: Path of the snapshot
+        full_name: Full name of the repository
+        labels: Label names
+        tags: Name, commit sha and date of each tag
+        issues: Closed issues
+        block_size: Number of issues in each block
+
+    Returns:
+        None
+    """
+    issues = sorted(issues, key=lambda issue: (issue.closed_at is not None, issue.closed_at or datetime.min,
+                                               issue.number))
+    blocks = []
+    with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for start in range(0, len(issues), block_size):
+            block = issues[start:start + block_size]
+            entry = f'issues/{len(blocks):06d}.jsonl'
+            archive.writestr(entry, '\n'.join(map(encode_issue, block)))
+            blocks.append(dict(
+                entry=entry, count=len(block),
+                first=block[0].closed_at.isoformat() if block[0].closed_at else None,
+                last=block[-1].closed_at.isoformat() if block[-1].closed_at else None
+            ))
+        archive.writestr(INDEX_ENTRY, json.dumps(dict(blocks=blocks)))
+        archive.writestr(META_ENTRY, json.dumps(dict(
+            format=SNAPSHOT_FORMAT, version=SNAPSHOT_VERSION, repository=full_name,
+            exported_at=datetime.utcnow().isoformat(), issues=len(issues), labels=labels,
+            tags=[dict(name=name, sha=sha, date=date.isoformat()) for name, sha, date in tags]
+        ), indent=1))
+    if logger.isEnabledFor(DEBUG):
+        logger.debug(f'Wrote {len(issues)} issues in {len(blocks)} blocks to {path}')
+
+
+@dataclass()
+class GithubSnapshot:
+    """
+    Reader of a snapshot written by :func:`write_snapshot`
+    """
+    path: str
+    archive: zipfile.ZipFile = field(default=None, init=False, repr=False)
+    meta: Dict[str, Any] = field(default=None, init=False, repr=False)
+    blocks: List[Dict[str, Any]] = field(default=None, init=False, repr=False)
+
+    def __post_init__(self):
+        self.archive = zipfile.ZipFile(self.path)
+        self.meta = json.loads(self.archive.read(META_ENTRY))
+        if self.meta.get('format') != SNAPSHOT_FORMAT or self.meta.get('version') != SNAPSHOT_VERSION:
+            raise ValueError(f'{self.path} is not a version {SNAPSHOT_VERSION} Github snapshot')
+        self.blocks = json.loads(self.archive.read(INDEX_ENTRY))['blocks']
+
+    @property
+    def full_name(self) -> str:
+        return self.meta['repository']
+
+    @property
+    def labels(self) -> List[str]:
+        return self.meta['labels']
+
+    @property
+    def tags(self) -> List[TagRecord]:
+        return [TagRecord(tag['name'], tag['sha']) for tag in self.meta['tags']]
+
+    @property
+    def tag_dates(self) -> Dict[str, datetime]:
+        return {tag['name']: parse_isoformat(tag['date']) for tag in self.meta['tags']}
+
+    def get_issues(self, closed_after: Optional[datetime] = None, closed_before: Optional[datetime] = None) -> \
+            Iterator[IssueRecord]:
+        """
+        Read the issues of the snapshot. When a range is set, only the blocks that overlap the range are read, so
+        issues just outside of the range can be returned too
+
+        Args:
+            closed_after: Skip blocks of issues closed before this date
+            closed_before: Skip blocks of issues closed after this date
+
+        Returns:
+            Issues sorted by the date they were closed
+        """
+        after = closed_after.isoformat() if closed_after else None
+        before = closed_before.isoformat() if closed_before else None
+        for block in self.blocks:
+            if before and block['first'] and block['first'] > before:
+                break
+            if after and block['last'] and block['last'] < after:
+                continue
+            get_metrics().increment('github.snapshot_blocks_read')
+            for line in self.archive.read(block['entry']).decode('utf-8').splitlines():
+                yield decode_issue(line)
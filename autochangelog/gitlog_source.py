@@ -1,15 +1,148 @@
+import hashlib
+import heapq
+import os
+import pathlib
 import re
 from collections import defaultdict
-from logging import getLogger
+from concurrent.futures import ProcessPoolExecutor
+from logging import DEBUG, getLogger
 import click
+import diskcache
 from dataclasses import dataclass, field
-from typing import List
-from pygit2 import Repository, GIT_SORT_TOPOLOGICAL, GIT_SORT_TIME
-from autochangelog.data import SrcData
+from typing import Dict, Iterator, List, Optional, Tuple
+from pygit2 import Commit, Oid, Repository, GIT_SORT_TOPOLOGICAL
+from autochangelog.data import CommitRecord, SrcData
+from autochangelog.exclusion_matcher import ExclusionMatcher
+from autochangelog.metrics import get_metrics
+from autochangelog.tag_index import DEFAULT_TAG_PATTERN, DEVELOPMENT_RELEASE, TagIndex, compile_tag_pattern
 from autochangelog.utils import generator
 
 logger = getLogger(__name__)
 user_logger = getLogger('user')
+CACHE_DIRECTORY = os.path.join(str(pathlib.Path.home()), '.autochangelog', 'git')
+# Version of the release index layout. Bump when the layout changes so indexed releases are walked again
+INDEX_VERSION = 4
+
+
+def parse_exclude(ctx, param, value):
+    """
+    Validate the exclusion rules
+
+    Args:
+        ctx: Click context
+        param: Parameter
+        value: Exclusion rules
+
+    Returns:
+        Exclusion rules
+    """
+    try:
+        ExclusionMatcher(list(value))
+    except re.error as e:
+        raise click.BadParameter(f'Invalid regex: {e}')
+    return value
+
+
+def group_release_notes(records: List[CommitRecord], matcher: ExclusionMatcher) -> Dict[str, List[CommitRecord]]:
+    """
+    Group the commits of a release by message, dropping excluded commits
+
+    Args:
+        records: Commits of a release
+        matcher: Exclusion matcher
+
+    Returns:
+        Commits by message
+    """
+    notes = defaultdict(list)
+    for record in records:
+        if not matcher.matches(record.message):
+            notes[record.message.strip()].append(record)
+    return notes
+
+
+def order_commits(commits: List[Commit]) -> List[Commit]:
+    """
+    Order the commits of a release from the newest to the oldest. Every commit comes before its parents and of the
+    commits whose children in the release were taken, the newest comes first, then the one with the lowest id. The
+    order only depends on the commits of the release, so it is the same however the history was walked.
+
+    Args:
+        commits: Commits of a release
+
+    Returns:
+        Ordered commits
+    """
+    commits_by_id = {commit.id: commit for commit in commits}
+    children = dict.fromkeys(commits_by_id, 0)
+    for commit in commits:
+        for parent_id in commit.parent_ids:
+            if parent_id in children:
+                children[parent_id] += 1
+    ready = [(-commit.commit_time, commit.id, commit) for commit in commits if not children[commit.id]]
+    heapq.heapify(ready)
+    ordered = []
+    while ready:
+        commit = heapq.heappop(ready)[2]
+        ordered.append(commit)
+        for parent_id in commit.parent_ids:
+            if parent_id in children:
+                children[parent_id] -= 1
+                if not children[parent_id]:
+                    parent = commits_by_id[parent_id]
+                    heapq.heappush(ready, (-parent.commit_time, parent_id, parent))
+    return ordered
+
+
+def process_release_range(path: str, targets: List[Optional[str]], ranks: List[int], excluded_messages: List[str],
+                          exclude_summary_only: bool) -> Dict[int, Tuple[List[Tuple], Dict[str, List[int]]]]:
+    """
+    Worker of GitChangelogSource.process_releases. Walks a range of releases in its own repository and groups their
+    notes
+
+    Args:
+        path: Path of the repository
+        targets: Commit id each tag points at, ordered by rank. None for HEAD
+        ranks: Contiguous ranks of the releases to walk
+        excluded_messages: Exclusion rules
+        exclude_summary_only: Match exclusions against only the first line of the commit message
+
+    Returns:
+        Commit records as tuples and the positions of the records of each note, for each rank
+    """
+    gcs = GitChangelogSource(repo=Repository(path), excluded_messages=excluded_messages,
+                             exclude_summary_only=exclude_summary_only)
+    walked = gcs.walk_releases([None if target is None else Oid(hex=target) for target in targets], ranks)
+    processed = dict()
+    for rank in ranks:
+        records = [CommitRecord.from_commit(commit, path) for commit in walked.pop(rank)]
+        notes = defaultdict(list)
+        for position, record in enumerate(records):
+            if not gcs.exclusion_matcher.matches(record.message):
+                notes[record.message.strip()].append(position)
+        processed[rank] = ([record.to_tuple() for record in records], dict(notes))
+    return processed
+
+
+def parse_tag_pattern(ctx, param, value):
+    """
+    Validate the tag pattern
+
+    Args:
+        ctx: Click context
+        param: Parameter
+        value: Tag pattern
+
+    Returns:
+        Tag pattern
+    """
+    try:
+        compile_tag_pattern(value)
+    except re.error as e:
+        raise click.BadParameter(f'Invalid regex: {e}')
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+    return value
 
 
 @click.command(help="Get changelog using a Git repo")
@@ -17,19 +150,32 @@ user_logger = getLogger('user')
 @click.option("--version", default=None)
 @click.option(
     '--exclude', '-e', multiple=True,
-    default=['Merge branch', 'Merge pull request', 'Merge remote-tracking branch', 'Bump version', 'Fix linting']
+    default=['Merge branch', 'Merge pull request', 'Merge remote-tracking branch', 'Bump version', 'Fix linting'],
+    callback=parse_exclude,
+    help="Exclude commits whose message matches. Use prefix:, regex: or type: (conventional commit type) for other "
+         "kinds of rules. Rules without a kind are substrings"
 )
+@click.option("--exclude-summary-only/--exclude-full-message", default=False,
+              help="Match exclusions against only the first line of the commit message")
+@click.option("--cache/--no-cache", default=True, help="Index tagged releases so later runs only walk new commits")
+@click.option("--tag-pattern", default=DEFAULT_TAG_PATTERN, callback=parse_tag_pattern,
+              help="Regex searched in tag names to find their version. Uses the group named version or the first "
+                   "group. Tags that do not match are ignored")
+@click.option("--processes", type=click.IntRange(min=1), default=1,
+              help="Number of processes that walk the releases and group their notes. Each process walks its own "
+                   "range of tags. Only used when loading all versions")
 @generator
 @click.pass_context
-def git(ctx, src, version, exclude):
+def git(ctx, src, version, exclude, exclude_summary_only, cache, tag_pattern, processes):
     # load the git data from source specified
     repo = Repository(src)
-    gcs = GitChangelogSource(repo=repo, excluded_messages=exclude)
+    gcs = GitChangelogSource(
+        repo=repo, excluded_messages=list(exclude), exclude_summary_only=exclude_summary_only,
+        cache=diskcache.Cache(CACHE_DIRECTORY) if cache else None, tag_pattern=tag_pattern, processes=processes
+    )
     ctx.obj.src = gcs
     if version is None:
-        versions = gcs.get_versions()
-        for ver in versions:
-            changes = gcs.get_changes_since(ver)
+        for changes in gcs.get_all_changes():
             yield SrcData(items=changes, src='git')
     else:
         changes = gcs.get_changes_since(version)
@@ -41,44 +187,252 @@ class GitChangelogSource:
     repo: Repository
     issues: List = None
     excluded_messages: List = field(default_factory=list)
-    __release_expr = re.compile('.*?([0-9.]+).*?')
+    cache: diskcache.Cache = field(default=None)
+    exclude_summary_only: bool = False
+    tag_pattern: str = DEFAULT_TAG_PATTERN
+    processes: int = 1
+    exclusion_matcher: ExclusionMatcher = field(default=None, init=False, repr=False)
+    tag_index: TagIndex = field(default=None, init=False, repr=False)
+
+    def __post_init__(self):
+        self.exclusion_matcher = ExclusionMatcher(list(self.excluded_messages), self.exclude_summary_only)
+
+    def get_tag_index(self) -> TagIndex:
+        """
+        Get the tag index. The index is built on first use
+
+        Returns:
+            Tag index
+        """
+        if self.tag_index is None:
+            self.tag_index = TagIndex.build(self.repo, self.tag_pattern, self.cache)
+        return self.tag_index
 
     def get_versions(self):
-        regex = re.compile('^refs/tags')
-        tags = list(sorted(list(filter(lambda r: regex.match(r), self.repo.listall_references()))))
-        tags.append('HEAD')
-        tags.reverse()
-        return tags
+        return list(self.get_tag_index().tags)
 
     def get_changes_since(self, tag):
-        tags = self.get_versions()
-        release_ranges = dict()
+        index = self.get_tag_index()
         release_notes = defaultdict(lambda: defaultdict(list))
-        for index, other_tag in enumerate(tags):
-            if other_tag == tag:
-                ref = self.repo.lookup_reference(other_tag)
-                next_release = self.repo.lookup_reference(tags[index + 1]) if index != len(tags) - 1 else 'Beginning'
-                walker = self.repo.walk(
-                    ref.target if ref.name != 'HEAD' else self.repo.head.target,
-                    GIT_SORT_TOPOLOGICAL | GIT_SORT_TIME
-                )
-                rm = self.__release_expr.match(other_tag)
-                release_name = rm.group(1) if rm else 'Development'
-                if not isinstance(next_release, str):
-                    walker.hide(next_release.target)
-                for commit in walker:
-                    if release_name not in release_ranges:
-                        if next_release and not isinstance(next_release, str):
-                            nc = self.repo.walk(next_release.target)
-                            nc = next(nc)
-                            nc = nc.commit_time
-                        else:
-                            nc = None
-                        release_ranges[release_name] = (nc, commit.commit_time)
-                    if next_release and (not isinstance(next_release, str) and commit.oid == next_release.target):
-                        break
-                    if not any([x in commit.message for x in self.excluded_messages]):
-                        release_notes[release_name][commit.message.strip()].append(commit)
-
+        position = index.find(tag)
+        if position is None:
+            user_logger.warning(f'Could not find tag {tag}')
+            return release_notes
+        tips = {index.targets[position] if position else self.repo.head.target: 0}
+        # commits any older tag can reach belong to older releases. Merged branches can hold older tags the previous
+        # tag cannot reach, so all of them are ranked
+        for target in index.targets[position + 1:]:
+            tips[target] = 1
+        release_name = index.names[position]
+        for commit in self.walk_ranks(tips, 0)[0]:
+            if not self.exclusion_matcher.matches(commit.message):
+                record = CommitRecord.from_commit(commit, self.repo.path)
+                release_notes[release_name][commit.message.strip()].append(record)
         return release_notes
 
+    def get_release_name(self, tag: str) -> str:
+        """
+        Get the release name for a tag. The name is the version matched by the tag pattern and HEAD is Development
+
+        Args:
+            tag: Reference name of the tag
+
+        Returns:
+            Release name
+        """
+        index = self.get_tag_index()
+        return index.names[index.positions[tag]] if tag in index.positions else DEVELOPMENT_RELEASE
+
+    def get_all_changes(self) -> Iterator[Dict[str, Dict[str, List]]]:
+        """
+        Get the changes for every release using a single walk of the history.
+
+        Each commit is assigned to the oldest release whose tag can reach it, which is the same range
+        get_changes_since produces for each tag. Releases are returned in the same order as get_versions.
+
+        When a cache is set, tagged releases are loaded from the release index and only commits newer than the
+        newest indexed tag are walked. When processes is more than one, the releases to walk are split between a pool
+        of processes, see :meth:`process_releases`.
+
+        Returns:
+            Iterator of release notes, one per release that contains commits
+        """
+        index = self.get_tag_index()
+        # rank each release by its position. The higher the rank, the older the release
+        tags, targets = index.tags, index.targets
+        records = [None] * len(tags)
+        keys = self.get_index_keys(tags, targets)
+        # load the oldest releases from the index until we find the first one that is missing
+        for rank in reversed(range(len(tags))):
+            if keys[rank] is None or keys[rank] not in self.cache:
+                break
+            # the index keys cover the repository path, so it is not stored with the records
+            records[rank] = [CommitRecord.from_tuple(record, self.repo.path) for record in self.cache[keys[rank]]]
+        if logger.isEnabledFor(DEBUG):
+            logger.debug(f'Loaded {sum(r is not None for r in records)} of {len(tags)} releases from index')
+
+        pending = [rank for rank, record in enumerate(records) if record is None]
+        processed = dict()
+        if self.processes > 1 and len(pending) > 1:
+            for rank, (release, notes) in self.process_releases(targets, pending).items():
+                records[rank], processed[rank] = release, notes
+        else:
+            walked = self.walk_releases(targets, pending)
+            # convert the walked commits to records as we go, so we never hold the commits and records of every
+            # release
+            for rank in pending:
+                records[rank] = [CommitRecord.from_commit(commit, self.repo.path) for commit in walked.pop(rank)]
+                processed[rank] = group_release_notes(records[rank], self.exclusion_matcher)
+        get_metrics().increment('git.releases_indexed', len(tags) - len(pending))
+        get_metrics().increment('git.releases_walked', len(pending))
+        get_metrics().increment('git.commits_walked', sum(len(records[rank]) for rank in pending))
+
+        for rank, tag in enumerate(tags):
+            if rank in processed:
+                notes = processed.pop(rank)
+                if keys[rank] is not None:
+                    self.cache[keys[rank]] = [record.to_tuple() for record in records[rank]]
+            else:
+                notes = group_release_notes(records[rank], self.exclusion_matcher)
+            # the notes reference the records we still need, so drop the rest once the release is handed over
+            records[rank] = None
+            if notes:
+                yield {index.names[rank]: notes}
+
+    def process_releases(self, targets: List[Oid], ranks: List[int]) -> \
+            Dict[int, Tuple[List[CommitRecord], Dict[str, List[CommitRecord]]]]:
+        """
+        Walk releases and group their notes in a pool of processes. The ranks are split into one contiguous range
+        per process. Each worker opens its own repository and walks its range with the tags of the older releases,
+        so it assigns the same commits as a walk of all the releases. The results are merged in tag order.
+
+        Args:
+            targets: Commit each tag points at, ordered by rank. None for HEAD
+            ranks: Contiguous ranks of the releases to walk, starting with HEAD
+
+        Returns:
+            Commit records and notes of each release by rank
+        """
+        size = -(-len(ranks) // min(self.processes, len(ranks)))
+        ranges = [ranks[start:start + size] for start in range(0, len(ranks), size)]
+        hex_targets = [None if target is None else str(target) for target in targets]
+        if logger.isEnabledFor(DEBUG):
+            logger.debug(f'Walking {len(ranks)} releases in {len(ranges)} processes')
+        processed = dict()
+        with ProcessPoolExecutor(len(ranges)) as executor:
+            futures = [
+                executor.submit(process_release_range, self.repo.path, hex_targets, release_ranks,
+                                list(self.excluded_messages), self.exclude_summary_only)
+                for release_ranks in ranges
+            ]
+            for future in futures:
+                for rank, (values, notes) in future.result().items():
+                    records = [CommitRecord.from_tuple(value, self.repo.path) for value in values]
+                    processed[rank] = (
+                        records, {message: [records[position] for position in positions]
+                                  for message, positions in notes.items()}
+                    )
+        return processed
+
+    def walk_releases(self, targets: List[Oid], ranks: List[int]) -> Dict[int, List[Commit]]:
+        """
+        Walk the commits of the newest releases in a single walk of the history.
+
+        Each commit is assigned to the oldest release whose tag can reach it. The tags of the older releases are
+        walked too, so commits they can reach are left out exactly. See :meth:`walk_ranks`.
+
+        Args:
+            targets: Commit each tag points at, ordered by rank. None for HEAD
+            ranks: Contiguous ranks of the releases to walk
+
+        Returns:
+            Commits of each release by rank
+        """
+        walked = {rank: [] for rank in ranks}
+        if not ranks:
+            return walked
+        tips = dict()
+        for rank, target in enumerate(targets):
+            if rank >= ranks[0]:
+                target = self.repo.head.target if target is None else target
+                tips[target] = max(tips.get(target, rank), rank)
+        walked.update(self.walk_ranks(tips, ranks[-1]))
+        return walked
+
+    def walk_ranks(self, tips: Dict[Oid, int], last_rank: int) -> Dict[int, List[Commit]]:
+        """
+        Walk the history from commits with a rank. Each commit gets the highest rank of the tips that can reach it.
+
+        Unlike hiding the tips of the older ranks, this does not depend on commit times, so ties and clock skew cannot
+        move commits between ranks. The commits of each rank are ordered with :func:`order_commits`, so their order
+        does not depend on the other tips either.
+
+        Args:
+            tips: Rank of each commit the walk starts from
+            last_rank: Highest rank whose commits are returned
+
+        Returns:
+            Commits by rank, for the ranks up to last_rank that have commits
+        """
+        walked = defaultdict(list)
+        for commit, rank in self.rank_commits(tips, last_rank):
+            walked[rank].append(commit)
+        return {rank: order_commits(commits) for rank, commits in walked.items()}
+
+    def rank_commits(self, tips: Dict[Oid, int], last_rank: int) -> Iterator[Tuple[Commit, int]]:
+        """
+        Rank the commits reachable from the tips. The walk is topological, so every child is seen before its parents
+        and the rank of a commit is final by the time we reach it. Commits with a rank above last_rank are only
+        followed to propagate their rank, and the walk stops once no commit with a rank up to last_rank is left
+
+        Args:
+            tips: Rank of each commit the walk starts from
+            last_rank: Highest rank whose commits are returned
+
+        Returns:
+            Commits with a rank up to last_rank and their rank, in walk order
+        """
+        # commits we know of with a rank up to last_rank that were not walked yet
+        pending = {commit_id for commit_id, rank in tips.items() if rank <= last_rank}
+        if not pending:
+            return
+        walker = self.repo.walk(None, GIT_SORT_TOPOLOGICAL)
+        for tip in tips:
+            walker.push(tip)
+        commit_ranks = dict(tips)
+        for commit in walker:
+            rank = commit_ranks.pop(commit.id)
+            pending.discard(commit.id)
+            for parent_id in commit.parent_ids:
+                if commit_ranks.get(parent_id, -1) < rank:
+                    commit_ranks[parent_id] = rank
+                    if rank <= last_rank:
+                        pending.add(parent_id)
+                    else:
+                        pending.discard(parent_id)
+            if rank <= last_rank:
+                yield commit, rank
+            if not pending:
+                break
+
+    def get_index_keys(self, tags: List[str], targets: List[Oid]) -> List[str]:
+        """
+        Get the release index keys for each tag. The key of a release covers the repo path and the name and target
+        of the tag and every older tag, so moving or deleting a tag invalidates it and all newer releases.
+
+        Args:
+            tags: Tags as returned by get_versions
+            targets: Commit each tag points at. None for HEAD
+
+        Returns:
+            Index key for each tag. None when the release should not be indexed
+        """
+        keys = [None] * len(tags)
+        if self.cache is None:
+            return keys
+        chain = hashlib.sha1(f'{INDEX_VERSION}:{os.path.abspath(self.repo.path)}'.encode())
+        for rank in reversed(range(len(tags))):
+            if targets[rank] is not None:
+                chain.update(f'{tags[rank]}:{targets[rank]}'.encode())
+                keys[rank] = chain.hexdigest()
+        return keys
@@ -0,0 +1,247 @@
+import json
+import mmap
+import os
+import random
+import struct
+from bisect import bisect_left, bisect_right
+from calendar import timegm
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from logging import DEBUG, getLogger
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Sequence
+from autochangelog.data import IssueRecord
+from autochangelog.github_snapshot import decode_issue, encode_issue
+
+logger = getLogger(__name__)
+STORE_VERSION = 1
+# index header: magic, version, generation and number of records
+HEADER = struct.Struct('<4sHxxQQ')
+MAGIC = b'ACIS'
+# index record: close time in seconds since the epoch, offset and length of the issue in the data file
+RECORD = struct.Struct('<qQI')
+
+
+def to_timestamp(date: datetime) -> int:
+    """
+    Convert a close date without timezone, which is in UTC, to seconds since the epoch
+
+    Args:
+        date: Date
+
+    Returns:
+        Seconds since the epoch
+    """
+    return timegm(date.utctimetuple())
+
+
+class ClosedAtIndex(Sequence):
+    """
+    Close times of an index file, so the records can be searched with bisect without reading them all
+    """
+
+    def __init__(self, buffer: mmap.mmap, count: int):
+        self.buffer = buffer
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, position: int) -> int:
+        return RECORD.unpack_from(self.buffer, HEADER.size + position * RECORD.size)[0]
+
+    def get_span(self, start: int, end: int) -> Optional[tuple]:
+        """
+        Get the part of the data file that holds a range of records
+
+        Args:
+            start: First record
+            end: Record after the last record
+
+        Returns:
+            Offset and length in the data file or None when the range is empty
+        """
+        if start >= end:
+            return None
+        _, offset, _ = RECORD.unpack_from(self.buffer, HEADER.size + start * RECORD.size)
+        _, last_offset, last_length = RECORD.unpack_from(self.buffer, HEADER.size + (end - 1) * RECORD.size)
+        return offset, last_offset + last_length - offset
+
+
+@dataclass()
+class IssueStore:
+    """
+    Closed issues sorted by the date they were closed. The issues are json lines in a data file and a fixed width
+    index file has the close time, offset and length of each issue. The index is memory mapped, so the issues closed
+    in a date range are found with two binary searches and read from the data file in one contiguous read.
+
+    The metadata file is removed before the store is written and written last with the generation of the index, so a
+    store that was not completely written is not used.
+    """
+    directory: str
+
+    @property
+    def data_path(self) -> str:
+        return os.path.join(self.directory, 'closed_issues.dat')
+
+    @property
+    def index_path(self) -> str:
+        return os.path.join(self.directory, 'closed_issues.idx')
+
+    @property
+    def meta_path(self) -> str:
+        return os.path.join(self.directory, 'closed_issues.json')
+
+    def get_meta(self) -> Optional[Dict[str, Any]]:
+        """
+        Get the metadata the store was written with
+
+        Returns:
+            Metadata or None when there is no complete store
+        """
+        try:
+            with open(self.meta_path) as meta_in:
+                meta = json.load(meta_in)
+        except (OSError, ValueError):
+            return None
+        return meta if meta.get('version') == STORE_VERSION else None
+
+    def write(self, issues: List[IssueRecord], **meta):
+        """
+        Replace the store with issues. Issues without a close date are not stored
+
+        Args:
+            issues: Closed issues
+            **meta: Metadata saved with the store
+
+        Returns:
+            None
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        if os.path.exists(self.meta_path):
+            os.remove(self.meta_path)
+        issues = sorted((issue for issue in issues if issue.closed_at), key=lambda issue: issue.closed_at)
+        generation = random.getrandbits(63)
+        offset = 0
+        with open(self.data_path + '.tmp', 'wb') as data_out, open(self.index_path + '.tmp', 'wb') as index_out:
+            index_out.write(HEADER.pack(MAGIC, STORE_VERSION, generation, len(issues)))
+            for issue in issues:
+                line = encode_issue(issue).encode('utf-8') + b'\n'
+                data_out.write(line)
+                index_out.write(RECORD.pack(to_timestamp(issue.closed_at), offset, len(line)))
+                offset += len(line)
+        os.replace(self.data_path + '.tmp', self.data_path)
+        os.replace(self.index_path + '.tmp', self.index_path)
+        with open(self.meta_path + '.tmp', 'w') as meta_out:
+            json.dump(dict(meta, version=STORE_VERSION, generation=generation, count=len(issues)), meta_out)
+        os.replace(self.meta_path + '.tmp', self.meta_path)
+        if logger.isEnabledFor(DEBUG):
+            logger.debug(f'Stored {len(issues)} closed issues in {self.directory}')
+
+    @contextmanager
+    def open_index(self, meta: Dict[str, Any]) -> Iterator[Optional[ClosedAtIndex]]:
+        """
+        Memory map the index file
+
+        Args:
+            meta: Metadata of the store from get_meta
+
+        Returns:
+            Context of the index or of None when the index does not match the metadata
+        """
+        with open(self.index_path, 'rb') as index_in:
+            if os.fstat(index_in.fileno()).st_size < HEADER.size:
+                yield None
+                return
+            with mmap.mmap(index_in.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                magic, version, generation, count = HEADER.unpack_from(buffer)
+                if (magic, version, generation, count) != (MAGIC, STORE_VERSION, meta['generation'], meta['count']):
+                    yield None
+                else:
+                    yield ClosedAtIndex(buffer, count)
+
+    @staticmethod
+    def read_range(index: ClosedAtIndex, data_in: BinaryIO, closed_after: Optional[datetime],
+                   closed_before: Optional[datetime]) -> List[IssueRecord]:
+        """
+        Read the issues closed in a date range, including the ends of the range
+
+        Args:
+            index: Index of the store
+            data_in: Data file of the store
+            closed_after: Start of the range
+            closed_before: End of the range
+
+        Returns:
+            Issues sorted by the date they were closed
+        """
+        start = bisect_left(index, to_timestamp(closed_after)) if closed_after else 0
+        end = bisect_right(index, to_timestamp(closed_before)) if closed_before else len(index)
+        span = index.get_span(start, end)
+        if span is None:
+            return []
+        data_in.seek(span[0])
+        return [decode_issue(line) for line in data_in.read(span[1]).decode('utf-8').splitlines()]
+
+    def get_issues(self, closed_after: Optional[datetime] = None, closed_before: Optional[datetime] = None,
+                   meta: Dict[str, Any] = None) -> Optional[List[IssueRecord]]:
+        """
+        Get the issues closed in a date range, including the ends of the range
+
+        Args:
+            closed_after: Start of the range
+            closed_before: End of the range
+            meta: Metadata of the store from get_meta
+
+        Returns:
+            Issues sorted by the date they were closed or None when the store does not match the metadata
+        """
+        meta = meta or self.get_meta()
+        if meta is None:
+            return None
+        try:
+            with self.open_index(meta) as index, open(self.data_path, 'rb') as data_in:
+                if index is None:
+                    return None
+                return self.read_range(index, data_in, closed_after, closed_before)
+        except OSError as e:
+            if logger.isEnabledFor(DEBUG):
+                logger.debug(f'Cannot read issue store {self.directory}: {e}')
+            return None
+
+    def contains_all(self, issues: Iterable[IssueRecord], meta: Dict[str, Any] = None) -> bool:
+        """
+        Check if the store has every issue with the same fields. The store is opened once and the issues closed at
+        each date are read once
+
+        Args:
+            issues: Issues
+            meta: Metadata of the store from get_meta
+
+        Returns:
+            True when every issue is stored unchanged
+        """
+        by_date = defaultdict(set)
+        for issue in issues:
+            if not issue.closed_at:
+                return False
+            by_date[issue.closed_at].add(issue.to_tuple())
+        if not by_date:
+            return True
+        meta = meta or self.get_meta()
+        if meta is None:
+            return False
+        try:
+            with self.open_index(meta) as index, open(self.data_path, 'rb') as data_in:
+                if index is None:
+                    return False
+                for closed_at, values in by_date.items():
+                    stored = {record.to_tuple() for record in self.read_range(index, data_in, closed_at, closed_at)}
+                    if not values <= stored:
+                        return False
+        except OSError as e:
+            if logger.isEnabledFor(DEBUG):
+                logger.debug(f'Cannot read issue store {self.directory}: {e}')
+            return False
+        return True
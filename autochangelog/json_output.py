@@ -1,16 +1,24 @@
+import sys
 from collections import defaultdict
+from functools import lru_cache
 from logging import getLogger, DEBUG
+from typing import Any, Callable, TextIO
 
 import click
 import json as js
 
 from click.utils import LazyFile
-from github.Issue import Issue
-from pygit2._pygit2 import Commit
 
+from autochangelog.data import CommitRecord, IssueRecord
+from autochangelog.output_manifest import get_file_digest, get_text_digest
 from autochangelog.utils import processor
-from jinja2 import Template
 logger = getLogger(__name__)
+# Renderers equivalent to the default templates that skip the Jinja context setup for each item
+FAST_RENDERERS = {
+    "{{ item.title }}": lambda item: str(item.title),
+    "{{ item.message }}": lambda item: str(item.message),
+    "{{ item|string }}": str
+}
 
 
 def get_object_base_level(item, level=0):
@@ -18,12 +26,40 @@ def get_object_base_level(item, level=0):
         return get_object_base_level(item[list(item.keys())[0]], level+1)
     elif isinstance(item, list):
         return get_object_base_level(item[0], level+1)
-    elif isinstance(item, (Issue, Commit)):
-        return level+1
     else:
         return level+1
 
 
+def is_issue(item) -> bool:
+    """
+    Check if an item is an issue. PyGithub is only imported by the github source, so we don't import it here just to
+    check the type
+
+    Args:
+        item: Item
+
+    Returns:
+        True if the item is an IssueRecord or a PyGithub Issue
+    """
+    issue_module = sys.modules.get('github.Issue')
+    return isinstance(item, IssueRecord) or (issue_module is not None and isinstance(item, issue_module.Issue))
+
+
+def is_commit(item) -> bool:
+    """
+    Check if an item is a commit. pygit2 is only imported by the git source, so we don't import it here just to check
+    the type
+
+    Args:
+        item: Item
+
+    Returns:
+        True if the item is a CommitRecord or a pygit2 Commit
+    """
+    git_module = sys.modules.get('pygit2')
+    return isinstance(item, CommitRecord) or (git_module is not None and isinstance(item, git_module.Commit))
+
+
 def get_default_template(item) -> str:
     """
     Get the default json template for each item
@@ -37,9 +73,9 @@ def get_default_template(item) -> str:
         return get_default_template(item[list(item.keys())[0]])
     elif isinstance(item, list):
         return get_default_template(item[0])
-    elif isinstance(item, Issue):
+    elif is_issue(item):
         template = "{{ item.title }}"
-    elif isinstance(item, Commit):
+    elif is_commit(item):
         template = "{{ item.message }}"
     else:
         template = "{{ item|string }}"
@@ -48,35 +84,150 @@ def get_default_template(item) -> str:
     return template
 
 
+@lru_cache(maxsize=32)
+def get_renderer(template: str) -> Callable[[Any], str]:
+    """
+    Get a function that renders an item with a template. Templates are compiled once and the default templates use a
+    renderer that bypasses Jinja
+
+    Args:
+        template: Template string
+
+    Returns:
+        Function that renders an item to a string
+    """
+    if template in FAST_RENDERERS:
+        return FAST_RENDERERS[template]
+    # only import jinja when a template needs it
+    from jinja2 import Template
+    template_src = Template(template)
+    return lambda item: template_src.render(item=item)
+
+
+def render_default(item) -> str:
+    """
+    Render an item with the default template of its type. Used for merged sources, where issues and commits are mixed
+
+    Args:
+        item: Item
+
+    Returns:
+        Rendered item
+    """
+    if is_issue(item):
+        return str(item.title)
+    elif is_commit(item):
+        return str(item.message)
+    return str(item)
+
+
+class JsonObjectWriter:
+    """
+    Write a JSON object one key at a time so the whole object never has to be held in memory. The output matches
+    json.dump of the complete object except that top level keys are written in the order they are received. Written
+    keys cannot be changed, so a key that is received twice is rejected.
+    """
+
+    def __init__(self, output: TextIO, sort_keys: bool = False, indent: int = None, separators=None):
+        self.output = output
+        self.sort_keys = sort_keys
+        self.indent = indent
+        if separators is None:
+            separators = (', ', ': ') if indent is None else (',', ': ')
+        self.separators = separators
+        self.keys = set()
+
+    def write(self, key: str, value: Any):
+        """
+        Write a key of the object
+
+        Args:
+            key: Key
+            value: Value to serialize
+
+        Returns:
+            None
+        """
+        if key in self.keys:
+            raise ValueError(f"Version {key} was received twice. Streamed versions cannot be combined, use merge "
+                             f"before json to combine the sources or --no-streaming to keep the last one")
+        item_separator, key_separator = self.separators
+        out = '{' if not self.keys else item_separator
+        value = js.dumps(value, sort_keys=self.sort_keys, indent=self.indent, separators=self.separators)
+        if self.indent is not None:
+            newline = '\n' + ' ' * self.indent
+            out += newline
+            value = value.replace('\n', newline)
+        self.output.write(out + js.dumps(key) + key_separator + value)
+        self.output.flush()
+        self.keys.add(key)
+
+    def close(self):
+        """
+        Finish the object
+
+        Returns:
+            None
+        """
+        if not self.keys:
+            self.output.write('{}')
+        else:
+            self.output.write('\n}' if self.indent is not None else '}')
+        self.output.flush()
+
+
 @click.command(help="Generate changelog as a JSON")
 @click.option('--output', type=click.File(mode='w'), default=None)
 @click.option('--sort-keys/--no-store-keys', default=False, help="Sort keys")
 @click.option('--indent', type=click.IntRange(min=0), default=None, help="About of spaces to ident")
 @click.option('--template', type=str, default=None, help="Template")
+@click.option('--streaming/--no-streaming', default=False,
+              help="Write each version as soon as it is received. Top level keys are written in the order received")
 @processor
 @click.pass_context
-def json(ctx, stream, output: LazyFile, sort_keys: bool, indent: int, template: str, **kwargs):
+def json(ctx, stream, output: LazyFile, sort_keys: bool, indent: int, template: str, streaming: bool, **kwargs):
     result = dict()
+    writer = None
+    if streaming:
+        if output:
+            writer = JsonObjectWriter(output, sort_keys=sort_keys, indent=indent)
+        else:
+            writer = JsonObjectWriter(sys.stdout, sort_keys=True, indent=4, separators=(',', ': '))
     for input_src in stream:
         items = input_src.items
         dl = get_object_base_level(items)
-        # labeled changelog
-        if template is None:
-            template = get_default_template(items)
         rendered_items = dict() if dl == 2 else defaultdict(lambda: defaultdict(list))
-        template_src = Template(template)
+        if template is None and input_src.src == 'merged':
+            render = render_default
+        else:
+            # labeled changelog
+            if template is None:
+                template = get_default_template(items)
+            render = get_renderer(template)
         for ver, entry in items.items():
             if dl <= 2:
-                rendered_items[ver] = []
-            for item in entry:
-                if dl > 2:
-                    for sub_item in entry[item]:
-                        rendered_items[ver][item].append(template_src.render(item=sub_item))
-                else:
-                    rendered_items[ver].append(template_src.render(item=item))
-
-        result.update(rendered_items)
-    if output:
+                rendered_items[ver] = list(map(render, entry))
+            else:
+                for item, sub_items in entry.items():
+                    if sub_items:
+                        rendered_items[ver][item].extend(map(render, sub_items))
+
+        if writer:
+            for ver, entry in rendered_items.items():
+                writer.write(ver, entry)
+        else:
+            result.update(rendered_items)
+    if writer:
+        writer.close()
+        if not output:
+            print()
+    elif isinstance(output, LazyFile):
+        text = js.dumps(result, sort_keys=sort_keys, indent=indent)
+        # files are opened on the first write, so an unchanged output is not written again and tools watching it are
+        # not triggered
+        if get_file_digest(output.name) != get_text_digest(text):
+            output.write(text)
+    elif output:
         js.dump(result, output, sort_keys=sort_keys, indent=indent)
     else:
         print(js.dumps(result, sort_keys=True, indent=4, separators=(',', ': ')))
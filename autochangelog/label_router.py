@@ -0,0 +1,138 @@
+import fnmatch
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Pattern, Set, Tuple
+from autochangelog.data import LabelRecord
+
+# Rule kinds that can be used as a prefix of a label in the label map or ignore labels files, for example
+# "glob:type/*". Labels without a known kind are matched exactly
+RULE_KINDS = ('glob', 'regex')
+
+
+def compile_rule(rule: str) -> Optional[Pattern]:
+    """
+    Compile a label rule
+
+    Args:
+        rule: Label rule
+
+    Returns:
+        Regular expression for glob and regex rules or None for exact labels
+    """
+    kind, sep, value = rule.partition(':')
+    if not sep or kind not in RULE_KINDS:
+        return None
+    if kind == 'glob':
+        # rules are searched in the labels and translated globs are only anchored at the end
+        return re.compile(r'\A' + fnmatch.translate(value))
+    return re.compile(value)
+
+
+@dataclass()
+class LabelRouter:
+    """
+    Routing table from issue labels to changelog topics. The label map and ignore labels are compiled once and the
+    topics of each distinct set of labels are computed once, so assigning topics costs one lookup per issue.
+
+    Labels in the label map and ignore labels are matched exactly unless they are in the form kind:value where kind
+    is one of
+
+    * glob - shell style pattern matched against the whole label, for example glob:type/*
+    * regex - regular expression searched in the label
+
+    The order of the label map is the priority of its rules. When an issue is not split between topics, it goes to
+    the topic of its label with the highest priority.
+    """
+    label_map: Dict[str, str] = None
+    ignore_labels: Iterable[str] = field(default_factory=list)
+    topics: List[str] = field(default_factory=list, init=False, repr=False)
+    exact: Dict[str, int] = field(default_factory=dict, init=False, repr=False)
+    patterns: List[Tuple[int, Pattern]] = field(default_factory=list, init=False, repr=False)
+    ignore_exact: Set[str] = field(default_factory=set, init=False, repr=False)
+    ignore_patterns: List[Pattern] = field(default_factory=list, init=False, repr=False)
+    routes: Dict[str, Optional[Tuple[int, str]]] = field(default_factory=dict, init=False, repr=False)
+    assignments: Dict[Tuple[Tuple[LabelRecord, ...], bool], Tuple[str, ...]] = field(default_factory=dict,
+                                                                                     init=False, repr=False)
+
+    def __post_init__(self):
+        for priority, (rule, topic) in enumerate((self.label_map or dict()).items()):
+            self.topics.append(topic)
+            expr = compile_rule(rule)
+            if expr is None:
+                self.exact.setdefault(rule, priority)
+            else:
+                self.patterns.append((priority, expr))
+        for rule in self.ignore_labels or []:
+            expr = compile_rule(rule)
+            if expr is None:
+                self.ignore_exact.add(rule)
+            else:
+                self.ignore_patterns.append(expr)
+
+    def is_ignored(self, label: str) -> bool:
+        """
+        Check if a label is ignored
+
+        Args:
+            label: Label name
+
+        Returns:
+            True if the label matches an ignore rule
+        """
+        return label in self.ignore_exact or any(expr.search(label) for expr in self.ignore_patterns)
+
+    def route(self, label: str) -> Optional[Tuple[int, str]]:
+        """
+        Get the topic of a label from the label map
+
+        Args:
+            label: Label name
+
+        Returns:
+            Priority and topic of the first rule that matches the label, or None when the label is not mapped or is
+            ignored
+        """
+        if label not in self.routes:
+            priority = self.exact.get(label)
+            for index, expr in self.patterns:
+                if priority is not None and index > priority:
+                    break
+                if expr.search(label):
+                    priority = index
+                    break
+            if priority is None or self.is_ignored(label):
+                self.routes[label] = None
+            else:
+                self.routes[label] = (priority, self.topics[priority])
+        return self.routes[label]
+
+    def get_topics(self, labels: Tuple[LabelRecord, ...], split_issues_between_topics: bool = True) -> \
+            Tuple[str, ...]:
+        """
+        Get the topics of an issue from its labels
+
+        Args:
+            labels: Labels of the issue
+            split_issues_between_topics: Add the issue to the topic of each label instead of only the first one
+
+        Returns:
+            Topics of the issue. A topic is repeated when more than one label maps to it
+        """
+        key = (labels, split_issues_between_topics)
+        if key not in self.assignments:
+            labels = [label.name for label in labels]
+            if self.label_map:
+                if split_issues_between_topics:
+                    routes = [self.route(label) for label in labels]
+                    topics = tuple(route[1] for route in routes if route is not None)
+                elif any(self.is_ignored(label) for label in labels):
+                    topics = ()
+                else:
+                    routes = [route for route in map(self.route, labels) if route is not None]
+                    topics = (min(routes)[1],) if routes else ()
+            elif split_issues_between_topics:
+                topics = tuple(label for label in labels if not self.is_ignored(label))
+            else:
+                topics = tuple(labels[:1])
+            self.assignments[key] = topics
+        return self.assignments[key]
@@ -0,0 +1,80 @@
+import sys
+import traceback
+from logging import DEBUG, getLogger
+from typing import Dict, List
+import click
+
+if sys.version_info >= (3, 8):
+    from importlib.metadata import entry_points, EntryPoint
+else:  # pragma: no cover
+    from importlib_metadata import entry_points, EntryPoint
+
+logger = getLogger(__name__)
+
+
+def get_entry_points(group: str) -> List[EntryPoint]:
+    """
+    Get the entry points of a group without importing them
+
+    Args:
+        group: Entry point group
+
+    Returns:
+        Entry points of the group
+    """
+    eps = entry_points()
+    # entry_points returns a dict of groups before python 3.10
+    if hasattr(eps, 'select'):
+        return list(eps.select(group=group))
+    return list(eps.get(group, []))
+
+
+class LazyPluginGroup(click.Group):
+    """
+    Command group that lists plugin commands from the entry point metadata and only imports a plugin when its command
+    is used. Plugins that fail to load are replaced with a command that reports the error.
+    """
+
+    def __init__(self, *args, entry_point_group: str = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.entry_point_group = entry_point_group
+        self._entry_points: Dict[str, EntryPoint] = None
+
+    @property
+    def entry_points(self) -> Dict[str, EntryPoint]:
+        if self._entry_points is None:
+            self._entry_points = {ep.name: ep for ep in get_entry_points(self.entry_point_group)}
+        return self._entry_points
+
+    def list_commands(self, ctx):
+        return sorted(set(super().list_commands(ctx)) | set(self.entry_points))
+
+    def get_command(self, ctx, cmd_name):
+        command = super().get_command(ctx, cmd_name)
+        if command is None and cmd_name in self.entry_points:
+            if logger.isEnabledFor(DEBUG):
+                logger.debug(f'Loading plugin command {cmd_name}')
+            try:
+                command = self.entry_points[cmd_name].load()
+            except Exception:
+                command = self.get_broken_command(cmd_name, traceback.format_exc())
+            self.add_command(command, cmd_name)
+        return command
+
+    @staticmethod
+    def get_broken_command(name: str, error: str) -> click.Command:
+        """
+        Create a command that reports a plugin that failed to load
+
+        Args:
+            name: Command name
+            error: Traceback of the error
+
+        Returns:
+            Command
+        """
+        def broken(*args, **kwargs):
+            raise click.ClickException(f"Plugin {name} could not be loaded\n{error}")
+
+        return click.Command(name, callback=broken, help="Warning: the plugin could not be loaded",
+                             context_settings=dict(ignore_unknown_options=True, allow_extra_args=True))
@@ -1,20 +1,35 @@
 import os
+import sys
 from collections import defaultdict
 from logging import getLogger, DEBUG
+from typing import Any, Dict, Optional, TextIO, Union
 import click
 from click.utils import LazyFile
 from jinja2 import Environment, BaseLoader
 from autochangelog.json_output import get_object_base_level
+from autochangelog.metrics import get_metrics
+from autochangelog.output_manifest import OutputManifest, get_file_digest, get_fingerprint, get_manifest_path, \
+    get_text_digest
 from autochangelog.utils import processor
 
 logger = getLogger(__name__)
 LOCAL_PATH = os.path.abspath(os.path.dirname(__file__))
 DEFAULT_MARKDOWN = os.path.join(os.path.abspath(os.path.dirname(__file__)), "default_markdown_template.md.tmpl")
+DEFAULT_MARKDOWN_VERSION = os.path.join(
+    os.path.abspath(os.path.dirname(__file__)), "default_markdown_version_template.md.tmpl"
+)
 DEFAULT_GIT = os.path.join(os.path.abspath(os.path.dirname(__file__)), "default_markdown_git_template.md.tmpl")
+DEFAULT_GIT_VERSION = os.path.join(
+    os.path.abspath(os.path.dirname(__file__)), "default_markdown_git_version_template.md.tmpl"
+)
 DEFAULT_GITHUB = os.path.join(os.path.abspath(os.path.dirname(__file__)), "default_markdown_github_template.md.tmpl")
 DEFAULT_GITHUB_VERSION = os.path.join(
     os.path.abspath(os.path.dirname(__file__)), "default_markdown_github_version_template.md.tmpl"
 )
+DEFAULT_MERGED = os.path.join(os.path.abspath(os.path.dirname(__file__)), "default_markdown_merged_template.md.tmpl")
+DEFAULT_MERGED_VERSION = os.path.join(
+    os.path.abspath(os.path.dirname(__file__)), "default_markdown_merged_version_template.md.tmpl"
+)
 DEFAULT_GITHUB_INDEX_VERSION = os.path.join(
     os.path.abspath(os.path.dirname(__file__)), "default_markdown_github_version_index_template.md.tmpl"
 )
@@ -28,68 +43,144 @@ def is_dict(value):
 @click.option('--output', default=None)
 @click.option('--allow-duplicates/--no-allow-duplicates', default=False)
 @click.option('--split-versions/--no-split-versions', default=False)
+@click.option('--streaming/--no-streaming', default=False,
+              help="Write each version to the output as soon as it is received, using the version templates. Only "
+                   "one version is kept in memory at a time")
 @click.option('--template', type=click.File(mode='o'),
               help="Template. Items passed as items dictionary with version and list of issues")
+@click.option('--incremental/--no-incremental', default=True,
+              help="With --split-versions, only render the versions whose items or template changed since the last "
+                   "run. The inputs of each file are saved in a manifest in the output directory")
 @processor
 @click.pass_context
-def markdown(ctx, stream, output: LazyFile, allow_duplicates: bool, split_versions: bool, template: LazyFile, **kwargs):
+def markdown(ctx, stream, output: LazyFile, allow_duplicates: bool, split_versions: bool, streaming: bool,
+             template: LazyFile, incremental: bool, **kwargs):
     result = dict()
+    # when splitting or streaming, versions are rendered as they arrive so only their names are kept for the index
+    versions = []
+    per_version = split_versions or streaming
+    streaming_output = None
+    if streaming and not split_versions:
+        streaming_output = open(output, 'w') if output else sys.stdout
+
+    manifest = None
+    if split_versions and output:
+        if os.path.exists(output) and not os.path.isdir(output):
+            raise ValueError("Output must be a directory")
+        os.makedirs(output, exist_ok=True)
+        if incremental:
+            manifest = OutputManifest.load(get_manifest_path(output))
 
     template_types = set()
     template, template_types = None, set()
     templates = dict()
-    for input_src in stream:
-        # get items from source
-        items = input_src.items
-        # get depth
-        dl = get_object_base_level(items)
-        # get template types
-        template_types.add(input_src.src)
-        # get template type
-        template = get_template(
-            template,
-            [input_src.src] if split_versions else template_types,
-            split_versions
-        )
-        rendered_items = defaultdict(list) if dl <= 2 else defaultdict(lambda: defaultdict(list))
-        for ver, entries in items.items():
-            for entry, commits in entries.items():
-                # add the nested commits
-                if isinstance(commits, list):
-                    rendered_items[ver][entry].extend(commits)
-                else:
-                    # otherwise decide if we should allow duplicates
-                    if allow_duplicates:
-                        rendered_items[ver].extend(commits)
+    try:
+        for input_src in stream:
+            # get items from source
+            items = input_src.items
+            # get depth
+            dl = get_object_base_level(items)
+            # get template types
+            template_types.add(input_src.src)
+            # get template type
+            template = get_template(
+                template,
+                [input_src.src] if per_version else template_types,
+                per_version
+            )
+            rendered_items = defaultdict(list) if dl <= 2 else defaultdict(lambda: defaultdict(list))
+            for ver, entries in items.items():
+                for entry, commits in entries.items():
+                    # add the nested commits
+                    if isinstance(commits, list):
+                        rendered_items[ver][entry].extend(commits)
                     else:
-                        rendered_items[ver].append(commits[0])
-
-            # if we are splitting versions, render those now
-            if split_versions:
-                if output and (os.path.exists(output) and os.path.isdir(output)):
-                    raise ValueError("Output must be a directory")
-                elif output and not os.path.exists(output):
-                    os.makedirs(output, exist_ok=True)
-                render_template(
-                    ctx, os.path.join(output, f'changelog_{ver}.md') if output else None,
-                    rendered_items[ver],
-                    template,
-                    templates,
-                    version=ver
-                )
-
-        result.update(rendered_items)
-    # if we are splitting versions, we should render the index now
-    if split_versions:
-        # render index
-        idx_template = get_index_template(template_types)
-        render_template(ctx, os.path.join(output, f'changelog.md') if output else None, result, idx_template)
-    else:
-        render_template(ctx, output, result, template)
+                        # otherwise decide if we should allow duplicates
+                        if allow_duplicates:
+                            rendered_items[ver].extend(commits)
+                        else:
+                            rendered_items[ver].append(commits[0])
+
+                # if we are splitting versions, render those now
+                if split_versions:
+                    render_file(ctx, output, f'changelog_{ver}.md', rendered_items[ver], template, templates, manifest,
+                                version=ver)
+                elif streaming_output:
+                    render_template(ctx, streaming_output, rendered_items[ver], template, templates, version=ver)
+
+            if per_version:
+                versions.extend(rendered_items.keys())
+            else:
+                result.update(rendered_items)
+        # if we are splitting versions, we should render the index now
+        if split_versions:
+            # render index
+            idx_template = get_index_template(template_types)
+            render_file(ctx, output, 'changelog.md', versions, idx_template, templates, manifest)
+            if manifest:
+                manifest.save()
+        elif not streaming_output:
+            render_template(ctx, output, result, template)
+    finally:
+        # the output is also closed when a source or template fails
+        if streaming_output and output:
+            streaming_output.close()
     yield True
 
 
-def render_template(ctx, output: str, items, template, templates=None, **kwargs):
+def get_template_digest(template, templates: Dict[str, Any]) -> Optional[str]:
+    """
+    Get the digest of the source of a template. Like in render_template, a str template is the path of the template
+    file, not its source
+
+    Args:
+        template: None for the default template, the path of the template or an open template file
+        templates: Cache of the templates of the run
+
+    Returns:
+        Digest or None when the template is not a file that can be read again, like stdin, so its versions are always
+        rendered
+    """
+    name = DEFAULT_MARKDOWN if template is None else template if isinstance(template, str) else template.name
+    key = ('digest', name)
+    if key not in templates:
+        templates[key] = get_file_digest(name) if os.path.isfile(name) else None
+    return templates[key]
+
+
+def render_file(ctx, output: Optional[str], name: str, items, template, templates: Dict[str, Any],
+                manifest: Optional[OutputManifest], **kwargs):
+    """
+    Render a file of a changelog split by versions. When there is a manifest, the file is skipped if its items,
+    arguments and template did not change since it was written
+
+    Args:
+        ctx: Click context
+        output: Output directory. The file is printed when not set
+        name: File name
+        items: Items passed to the template
+        template: Template
+        templates: Cache of the templates of the run
+        manifest: Manifest of the output directory
+        **kwargs: Other arguments of the template
+
+    Returns:
+        None
+    """
+    path = os.path.join(output, name) if output else None
+    if manifest is None:
+        render_template(ctx, path, items, template, templates, **kwargs)
+        return
+    digest = get_template_digest(template, templates)
+    inputs = get_fingerprint(digest, items, kwargs) if digest else None
+    if manifest.is_current(name, inputs, path):
+        get_metrics().increment('markdown.versions_skipped')
+        return
+    result = render_template(ctx, path, items, template, templates, **kwargs)
+    manifest.record(name, inputs, path, result)
+
+
+def render_template(ctx, output: Union[str, TextIO], items, template, templates=None, **kwargs) -> str:
     if template is None:
         logger.debug("Loading default markdown")
         template = LazyFile(DEFAULT_MARKDOWN, 'r')
@@ -108,14 +199,20 @@ def render_template(ctx, output: str, items, template, templates=None, **kwargs)
     if logger.isEnabledFor(DEBUG):
         logger.debug(f"Sending template items value of {items}")
         if output:
-            logger.debug(f"Writing to {output.name}")
+            logger.debug(f"Writing to {getattr(output, 'name', output)}")
     render_args = dict(items=items, context=ctx.obj, **kwargs)
     result = template_src.render(render_args)
-    if output:
+    if output is None:
+        print(result)
+    elif hasattr(output, 'write'):
+        # streams stay open so later versions can be appended
+        output.write(result + '\n')
+        output.flush()
+    elif get_file_digest(output) != get_text_digest(result):
+        # unchanged files are not written again, so tools watching the output are not triggered
         with open(output, 'w') as out:
             out.write(result)
-    else:
-        print(result)
+    return result
 
 
 def get_template(template, template_types, split_versions):
@@ -126,10 +223,16 @@ def get_template(template, template_types, split_versions):
         if len(template_types) == 1:
             if template_types[0] == 'git':
                 logger.debug("Loading git template")
-                template = LazyFile(DEFAULT_GIT, 'r')
+                template = LazyFile(DEFAULT_GIT_VERSION if split_versions else DEFAULT_GIT, 'r')
             elif template_types[0] == 'github':
                 logger.debug("Loading github template")
                 template = LazyFile(DEFAULT_GITHUB_VERSION if split_versions else DEFAULT_GITHUB, 'r')
+            elif template_types[0] == 'merged':
+                logger.debug("Loading merged template")
+                template = LazyFile(DEFAULT_MERGED_VERSION if split_versions else DEFAULT_MERGED, 'r')
+        if template is None and split_versions:
+            logger.debug("Loading version template")
+            template = LazyFile(DEFAULT_MARKDOWN_VERSION, 'r')
     return template
 
 
@@ -141,8 +244,8 @@ def get_index_template(template_types):
     if len(template_types) == 1:
         if template_types[0] == 'git':
             logger.debug("Loading git template")
-            template = LazyFile(DEFAULT_GIT)
-        elif template_types[0] == 'github':
+            template = LazyFile(DEFAULT_GITHUB_INDEX_VERSION)
+        elif template_types[0] in ('github', 'merged'):
             logger.debug("Loading github template")
             template = LazyFile(DEFAULT_GITHUB_INDEX_VERSION)
-    return template
\ No newline at end of file
+    return template
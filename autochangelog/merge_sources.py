@@ -0,0 +1,200 @@
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+from logging import DEBUG, getLogger
+from typing import Any, Dict, Iterable, Iterator, List, Match, Optional, Pattern, Set, Tuple
+import click
+from autochangelog.data import SrcData
+from autochangelog.metrics import get_metrics
+from autochangelog.tag_index import DEFAULT_TAG_PATTERN, DEVELOPMENT_RELEASE, compile_tag_pattern, version_key
+from autochangelog.utils import processor
+
+logger = getLogger(__name__)
+MERGED_SRC = 'merged'
+# Sources whose releases are keyed by commit message instead of topic
+UNGROUPED_SOURCES = ('git',)
+DEFAULT_COMMIT_TOPIC = 'Commits'
+# Topic of issues from sources that are not grouped by topic. Same as the default unlabeled topic of the github source
+DEFAULT_ISSUE_TOPIC = 'Uncategorized'
+# Matches pull request and issue references in commit messages like "Merge pull request #12" or "Fix parser (#12)"
+DEFAULT_REFERENCE_PATTERN = r'(?<![\w/])#(\d+)\b'
+
+
+def parse_pattern(ctx, param, value):
+    try:
+        return compile_tag_pattern(value) if param.name == 'tag_pattern' else re.compile(value)
+    except (re.error, ValueError) as e:
+        raise click.BadParameter(f'Invalid pattern {value}: {e}')
+
+
+@dataclass()
+class Release:
+    """
+    Entries of a release from all the sources, by topic
+    """
+    name: str
+    topics: Dict[str, List[Any]] = field(default_factory=lambda: defaultdict(list))
+    # issue numbers of the release, used to drop commits that reference them
+    numbers: Set[int] = field(default_factory=set)
+    # commits of the release with the topic they were added to
+    commits: List[Tuple[str, List[Any]]] = field(default_factory=list)
+
+
+@dataclass()
+class SourceMerger:
+    """
+    Merge the releases of several sources into one changelog. Releases of different sources are matched by the
+    version in their name, so the git release 1.2.0 and the Github release v1.2.0 are one release named after the
+    first source that has it.
+
+    Issues keep the topics of their source and go to the issue topic when their source has no topics. Commits are
+    added to the commit topic. When deduplicating, commits that reference an issue or pull request of the same
+    release, like "Merge pull request #12 from ..." are dropped, so each change is listed once.
+    """
+    tag_pattern: Pattern = field(default_factory=lambda: compile_tag_pattern(DEFAULT_TAG_PATTERN))
+    reference_pattern: Optional[Pattern] = field(default_factory=lambda: re.compile(DEFAULT_REFERENCE_PATTERN))
+    commit_topic: str = DEFAULT_COMMIT_TOPIC
+    issue_topic: str = DEFAULT_ISSUE_TOPIC
+    releases: Dict[str, Release] = field(default_factory=dict, init=False, repr=False)
+
+    def get_release_key(self, name: str) -> str:
+        """
+        Get the key releases are matched by
+
+        Args:
+            name: Release name
+
+        Returns:
+            Version in the name or the name when it has no version
+        """
+        match = self.tag_pattern.search(name) if name != DEVELOPMENT_RELEASE else None
+        if match is None:
+            return name
+        return match.group('version') if 'version' in self.tag_pattern.groupindex else match.group(1)
+
+    def add(self, data: SrcData):
+        """
+        Add the releases of a source
+
+        Args:
+            data: Items of a source
+
+        Returns:
+            None
+        """
+        for name, entries in data.items.items():
+            key = self.get_release_key(name)
+            if key not in self.releases:
+                self.releases[key] = Release(name)
+            release = self.releases[key]
+            if isinstance(entries, dict):
+                for topic, records in entries.items():
+                    if data.src in UNGROUPED_SOURCES:
+                        release.commits.append((self.commit_topic, records))
+                    else:
+                        self.add_records(release, topic, records)
+            else:
+                for record in entries:
+                    self.add_records(release, self.issue_topic if hasattr(record, 'number') else self.commit_topic,
+                                     [record])
+
+    @staticmethod
+    def add_records(release: Release, topic: str, records: List[Any]):
+        release.topics[topic].extend(records)
+        release.numbers.update(record.number for record in records if hasattr(record, 'number'))
+
+    def is_duplicate(self, records: List[Any], numbers: Set[int]) -> bool:
+        """
+        Check if a group of commits references an issue of its release
+
+        Args:
+            records: Commits with the same message
+            numbers: Issue numbers of the release
+
+        Returns:
+            True when the commits should be dropped
+        """
+        if self.reference_pattern is None or not numbers or not records:
+            return False
+        message = getattr(records[0], 'message', None)
+        if not isinstance(message, str):
+            return False
+        return any(self.get_reference(match) in numbers for match in self.reference_pattern.finditer(message))
+
+    def get_reference(self, match: Match) -> int:
+        """
+        Get the issue number of a reference
+
+        Args:
+            match: Match of the reference pattern
+
+        Returns:
+            Number in the group named number or the first group
+        """
+        return int(match.group('number') if 'number' in self.reference_pattern.groupindex else match.group(1))
+
+    def get_releases(self) -> Iterator[Tuple[str, Dict[str, List[Any]]]]:
+        """
+        Get the merged releases. Development comes first, then the versions from newest to oldest and then releases
+        without a version in the order they were added
+
+        Returns:
+            Name and entries by topic of each release
+        """
+        keys = [key for key in self.releases if key != DEVELOPMENT_RELEASE]
+        versions = [key for key in keys if self.tag_pattern.search(key)]
+        others = [key for key in keys if not self.tag_pattern.search(key)]
+        order = ([DEVELOPMENT_RELEASE] if DEVELOPMENT_RELEASE in self.releases else []) + \
+            sorted(versions, key=version_key, reverse=True) + others
+        for key in order:
+            release = self.releases.pop(key)
+            for topic, records in release.commits:
+                if self.is_duplicate(records, release.numbers):
+                    get_metrics().increment('merge.duplicate_commits', len(records))
+                    continue
+                release.topics[topic].extend(records)
+            if logger.isEnabledFor(DEBUG):
+                logger.debug(f'Merged release {release.name} with topics {list(release.topics)}')
+            yield release.name, dict(release.topics)
+
+
+def merge_stream(stream: Iterable, merger: SourceMerger) -> Iterator:
+    """
+    Merge the releases of a stream. Items that are not source data are passed through
+
+    Args:
+        stream: Stream of the sources
+        merger: Merger
+
+    Returns:
+        Stream with one merged item per release
+    """
+    for data in stream:
+        if isinstance(data, SrcData):
+            merger.add(data)
+        else:
+            yield data
+    for name, topics in merger.get_releases():
+        yield SrcData(items={name: topics}, src=MERGED_SRC)
+
+
+@click.command(help="Merge the releases of the sources before it into one changelog. Place it after the sources, "
+                    "for example: git . github owner/repo merge markdown. The sources are loaded one after the other "
+                    "unless --concurrent-sources is passed to autochangelog, as in autochangelog --concurrent-sources "
+                    "generate git . github owner/repo merge markdown")
+@click.option('--dedup/--no-dedup', default=True,
+              help="Drop commits that reference an issue or pull request of the same release")
+@click.option('--reference-pattern', default=DEFAULT_REFERENCE_PATTERN, callback=parse_pattern,
+              help="Regular expression that finds issue and pull request numbers in commit messages. The number is "
+                   "the group named number or the first group")
+@click.option('--tag-pattern', default=DEFAULT_TAG_PATTERN, callback=parse_pattern,
+              help="Regular expression that finds the version in release names. Releases with the same version are "
+                   "merged")
+@click.option('--commit-topic', default=DEFAULT_COMMIT_TOPIC, help="Topic of the commits")
+@click.option('--issue-topic', default=DEFAULT_ISSUE_TOPIC, help="Topic of issues from sources without topics")
+@processor
+def merge(stream, dedup: bool, reference_pattern: Pattern, tag_pattern: Pattern, commit_topic: str,
+          issue_topic: str):
+    merger = SourceMerger(tag_pattern=tag_pattern, reference_pattern=reference_pattern if dedup else None,
+                          commit_topic=commit_topic, issue_topic=issue_topic)
+    yield from merge_stream(stream, merger)
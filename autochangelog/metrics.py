@@ -0,0 +1,152 @@
+import json
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from logging import DEBUG, getLogger
+from typing import Any, Dict, Union
+
+logger = getLogger(__name__)
+RELEASES = 'releases'
+ITEMS = 'items'
+
+
+def count_items(value: Any) -> int:
+    """
+    Count the items of a release. Items are the values of the innermost lists
+
+    Args:
+        value: Release items
+
+    Returns:
+        Number of items
+    """
+    if isinstance(value, dict):
+        return sum(count_items(item) for item in value.values())
+    elif isinstance(value, list) and value and isinstance(value[0], (dict, list)):
+        return sum(count_items(item) for item in value)
+    elif isinstance(value, list):
+        return len(value)
+    return 1
+
+
+@dataclass()
+class Metrics:
+    """
+    Counters that the sources and outputs report into while the pipeline runs. Names are dotted by the component that
+    reports them, for example github.requests. Counters can be increased from any thread.
+
+    When a progress bar is set, it advances with the releases emitted and shows the other counters.
+    """
+    counters: Dict[str, Union[int, float]] = field(default_factory=lambda: defaultdict(int))
+    started: float = field(default_factory=time.perf_counter)
+    progress: Any = None
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def increment(self, name: str, amount: Union[int, float] = 1):
+        """
+        Increase a counter
+
+        Args:
+            name: Counter name
+            amount: Amount to add. Use seconds for counters of time
+
+        Returns:
+            None
+        """
+        with self.lock:
+            self.counters[name] += amount
+            if self.progress is not None:
+                self.progress.set_postfix_str(self.get_summary(), refresh=False)
+                # updating by zero still refreshes the display when it is due
+                self.progress.update(amount if name == RELEASES else 0)
+
+    def record_release(self, items: Dict[str, Any]):
+        """
+        Record the releases emitted by a source
+
+        Args:
+            items: Items of the source data by release
+
+        Returns:
+            None
+        """
+        self.increment(ITEMS, count_items(items))
+        self.increment(RELEASES, len(items))
+
+    def get_summary(self) -> str:
+        """
+        Get a short summary of the counters for the progress display
+
+        Returns:
+            Summary
+        """
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        parts = [f'{self.counters[ITEMS] / elapsed:.1f} items/s']
+        parts.extend(
+            f'{name}={value:.1f}' if isinstance(value, float) else f'{name}={value}'
+            for name, value in sorted(self.counters.items()) if name != RELEASES
+        )
+        return ', '.join(parts)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Get the metrics as a dictionary
+
+        Returns:
+            Elapsed time, counters and rates
+        """
+        elapsed = time.perf_counter() - self.started
+        with self.lock:
+            counters = dict(sorted(self.counters.items()))
+        return dict(
+            elapsed_seconds=elapsed,
+            counters=counters,
+            rates=dict(
+                items_per_second=counters.get(ITEMS, 0) / elapsed if elapsed else 0,
+                releases_per_second=counters.get(RELEASES, 0) / elapsed if elapsed else 0
+            )
+        )
+
+    def dump(self, path: str):
+        """
+        Write the metrics to a json file
+
+        Args:
+            path: Path of the file
+
+        Returns:
+            None
+        """
+        if logger.isEnabledFor(DEBUG):
+            logger.debug(f'Writing metrics to {path}')
+        with open(path, 'w') as out:
+            json.dump(self.to_dict(), out, indent=4)
+
+
+_metrics = Metrics()
+
+
+def get_metrics() -> Metrics:
+    """
+    Get the metrics of the current run
+
+    Returns:
+        Metrics
+    """
+    return _metrics
+
+
+def reset_metrics(progress: Any = None) -> Metrics:
+    """
+    Start new metrics for a run
+
+    Args:
+        progress: Progress bar to update
+
+    Returns:
+        New metrics
+    """
+    global _metrics
+    _metrics = Metrics(progress=progress)
+    return _metrics
@@ -0,0 +1,206 @@
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from logging import DEBUG, getLogger
+from typing import Any, Dict, Optional, Set
+from autochangelog.data import CommitRecord
+
+logger = getLogger(__name__)
+MANIFEST_VERSION = 1
+MANIFEST_NAME = '.changelog_manifest.json'
+
+
+def get_text_digest(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8', 'surrogatepass')).hexdigest()
+
+
+def get_file_digest(path: str) -> Optional[str]:
+    """
+    Get the digest of a text file
+
+    Args:
+        path: Path of the file
+
+    Returns:
+        Digest of the content or None when the file cannot be read
+    """
+    try:
+        with open(path, encoding='utf-8') as file_in:
+            return get_text_digest(file_in.read())
+    except (OSError, UnicodeDecodeError):
+        return None
+
+
+def get_manifest_path(output: str) -> str:
+    """
+    Get the path of the manifest of an output directory. The manifest is a hidden file, so it is not picked up as a
+    document
+
+    Args:
+        output: Output directory
+
+    Returns:
+        Path of the manifest
+    """
+    return os.path.join(output, MANIFEST_NAME)
+
+
+def normalize(value: Any) -> Any:
+    """
+    Convert a value to plain values whose repr only depends on the content of the value
+
+    Args:
+        value: Value
+
+    Returns:
+        Nested tuples of plain values
+    """
+    if isinstance(value, dict):
+        return ('dict',) + tuple((key, normalize(item)) for key, item in value.items())
+    elif isinstance(value, (list, tuple)):
+        return ('list',) + tuple(normalize(item) for item in value)
+    elif isinstance(value, CommitRecord):
+        # the path and short id are only used to look up the commit
+        return ('commit', value.id, value.message, tuple(value.author or ()), value.commit_time)
+    elif hasattr(value, 'to_tuple'):
+        return (type(value).__name__,) + value.to_tuple()
+    elif hasattr(value, 'commit_time') and hasattr(value, 'message'):
+        # pygit2 commits
+        return ('commit', str(value.id), value.message, (value.author.name, value.author.email), value.commit_time)
+    return value
+
+
+def get_fingerprint(*values: Any) -> str:
+    """
+    Get a digest of the inputs of a rendered file. Values without a known layout use their repr, so objects that only
+    have the default repr never match and are always rendered
+
+    Args:
+        *values: Inputs like the template, version and items
+
+    Returns:
+        Digest of the values
+    """
+    return get_text_digest(repr(normalize(values)))
+
+
+@dataclass()
+class OutputManifest:
+    """
+    Digests of the inputs of each rendered version and of each written file, saved as json in the output directory. A
+    version is only rendered again when its inputs changed or the file it was written to was changed since.
+    """
+    path: str
+    versions: Dict[str, str] = field(default_factory=dict)
+    files: Dict[str, str] = field(default_factory=dict)
+    # versions and files seen and rendered in this run. Versions and files of the manifest that were not seen are
+    # dropped when saved
+    seen: Set[str] = field(default_factory=set, init=False, repr=False)
+    seen_files: Set[str] = field(default_factory=set, init=False, repr=False)
+    rendered: Set[str] = field(default_factory=set, init=False, repr=False)
+    saved: Dict[str, Any] = field(default=None, init=False, repr=False)
+
+    @classmethod
+    def load(cls, path: str) -> 'OutputManifest':
+        """
+        Load a manifest. A missing or invalid manifest is empty, so every version is rendered
+
+        Args:
+            path: Path of the manifest
+
+        Returns:
+            Manifest
+        """
+        try:
+            with open(path) as manifest_in:
+                data = json.load(manifest_in)
+        except (OSError, ValueError):
+            data = None
+        if not isinstance(data, dict) or data.get('version') != MANIFEST_VERSION:
+            manifest = cls(path)
+        else:
+            manifest = cls(path, versions=data['versions'], files=data['files'])
+        manifest.saved = manifest.to_dict()
+        return manifest
+
+    def is_current(self, version: str, inputs: Optional[str], path: str = None) -> bool:
+        """
+        Check if the output of a version is up to date. A version that was already rendered in this run is not,
+        because its file was overwritten
+
+        Args:
+            version: Version
+            inputs: Fingerprint of the inputs of the version. None when the inputs cannot be fingerprinted
+            path: File of the version. When set, the file must not have changed since it was written
+
+        Returns:
+            True if the version does not need to be rendered
+        """
+        self.seen.add(version)
+        if inputs is None or version in self.rendered or self.versions.get(version) != inputs:
+            return False
+        return path is None or self.is_file_current(path)
+
+    def is_file_current(self, path: str) -> bool:
+        """
+        Check if a file has the content it was written with
+
+        Args:
+            path: Path of the file
+
+        Returns:
+            True if the digest of the file matches the manifest
+        """
+        name = os.path.basename(path)
+        self.seen_files.add(name)
+        return name in self.files and get_file_digest(path) == self.files[name]
+
+    def record(self, version: str, inputs: Optional[str], path: str = None, text: str = None):
+        """
+        Record a rendered version
+
+        Args:
+            version: Version
+            inputs: Fingerprint of the inputs of the version
+            path: File the version was written to
+            text: Content of the file
+
+        Returns:
+            None
+        """
+        self.seen.add(version)
+        self.rendered.add(version)
+        if inputs is None:
+            self.versions.pop(version, None)
+        else:
+            self.versions[version] = inputs
+        if path is not None:
+            self.record_file(path, text)
+
+    def record_file(self, path: str, text: str):
+        name = os.path.basename(path)
+        self.seen_files.add(name)
+        self.files[name] = get_text_digest(text)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(version=MANIFEST_VERSION, versions=dict(self.versions), files=dict(self.files))
+
+    def save(self):
+        """
+        Save the manifest when it changed. Versions and files that were not seen in this run are dropped
+
+        Returns:
+            None
+        """
+        self.versions = {version: inputs for version, inputs in self.versions.items() if version in self.seen}
+        self.files = {name: digest for name, digest in self.files.items() if name in self.seen_files}
+        data = self.to_dict()
+        if data == self.saved:
+            return
+        with open(self.path + '.tmp', 'w') as manifest_out:
+            json.dump(data, manifest_out, indent=1, sort_keys=True)
+        os.replace(self.path + '.tmp', self.path)
+        self.saved = data
+        if logger.isEnabledFor(DEBUG):
+            logger.debug(f'Saved manifest of {len(self.versions)} versions to {self.path}')
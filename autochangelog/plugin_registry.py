@@ -1,13 +1,23 @@
 import functools
+import hashlib
 import inspect
+import os
+import pathlib
+import sys
+import diskcache
 import pluggy
 from abc import ABC
+from collections.abc import Mapping
 from logging import getLogger, DEBUG
-from typing import cast, Dict, Set, Type, Any, List
+from typing import cast, Dict, Iterator, Set, Type, Any, List, Optional, Tuple
+from autochangelog.lazy_plugin_group import EntryPoint, get_entry_points
 from autochangelog.plugin_specification import PluginSpecification, PLUGIN_REFERENCE_NAME
 
 logger = getLogger(__name__)
 user_logger = getLogger('user')
+DISCOVERY_CACHE_DIRECTORY = os.path.join(str(pathlib.Path.home()), '.autochangelog', 'plugins')
+METADATA_SUFFIXES = ('.dist-info', '.egg-info', '.egg-link')
+ENTRY_POINTS_FILE = 'entry_points.txt'
 
 
 def is_a_plugin_of_type(value, plugin_specification: Type[PluginSpecification]) -> bool:
@@ -113,18 +123,139 @@ def discover_plugins_from(library: Any, plugin_specification: Type[PluginSpecifi
     return plugins
 
 
+def get_distributions_fingerprint() -> str:
+    """
+    Get a fingerprint of the installed distributions. The fingerprint covers every entry of sys.path and the name and
+    modification time of the metadata of every distribution on it, with the modification time and size of its
+    entry_points.txt. Installing, upgrading or removing a distribution, or rewriting its entry points in place like
+    editable installs do, changes it without reading any metadata
+
+    Returns:
+        Fingerprint
+    """
+    fingerprint = hashlib.sha1()
+    for path in sys.path:
+        try:
+            entries = sorted(
+                (entry.name, entry.stat().st_mtime_ns, get_file_signature(os.path.join(entry.path, ENTRY_POINTS_FILE)))
+                for entry in os.scandir(path or '.') if entry.name.endswith(METADATA_SUFFIXES)
+            )
+        except OSError:
+            # zip files and missing directories
+            entries = []
+        fingerprint.update(f'{path}:{entries}'.encode())
+    return fingerprint.hexdigest()
+
+
+def get_file_signature(path: str) -> Optional[Tuple[int, int]]:
+    """
+    Get the modification time and size of a file
+
+    Args:
+        path: Path of the file
+
+    Returns:
+        Modification time in nanoseconds and size or None when the file does not exist
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def discover_plugin_entry_points(entrypoint: str, spec_type: Type[PluginSpecification], strip_all: bool = True,
+                                 cache: diskcache.Cache = None) -> List[Tuple[str, str]]:
+    """
+    Find the plugin name and entry point of each plugin. The result is stored in the cache by the fingerprint of the
+    installed distributions, so later calls neither scan the distributions nor import the plugins
+
+    Args:
+        entrypoint: The name of the entry point.
+        spec_type: The type of plugin specification.
+        strip_all: Pass through for get_name from Plugins. Changes names in plugin registries
+        cache: Discovery cache
+
+    Returns:
+        List of plugin name and entry point value
+    """
+    key = None
+    if cache is not None:
+        key = ('plugins', entrypoint, spec_type.__module__, spec_type.__qualname__, strip_all,
+               get_distributions_fingerprint())
+        discovered = cache.get(key)
+        if discovered is not None:
+            return discovered
+    values = {ep.name: ep.value for ep in get_entry_points(entrypoint)}
+    manager = pluggy.PluginManager(PLUGIN_REFERENCE_NAME)
+    manager.add_hookspecs(spec_type)
+    manager.load_setuptools_entrypoints(entrypoint)
+    manager.check_pending()
+    discovered = [
+        (plugin.get_name(strip_all), values[name]) for name, plugin in manager.list_name_plugin() if name in values
+    ]
+    if key is not None:
+        cache[key] = discovered
+    return discovered
+
+
+class LazyPluginMap(Mapping):
+    """
+    Map of plugin name to plugin that only imports and creates a plugin when it is first looked up
+    """
+
+    def __init__(self, entrypoint: str, discovered: List[Tuple[str, str]]):
+        self.entrypoint = entrypoint
+        self._entry_points = {name: value for name, value in discovered}
+        self._plugins = dict()
+
+    def __getitem__(self, name: str) -> PluginSpecification:
+        if name not in self._plugins:
+            if name not in self._entry_points:
+                raise KeyError(name)
+            if logger.isEnabledFor(DEBUG):
+                logger.debug(f"Loading {self._entry_points[name]} as {name}")
+            try:
+                plugin = EntryPoint(name, self._entry_points[name], self.entrypoint).load()
+                self._plugins[name] = plugin()
+            except Exception as e:
+                logger.exception(e)
+                user_logger.error(f'Problem loading plugin: {name}')
+                raise KeyError(name)
+        return self._plugins[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._entry_points)
+
+    def __len__(self) -> int:
+        return len(self._entry_points)
+
+
 class PluginRegistry(ABC):
-    def __init__(self, spec: Type[PluginSpecification], plugin_string: str, strip_all: bool = True) -> None:
+    def __init__(self, spec: Type[PluginSpecification], plugin_string: str, strip_all: bool = True,
+                 cache: bool = True) -> None:
         """
         Initialize the PluginRegistry. When strip all is false, the full plugin name will be used for names in map
 
+        Plugins are found using the discovery cache and only created when first looked up in the plugin map
+
         Args:
             strip_all: Whether to strip common parts of name from plugins in plugin map
+            cache: Whether to use the discovery cache
         """
-        self._plugins = cast(Dict[str, spec], load_plugin_map(plugin_string, spec, strip_all))
+        discovered = discover_plugin_entry_points(
+            plugin_string, spec, strip_all, diskcache.Cache(DISCOVERY_CACHE_DIRECTORY) if cache else None
+        )
+        self._plugins = cast(Dict[str, spec], LazyPluginMap(plugin_string, discovered))
 
     def get_plugins(self) -> Set[PluginSpecification]:
-        return set(self._plugins.values())
+        plugins = set()
+        for name in self._plugins:
+            try:
+                plugins.add(self._plugins[name])
+            except KeyError:
+                pass
+        return plugins
 
     def get_plugin_map(self) -> Dict[str, PluginSpecification]:
         return self._plugins
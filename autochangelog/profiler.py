@@ -0,0 +1,229 @@
+import json
+import os
+import threading
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from logging import DEBUG, getLogger
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+logger = getLogger(__name__)
+
+
+@dataclass()
+class StageStats:
+    """
+    Cost of a stage of the pipeline. Times only include the time spent in the stage itself, not in the stages it
+    pulls items from
+    """
+    name: str
+    wall_time: float = 0
+    cpu_time: float = 0
+    peak_memory: int = 0
+    items: int = 0
+
+
+@dataclass()
+class PipelineProfiler:
+    """
+    Profile the stages of the generate pipeline. Stages are the processors created with
+    :func:`autochangelog.utils.processor`, so every command is profiled, including the ones from plugins.
+
+    The stages pull items from each other, so the profiler keeps a stack of the active stages and charges the time
+    between two switches to the stage on top of the stack.
+    """
+    trace_memory: bool = True
+    record_events: bool = False
+    stages: Dict[str, StageStats] = field(default_factory=dict)
+    stack: List[str] = field(default_factory=list)
+    events: List[Dict[str, Any]] = field(default_factory=list)
+    last_wall: float = field(default_factory=time.perf_counter)
+    last_cpu: float = field(default_factory=time.process_time)
+    started: float = field(default_factory=time.perf_counter)
+
+    def start(self):
+        """
+        Start tracing memory
+
+        Returns:
+            None
+        """
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.started = self.last_wall = time.perf_counter()
+        self.last_cpu = time.process_time()
+
+    def stop(self):
+        """
+        Stop tracing memory
+
+        Returns:
+            None
+        """
+        self.switch()
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def switch(self):
+        """
+        Charge the time and memory used since the last switch to the active stage
+
+        Returns:
+            None
+        """
+        wall, cpu = time.perf_counter(), time.process_time()
+        if self.stack:
+            stats = self.stages[self.stack[-1]]
+            stats.wall_time += wall - self.last_wall
+            stats.cpu_time += cpu - self.last_cpu
+            if self.trace_memory and tracemalloc.is_tracing():
+                stats.peak_memory = max(stats.peak_memory, tracemalloc.get_traced_memory()[1])
+        if self.trace_memory and tracemalloc.is_tracing() and hasattr(tracemalloc, 'reset_peak'):
+            # peaks are per stage from python 3.9. Before that the peak is the peak of the run so far
+            tracemalloc.reset_peak()
+        self.last_wall, self.last_cpu = wall, cpu
+
+    def enter(self, name: str):
+        self.switch()
+        self.stack.append(name)
+        if self.record_events:
+            self.events.append(self.get_event(name, 'B'))
+
+    def exit(self):
+        self.switch()
+        name = self.stack.pop()
+        if self.record_events:
+            self.events.append(self.get_event(name, 'E'))
+
+    def get_event(self, name: str, phase: str) -> Dict[str, Any]:
+        """
+        Create a Chrome trace event
+
+        Args:
+            name: Stage name
+            phase: B to begin or E to end
+
+        Returns:
+            Trace event
+        """
+        return dict(name=name, ph=phase, ts=(self.last_wall - self.started) * 1e6, pid=os.getpid(),
+                    tid=threading.get_ident())
+
+    def add_stage(self, name: str) -> str:
+        """
+        Add a stage. The same command can be used more than once in the pipeline, so repeated names are numbered
+
+        Args:
+            name: Name of the command
+
+        Returns:
+            Unique name of the stage
+        """
+        unique, count = name, 1
+        while unique in self.stages:
+            count += 1
+            unique = f'{name}#{count}'
+        self.stages[unique] = StageStats(unique)
+        return unique
+
+    def call(self, name: str, f: Callable, *args, **kwargs) -> Any:
+        """
+        Call a processor as a stage. When it returns an iterator, the items are profiled as they are pulled
+
+        Args:
+            name: Name of the stage
+            f: Processor
+            *args: Arguments
+            **kwargs: Keyword arguments
+
+        Returns:
+            Result of the processor
+        """
+        name = self.add_stage(name)
+        self.enter(name)
+        try:
+            result = f(*args, **kwargs)
+        finally:
+            self.exit()
+        if isinstance(result, Iterator):
+            return self.iterate(name, result)
+        return result
+
+    def iterate(self, name: str, iterator: Iterator) -> Iterator:
+        """
+        Profile the items pulled from a stage
+
+        Args:
+            name: Name of the stage
+            iterator: Items of the stage
+
+        Returns:
+            Items of the stage
+        """
+        stats = self.stages[name]
+        while True:
+            self.enter(name)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.exit()
+            stats.items += 1
+            yield item
+
+    def get_report(self) -> str:
+        """
+        Get a table of the cost of each stage
+
+        Returns:
+            Report
+        """
+        width = max([len(name) for name in self.stages] + [5])
+        lines = [f"{'Stage':<{width}} {'Wall s':>10} {'CPU s':>10} {'Peak MB':>10} {'Items':>8}"]
+        for stats in self.stages.values():
+            lines.append(f'{stats.name:<{width}} {stats.wall_time:>10.3f} {stats.cpu_time:>10.3f} '
+                         f'{stats.peak_memory / 2 ** 20:>10.1f} {stats.items:>8}')
+        return '\n'.join(lines)
+
+    def dump_trace(self, path: str):
+        """
+        Write the stage events as a Chrome trace that can be loaded in chrome://tracing or Perfetto
+
+        Args:
+            path: Path of the file
+
+        Returns:
+            None
+        """
+        if logger.isEnabledFor(DEBUG):
+            logger.debug(f'Writing {len(self.events)} trace events to {path}')
+        with open(path, 'w') as out:
+            json.dump(dict(traceEvents=self.events, displayTimeUnit='ms'), out)
+
+
+_profiler: Optional[PipelineProfiler] = None
+
+
+def get_profiler() -> Optional[PipelineProfiler]:
+    """
+    Get the profiler of the current run
+
+    Returns:
+        Profiler or None when the run is not profiled
+    """
+    return _profiler
+
+
+def set_profiler(profiler: Optional[PipelineProfiler]):
+    """
+    Set the profiler of the current run
+
+    Args:
+        profiler: Profiler or None to stop profiling
+
+    Returns:
+        None
+    """
+    global _profiler
+    _profiler = profiler
@@ -0,0 +1,142 @@
+import queue
+import threading
+from dataclasses import dataclass, field
+from logging import DEBUG, getLogger
+from typing import Callable, Iterable, Iterator, List
+from autochangelog.profiler import get_profiler
+
+logger = getLogger(__name__)
+
+
+class _Failure:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+_DONE = object()
+
+
+@dataclass()
+class SourceRunner:
+    """
+    Run several sources concurrently. Each source is drained in its own thread, so the latency of the sources
+    overlaps.
+
+    Items are yielded in the order the sources would yield them one after another. Items of the first source are
+    yielded as they arrive and items of the others are buffered until the sources before them are done.
+
+    When a source fails or the items are not all consumed, the other sources stop at their next item. A failure is
+    raised as soon as it happens, even when the sources before the failed one are still loading. The threads are
+    daemons, so a source blocked in a call is abandoned and does not keep the interpreter alive.
+    """
+    sources: List[Callable[[], Iterable]]
+    stop: threading.Event = field(default_factory=threading.Event, init=False, repr=False)
+    queues: List[queue.Queue] = field(default_factory=list, init=False, repr=False)
+
+    def __iter__(self) -> Iterator:
+        # sources are created in the calling thread, which has the click context
+        releases = [source() for source in self.sources]
+        queues = self.queues = [queue.Queue() for _ in releases]
+        threads = [
+            threading.Thread(target=self.drain, args=(source, items), daemon=True, name='autochangelog-source')
+            for source, items in zip(releases, queues)
+        ]
+        for thread in threads:
+            thread.start()
+        completed = False
+        try:
+            for items in queues:
+                while True:
+                    item = items.get()
+                    if item is _DONE:
+                        break
+                    if isinstance(item, _Failure):
+                        raise item.error
+                    yield item
+            completed = True
+        finally:
+            self.stop.set()
+            if completed:
+                for thread in threads:
+                    thread.join()
+            elif logger.isEnabledFor(DEBUG):
+                logger.debug(f'Abandoned {sum(thread.is_alive() for thread in threads)} source threads')
+
+    def drain(self, releases: Iterable, items: queue.Queue):
+        """
+        Load the items of a synchronous source into its queue
+
+        Args:
+            releases: Items of the source
+            items: Queue of the source
+
+        Returns:
+            None
+        """
+        try:
+            for item in releases:
+                if self.stop.is_set():
+                    break
+                items.put(item)
+        except BaseException as e:
+            self.fail(e)
+        finally:
+            items.put(_DONE)
+
+    def fail(self, error: BaseException):
+        """
+        Stop the run after a source failed. The failure is sent to every queue, so it is raised without waiting for
+        the sources before the failed one
+
+        Args:
+            error: Error of the source
+
+        Returns:
+            None
+        """
+        self.stop.set()
+        for items in self.queues:
+            items.put(_Failure(error))
+
+
+def build_stream(processors: List[Callable[[Iterable], Iterable]], concurrent_sources: bool = False) -> Iterable:
+    """
+    Pipe an empty stream through the processors of the generate command. Consecutive sources, which are processors
+    created with :func:`autochangelog.utils.generator`, are run concurrently with a :class:`SourceRunner` when
+    concurrent_sources is set. The sources then run in other threads and update the click context object in any order,
+    so ctx.obj.src is not always the last source. When the run is profiled, the sources that run together are one
+    stage
+
+    Args:
+        processors: Processors in the order of the command line
+        concurrent_sources: Run consecutive sources concurrently
+
+    Returns:
+        Stream of the last processor
+    """
+    stream = ()
+    position = 0
+    while position < len(processors):
+        end = position
+        while concurrent_sources and end < len(processors) and hasattr(processors[end], 'releases'):
+            end += 1
+        if end - position > 1:
+            sources = [processor.releases for processor in processors[position:end]]
+            name = '+'.join(source.__name__ for source in sources)
+            if logger.isEnabledFor(DEBUG):
+                logger.debug(f'Running sources {name} concurrently')
+            runner = iter(SourceRunner(sources))
+            profiler = get_profiler()
+            if profiler is not None:
+                runner = profiler.iterate(profiler.add_stage(name), runner)
+            stream = _chain(stream, runner)
+            position = end
+        else:
+            stream = processors[position](stream)
+            position += 1
+    return stream
+
+
+def _chain(stream: Iterable, runner: Iterator) -> Iterator:
+    yield from stream
+    yield from runner
@@ -0,0 +1,138 @@
+import os
+import re
+from dataclasses import dataclass, field
+from logging import DEBUG, getLogger
+from typing import Dict, List, Optional, Pattern, Tuple
+import diskcache
+from pygit2 import Commit, Oid, Repository
+
+logger = getLogger(__name__)
+TAG_PREFIX = 'refs/tags/'
+# Matches the version in a tag name like v1.2.0, 1.2, release-1.2.0-rc.1 or 1.2.0+build.5
+DEFAULT_TAG_PATTERN = r'(?P<version>\d+(?:\.\d+)*(?:-[0-9A-Za-z.-]+)?(?:\+[0-9A-Za-z.-]+)?)$'
+DEVELOPMENT_RELEASE = 'Development'
+
+
+def compile_tag_pattern(pattern: str) -> Pattern:
+    """
+    Compile a tag pattern. The version is taken from the group named version or, when there is no such group, the
+    first group
+
+    Args:
+        pattern: Regular expression searched in the tag name without refs/tags/
+
+    Returns:
+        Compiled pattern
+    """
+    expr = re.compile(pattern)
+    if 'version' not in expr.groupindex and expr.groups < 1:
+        raise ValueError(f'Tag pattern {pattern} must have a group that matches the version')
+    return expr
+
+
+def version_key(version: str) -> Tuple:
+    """
+    Get a sort key for a version that follows semantic versioning precedence. Pre-releases sort before their
+    release and build metadata is ignored
+
+    Args:
+        version: Version like 1.2.0 or 1.2.0-rc.1
+
+    Returns:
+        Sort key
+    """
+    core, _, prerelease = version.partition('+')[0].partition('-')
+    numbers = [int(part) for part in core.split('.') if part.isdigit()]
+    # 1.2 and 1.2.0 are the same version
+    while numbers and numbers[-1] == 0:
+        numbers.pop()
+    if not prerelease:
+        return tuple(numbers), (1,)
+    identifiers = tuple((0, int(part), '') if part.isdigit() else (1, 0, part) for part in prerelease.split('.'))
+    return tuple(numbers), (0, identifiers)
+
+
+@dataclass()
+class TagIndex:
+    """
+    Tags of a repository that match a tag pattern, sorted by version from newest to oldest with HEAD first. Each tag
+    is resolved to the commit it points at once, so ranges of releases can be found without looking up references.
+    """
+    tags: List[str] = field(default_factory=list)
+    targets: List[Optional[Oid]] = field(default_factory=list)
+    names: List[str] = field(default_factory=list)
+    positions: Dict[str, int] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, repo: Repository, pattern: str = DEFAULT_TAG_PATTERN, cache: diskcache.Cache = None) -> \
+            'TagIndex':
+        """
+        Build the tag index of a repository
+
+        Args:
+            repo: Repository
+            pattern: Tag pattern. Tags that do not match are ignored
+            cache: Cache used to store the commit each tag object points at between runs
+
+        Returns:
+            Tag index
+        """
+        expr = compile_tag_pattern(pattern)
+        group = 'version' if 'version' in expr.groupindex else 1
+        peel_key = ('peeled_tags', os.path.abspath(repo.path))
+        peeled = cache.get(peel_key, dict()) if cache is not None else dict()
+        peeled_count = len(peeled)
+        releases = []
+        for reference in repo.listall_reference_objects():
+            if not reference.name.startswith(TAG_PREFIX):
+                continue
+            match = expr.search(reference.name[len(TAG_PREFIX):])
+            if not match or not match.group(group):
+                continue
+            target = str(reference.target)
+            if target not in peeled:
+                peeled[target] = str(reference.peel(Commit).id)
+            version = match.group(group)
+            releases.append((version_key(version), reference.name, version, Oid(hex=peeled[target])))
+        if cache is not None and len(peeled) != peeled_count:
+            cache[peel_key] = peeled
+        releases.sort(reverse=True)
+        if logger.isEnabledFor(DEBUG):
+            logger.debug(f'Indexed {len(releases)} tags')
+
+        index = cls(tags=['HEAD'], targets=[None], names=[DEVELOPMENT_RELEASE])
+        for _, tag, version, target in releases:
+            index.tags.append(tag)
+            index.targets.append(target)
+            index.names.append(version)
+        index.positions = {tag: position for position, tag in enumerate(index.tags)}
+        return index
+
+    def find(self, tag: str) -> Optional[int]:
+        """
+        Find the position of a tag
+
+        Args:
+            tag: Reference name, tag name or version of the tag
+
+        Returns:
+            Position of the tag or None when the tag is not in the index
+        """
+        for name in (tag, TAG_PREFIX + tag):
+            if name in self.positions:
+                return self.positions[name]
+        if tag in self.names:
+            return self.names.index(tag)
+        return None
+
+    def previous(self, position: int) -> Optional[int]:
+        """
+        Get the position of the release before a release
+
+        Args:
+            position: Position of the release
+
+        Returns:
+            Position of the previous release or None for the oldest release
+        """
+        return position + 1 if position + 1 < len(self.tags) else None
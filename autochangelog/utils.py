@@ -1,14 +1,24 @@
 from functools import update_wrapper
+from typing import Iterable, Iterator
+from autochangelog.data import SrcData
+from autochangelog.metrics import get_metrics
+from autochangelog.profiler import get_profiler
 
 
 def processor(f):
     """
     Helper decorator to rewrite a function so that it returns another
     function from it.
+
+    When the run is profiled, the returned function is profiled as a stage
+    named after the command.
     """
 
     def new_func(*args, **kwargs):
         def processor(stream):
+            profiler = get_profiler()
+            if profiler is not None:
+                return profiler.call(new_func.__name__, f, stream, *args, **kwargs)
             return f(stream, *args, **kwargs)
 
         return processor
@@ -16,15 +26,45 @@ def processor(f):
     return update_wrapper(new_func, f)
 
 
+def record_releases(releases: Iterable) -> Iterator:
+    """
+    Record the releases of a source in the metrics of the run
+
+    Args:
+        releases: Items of the source
+
+    Returns:
+        Items of the source
+    """
+    for data in releases:
+        # record the releases of every source, including the ones from plugins
+        if isinstance(data, SrcData):
+            get_metrics().record_release(data.items)
+        yield data
+
+
 def generator(f):
     """
     Similar to the :func:`processor` but passes through old values
     unchanged and does not pass through the values as parameter.
+
+    The returned function has a releases attribute that loads only the
+    values of the source, so consecutive sources can run concurrently.
     """
 
     @processor
     def new_func(stream, *args, **kwargs):
         yield from stream
-        yield from f(*args, **kwargs)
+        yield from record_releases(f(*args, **kwargs))
+
+    def source_func(*args, **kwargs):
+        source = new_func(*args, **kwargs)
+
+        def releases():
+            return record_releases(f(*args, **kwargs))
+
+        source.releases = update_wrapper(releases, f)
+        return source
 
-    return update_wrapper(new_func, f)
\ No newline at end of file
+    update_wrapper(new_func, f)
+    return update_wrapper(source_func, f)
@@ -0,0 +1,49 @@
+"""
+Measure the import time of the CLI with python -X importtime
+
+Importing the CLI must not import the plugins or their dependencies. They are only imported when their command is
+used
+
+Usage:
+    python benchmarks/cli_startup.py [runs]
+"""
+import re
+import subprocess
+import sys
+
+IMPORT_EXPR = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+PLUGIN_MODULES = ('autochangelog.gitlog_source', 'autochangelog.github_issues_source', 'autochangelog.json_output',
+                  'autochangelog.markdown_output', 'pygit2', 'github', 'diskcache', 'dateutil', 'jinja2',
+                  'pkg_resources')
+
+
+def import_times(module: str):
+    """
+    Import a module in a new interpreter and get the cumulative import time of each top level import
+
+    Args:
+        module: Module to import
+
+    Returns:
+        Dictionary of module to cumulative import time in microseconds
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'], capture_output=True,
+                            text=True, check=True)
+    times = dict()
+    for line in result.stderr.splitlines():
+        match = IMPORT_EXPR.match(line)
+        if match:
+            times[match.group(4)] = int(match.group(2))
+    return times
+
+
+if __name__ == "__main__":
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    totals = []
+    for _ in range(runs):
+        times = import_times('autochangelog.cli')
+        loaded = sorted(name for name in times if name in PLUGIN_MODULES)
+        assert not loaded, f"Importing the CLI imported {', '.join(loaded)}"
+        totals.append(times['autochangelog.cli'])
+    print(f'import autochangelog.cli: best {min(totals) / 1000:.1f}ms, worst {max(totals) / 1000:.1f}ms '
+          f'over {runs} runs')
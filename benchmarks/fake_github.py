@@ -0,0 +1,195 @@
+"""
+Local server that answers the parts of the Github API used by the github source with synthetic issues and tags
+"""
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+from urllib.parse import parse_qs, urlencode, urlparse
+
+LABELS = ['bug', 'Feature Request', 'Documentation', 'CLI', 'wontfix', 'Core', 'Test']
+START = datetime(2020, 1, 1, tzinfo=timezone.utc)
+REPO_EXPR = re.compile(r'^(?:/api/v3)?/repos/(?P<owner>[^/]+)/(?P<name>[^/]+)(?P<rest>/.*)?$')
+
+
+def iso(date: datetime) -> str:
+    return date.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+class FakeGithub:
+    """
+    Fake Github API with issues, tags and labels for any owner/name. Every fifth issue is open, every seventh is a
+    pull request and issues are closed three hours apart with tags spread evenly over that time.
+
+    Responses have ETags so cached requests are revalidated with 304 responses like on Github.
+    """
+
+    def __init__(self, issues: int = 500, tags: int = 10, latency: float = 0, seed: int = 3):
+        """
+        Args:
+            issues: Number of issues
+            tags: Number of tags
+            latency: Seconds every request waits before it is answered
+            seed: Random seed for the labels of the issues
+        """
+        self.latency = latency
+        self.requests = 0
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self.get_handler())
+        self.server.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self.server.server_port}'
+        rng = random.Random(seed)
+        self.issues = []
+        for number in range(1, issues + 1):
+            closed = START + timedelta(hours=number * 3) if number % 5 else None
+            self.issues.append(dict(
+                number=number, id=number, title=f'Issue {number}', state='closed' if closed else 'open',
+                closed_at=iso(closed) if closed else None, created_at=iso(START), updated_at=iso(closed or START),
+                html_url=f'https://github.com/o/r/issues/{number}', user=dict(login='someone'),
+                labels=[dict(name=label) for label in rng.sample(LABELS, rng.randint(0, 2))],
+                pull_request=dict(html_url=f'https://github.com/o/r/pull/{number}') if number % 7 == 0 else None
+            ))
+        span = issues * 3
+        self.tags = [
+            dict(name=f'v1.{i}.0', date=START + timedelta(hours=span * (i + 1) / (tags + 1)),
+                 sha=hashlib.sha1(str(i).encode()).hexdigest())
+            for i in range(tags)
+        ]
+        self.thread = None
+
+    def start(self) -> 'FakeGithub':
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def get_resource(self, path: str, query: Dict[str, List[str]]) -> Any:
+        """
+        Get the data of a rest api path
+
+        Args:
+            path: Path of the request
+            query: Query parameters
+
+        Returns:
+            Data or None when the path does not exist
+        """
+        match = REPO_EXPR.match(path)
+        if match is None:
+            return None
+        repo_url = f'{self.url}/repos/{match.group("owner")}/{match.group("name")}'
+        rest = match.group('rest') or ''
+        if rest == '':
+            return dict(id=1, name=match.group('name'), full_name=f'{match.group("owner")}/{match.group("name")}',
+                        url=repo_url)
+        if rest == '/labels':
+            return [dict(name=label, url=f'{repo_url}/labels/{label}') for label in LABELS]
+        if rest == '/tags':
+            return [dict(name=tag['name'], commit=dict(sha=tag['sha'], url=f'{repo_url}/commits/{tag["sha"]}'))
+                    for tag in reversed(self.tags)]
+        for tag in self.tags:
+            if rest in (f'/commits/{tag["sha"]}', f'/git/commits/{tag["sha"]}'):
+                committer = dict(date=iso(tag['date']))
+                return dict(sha=tag['sha'], url=f'{repo_url}{rest}', committer=committer, message='Release',
+                            commit=dict(committer=committer, author=committer, message='Release'))
+        if rest == '/issues':
+            issues = self.issues
+            if query.get('state', ['open'])[0] == 'closed':
+                issues = [issue for issue in issues if issue['state'] == 'closed']
+            if 'since' in query:
+                issues = [issue for issue in issues if issue['updated_at'] >= query['since'][0]]
+            if query.get('direction', ['desc'])[0] == 'desc':
+                issues = list(reversed(issues))
+            return issues
+        if rest.startswith('/issues/') and rest[len('/issues/'):].isdigit():
+            number = int(rest[len('/issues/'):])
+            return self.issues[number - 1] if 1 <= number <= len(self.issues) else None
+        return None
+
+    def get_tag_nodes(self, cursor: str) -> Dict[str, Any]:
+        """
+        Answer the GraphQL query of tag dates, 100 tags per page
+
+        Args:
+            cursor: Cursor of the page
+
+        Returns:
+            Response data
+        """
+        start = int(cursor) if cursor else 0
+        nodes = [dict(name=tag['name'], target=dict(__typename='Commit', committedDate=iso(tag['date'])))
+                 for tag in self.tags[start:start + 100]]
+        page_info = dict(hasNextPage=start + 100 < len(self.tags), endCursor=str(start + 100))
+        return dict(data=dict(repository=dict(refs=dict(nodes=nodes, pageInfo=page_info))))
+
+    def get_handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def begin(self):
+                with fake.lock:
+                    fake.requests += 1
+                if fake.latency:
+                    time.sleep(fake.latency)
+
+            def send_data(self, data: Any, status: int = 200, headers: Dict[str, str] = None):
+                body = json.dumps(data).encode()
+                etag = f'"{hashlib.md5(body).hexdigest()}"'
+                if status == 200 and self.headers.get('If-None-Match') == etag:
+                    status, body = 304, b''
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('ETag', etag)
+                self.send_header('X-RateLimit-Limit', '5000')
+                self.send_header('X-RateLimit-Remaining', '5000')
+                self.send_header('X-RateLimit-Reset', str(int(time.time()) + 3600))
+                for key, value in (headers or dict()).items():
+                    self.send_header(key, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                self.begin()
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                data = fake.get_resource(url.path, query)
+                if data is None:
+                    return self.send_data(dict(message='Not Found'), status=404)
+                if not isinstance(data, list):
+                    return self.send_data(data)
+                per_page, page = int(query.get('per_page', ['30'])[0]), int(query.get('page', ['1'])[0])
+                last = max(1, (len(data) + per_page - 1) // per_page)
+                links = []
+                for number, rel in ((page + 1, 'next'), (last, 'last')) if page < last else ():
+                    params = {key: values[0] for key, values in query.items()}
+                    params['page'] = number
+                    links.append(f'<{fake.url}{url.path}?{urlencode(params)}>; rel="{rel}"')
+                self.send_data(data[(page - 1) * per_page:page * per_page],
+                               headers=dict(Link=', '.join(links)) if links else None)
+
+            def do_POST(self):
+                self.begin()
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                self.send_data(fake.get_tag_nodes((body.get('variables') or dict()).get('cursor')))
+
+        return Handler
@@ -0,0 +1,60 @@
+"""
+Check that loading every release of the git source scales linearly with the history
+
+Times GitChangelogSource.get_all_changes without the release index on synthetic repositories that double in commits
+and tags. A walk per release would make the time per commit grow with the number of tags, so the check fails when the
+time per commit of the largest repository is more than the allowed ratio of the smallest one.
+
+Usage:
+    python benchmarks/git_scaling.py [commits] [doublings] [max_ratio]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from pygit2 import Repository
+
+from autochangelog.gitlog_source import GitChangelogSource
+from synthetic import make_git_repo
+
+TAG_EVERY = 20
+RUNS = 3
+
+
+def time_all_changes(path: str) -> float:
+    """
+    Time loading every release of a repository
+
+    Args:
+        path: Path of the repository
+
+    Returns:
+        Best time of the runs in seconds
+    """
+    times = []
+    for _ in range(RUNS):
+        started = time.perf_counter()
+        for _ in GitChangelogSource(repo=Repository(path)).get_all_changes():
+            pass
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+if __name__ == "__main__":
+    commits = int(sys.argv[1]) if len(sys.argv) > 1 else 2500
+    doublings = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    max_ratio = float(sys.argv[3]) if len(sys.argv) > 3 else 2.0
+    per_commit = []
+    with tempfile.TemporaryDirectory(prefix='autochangelog-scaling-') as work_dir:
+        for step in range(doublings + 1):
+            size = commits * 2 ** step
+            path = os.path.join(work_dir, f'repo-{size}')
+            make_git_repo(path, size, TAG_EVERY)
+            elapsed = time_all_changes(path)
+            per_commit.append(elapsed / size)
+            print(f'{size:>7} commits {size // TAG_EVERY:>6} tags: {elapsed:.3f}s, '
+                  f'{per_commit[-1] * 1e6:.1f}us per commit')
+    ratio = per_commit[-1] / per_commit[0]
+    print(f'time per commit grew {ratio:.2f}x over a {2 ** doublings}x larger history')
+    assert ratio <= max_ratio, f'get_all_changes does not scale linearly: {ratio:.2f}x > {max_ratio}x'
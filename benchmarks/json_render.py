@@ -0,0 +1,53 @@
+"""
+Microbenchmark of rendering items for the json output
+
+Compares rendering every item through a newly constructed Jinja template with the renderers returned by
+:func:`autochangelog.json_output.get_renderer`
+
+Usage:
+    python benchmarks/json_render.py [items]
+"""
+import sys
+import time
+from datetime import datetime
+
+from jinja2 import Template
+
+from autochangelog.data import IssueRecord, LabelRecord
+from autochangelog.json_output import get_renderer
+
+
+def make_items(count: int):
+    return [
+        IssueRecord(number=i, title=f'Issue {i}', state='closed', closed_at=datetime(2020, 1, 1),
+                    labels=(LabelRecord('bug'),), pull_request_url=None,
+                    html_url=f'https://github.com/o/r/issues/{i}', author='user')
+        for i in range(count)
+    ]
+
+
+def render_jinja(items, template):
+    template_src = Template(template)
+    return [template_src.render(item=item) for item in items]
+
+
+def render_renderer(items, template):
+    render = get_renderer(template)
+    return list(map(render, items))
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    items = make_items(count)
+    for template in ("{{ item.title }}", "{{ item.number }} - {{ item.title }}"):
+        jinja_time, expected = timed(render_jinja, items, template)
+        renderer_time, result = timed(render_renderer, items, template)
+        assert result == expected
+        print(f'{template!r:40} {count} items: jinja per item {jinja_time:.3f}s, renderer {renderer_time:.3f}s '
+              f'({jinja_time / renderer_time:.1f}x)')
@@ -0,0 +1,215 @@
+"""
+End to end benchmarks of the git and github sources with the json and markdown outputs
+
+The git source runs against a synthetic repository and the github source against a local fake Github API, so the
+suite needs no network. Each scenario runs the CLI in process and the best and median times are saved as json with
+the metrics of the run. With --baseline, the results are compared with saved results and the suite fails when a
+scenario is slower than the threshold or issues more Github requests.
+
+The sphinx output is not benchmarked because it is not registered as a command.
+
+Usage:
+    python benchmarks/suite.py --output results.json
+    python benchmarks/suite.py --baseline results.json --threshold 0.2
+"""
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List
+
+import click
+
+from fake_github import FakeGithub
+from synthetic import make_git_repo
+
+RESULTS_VERSION = 1
+GITHUB_SRC = 'octo/synthetic'
+
+
+def get_scenarios(repo: str, api_url: str, out: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Get the scenarios of the suite. Cold scenarios clear the cache of their source before each run, the others run
+    once before they are measured so their cache is warm
+
+    Args:
+        repo: Path of the synthetic repository
+        api_url: Url of the fake Github API
+        out: Directory for the output files
+
+    Returns:
+        Dictionary of scenario name to the cache to clear and the CLI arguments
+    """
+    github = ['github', '--api-url', api_url, GITHUB_SRC]
+    return {
+        'git-json-cold': dict(cold='git', args=['git', '--no-cache', repo, 'json', '--output', f'{out}/git.json']),
+        'git-json-warm': dict(args=['git', repo, 'json', '--output', f'{out}/git.json']),
+        'git-json-streaming': dict(args=['git', repo, 'json', '--streaming', '--output', f'{out}/git.json']),
+        'git-markdown-cold': dict(cold='git', args=['git', '--no-cache', repo, 'markdown', '--output',
+                                                    f'{out}/git.md']),
+        'git-markdown-warm': dict(args=['git', repo, 'markdown', '--output', f'{out}/git.md']),
+        'github-json-cold': dict(cold='github', args=github + ['json', '--output', f'{out}/github.json']),
+        'github-json-warm': dict(args=github + ['json', '--output', f'{out}/github.json']),
+        'github-markdown-warm': dict(args=github + ['markdown', '--output', f'{out}/github.md']),
+        'merged-markdown-warm': dict(args=['git', repo, *github, 'merge', 'markdown', '--output', f'{out}/merged.md']),
+    }
+
+
+def get_cache_cleaner(path: str) -> Callable[[], None]:
+    """
+    Get a function that removes a cache directory, so a scenario runs cold
+
+    Args:
+        path: Cache directory
+
+    Returns:
+        Function that removes the directory
+    """
+    def clear():
+        shutil.rmtree(path, ignore_errors=True)
+    return clear
+
+
+def run_scenario(cli: click.Group, args: List[str], repeats: int, clear: Callable[[], None] = None) -> \
+        Dict[str, Any]:
+    """
+    Run a scenario and time it
+
+    Args:
+        cli: CLI group
+        args: Arguments of the generate command
+        repeats: Number of measured runs
+        clear: Function that clears the cache before each run. When not set, the scenario runs once unmeasured
+
+    Returns:
+        Times of the runs and the counters of the last run
+    """
+    from autochangelog.metrics import get_metrics
+    if clear is None:
+        cli.main(['--no-progress', 'generate'] + args, standalone_mode=False)
+    runs = []
+    for _ in range(repeats):
+        if clear is not None:
+            clear()
+        start = time.perf_counter()
+        cli.main(['--no-progress', 'generate'] + args, standalone_mode=False)
+        runs.append(time.perf_counter() - start)
+    return dict(best=min(runs), median=statistics.median(runs), runs=runs,
+                counters=get_metrics().to_dict()['counters'])
+
+
+def get_environment() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = None
+    return dict(python=platform.python_version(), platform=platform.platform(), cpus=os.cpu_count(), commit=commit)
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """
+    Compare results with a baseline and print a table of the differences
+
+    Args:
+        results: Results of this run
+        baseline: Saved results
+        threshold: Allowed slow down of the best time as a fraction, for example 0.1 for 10%
+
+    Returns:
+        Descriptions of the regressions
+    """
+    if baseline['parameters'] != results['parameters']:
+        click.echo(f"Warning: the baseline was run with {baseline['parameters']}", err=True)
+    regressions = []
+    click.echo(f"{'Scenario':<24} {'Baseline s':>11} {'Current s':>11} {'Change':>8}")
+    for name, current in results['scenarios'].items():
+        previous = baseline['scenarios'].get(name)
+        if previous is None:
+            click.echo(f"{name:<24} {'-':>11} {current['best']:>11.3f} {'new':>8}")
+            continue
+        change = current['best'] / previous['best'] - 1 if previous['best'] else 0
+        click.echo(f"{name:<24} {previous['best']:>11.3f} {current['best']:>11.3f} {change:>+8.1%}")
+        if change > threshold:
+            regressions.append(f'{name} is {change:.1%} slower')
+        for counter, value in current['counters'].items():
+            if counter.endswith('requests') and value > previous['counters'].get(counter, value):
+                regressions.append(f"{name} made {value} {counter}, {previous['counters'][counter]} before")
+    return regressions
+
+
+@click.command()
+@click.option('--output', type=click.Path(dir_okay=False, writable=True), default=None,
+              help="Write the results to a json file")
+@click.option('--baseline', type=click.Path(exists=True, dir_okay=False), default=None,
+              help="Compare the results with saved results")
+@click.option('--threshold', type=float, default=0.1, help="Allowed slow down compared to the baseline")
+@click.option('--scenario', multiple=True, help="Run only these scenarios")
+@click.option('--repeats', type=click.IntRange(min=1), default=3, help="Measured runs per scenario")
+@click.option('--commits', type=click.IntRange(min=1), default=20000, help="Commits of the synthetic repository")
+@click.option('--tag-every', type=click.IntRange(min=1), default=20, help="Commits between tags")
+@click.option('--merge-every', type=click.IntRange(min=0), default=17, help="Commits between merges")
+@click.option('--issues', type=click.IntRange(min=1), default=5000, help="Issues of the fake Github repository")
+@click.option('--tags', type=click.IntRange(min=1), default=50, help="Tags of the fake Github repository")
+@click.option('--latency', type=float, default=0.0, help="Seconds the fake Github API waits before each response")
+@click.option('--work-dir', type=click.Path(file_okay=False), default=None,
+              help="Directory for the repository, caches and outputs. Defaults to a temporary directory")
+def main(output: str, baseline: str, threshold: float, scenario: List[str], repeats: int, commits: int,
+         tag_every: int, merge_every: int, issues: int, tags: int, latency: float, work_dir: str):
+    work_dir = os.path.abspath(work_dir or tempfile.mkdtemp(prefix='autochangelog-bench-'))
+    home, out = os.path.join(work_dir, 'home'), os.path.join(work_dir, 'out')
+    os.makedirs(home, exist_ok=True)
+    os.makedirs(out, exist_ok=True)
+    # the caches are under the home directory, which is read when autochangelog is imported
+    os.environ['HOME'] = home
+    from autochangelog.cli import cli, generate
+    from autochangelog.github_issues_source import github
+    from autochangelog.gitlog_source import git
+    from autochangelog.json_output import json as json_command
+    from autochangelog.markdown_output import markdown
+    from autochangelog.merge_sources import merge
+    # register the commands directly so the suite does not depend on the installed entry points
+    for command in (git, github, json_command, markdown, merge):
+        generate.add_command(command)
+
+    parameters = dict(commits=commits, tag_every=tag_every, merge_every=merge_every, issues=issues, tags=tags,
+                      latency=latency, repeats=repeats)
+    start = time.perf_counter()
+    repo = os.path.join(work_dir, 'repo')
+    make_git_repo(repo, commits, tag_every, merge_every=merge_every)
+    click.echo(f'Created repository with {commits} commits in {time.perf_counter() - start:.1f}s', err=True)
+
+    results = dict(version=RESULTS_VERSION, environment=get_environment(), parameters=parameters, scenarios=dict())
+    with FakeGithub(issues=issues, tags=tags, latency=latency) as fake:
+        scenarios = get_scenarios(repo, fake.url, out)
+        unknown = set(scenario) - set(scenarios)
+        if unknown:
+            raise click.BadParameter(f"Unknown scenarios {', '.join(sorted(unknown))}", param_hint='--scenario')
+        for name, config in scenarios.items():
+            if scenario and name not in scenario:
+                continue
+            clear = None
+            if 'cold' in config:
+                clear = get_cache_cleaner(os.path.join(home, '.autochangelog', config['cold']))
+            results['scenarios'][name] = result = run_scenario(cli, config['args'], repeats, clear)
+            click.echo(f"{name:<24} best {result['best']:.3f}s, median {result['median']:.3f}s", err=True)
+
+    if output:
+        with open(output, 'w') as out_file:
+            json.dump(results, out_file, indent=4)
+    if baseline:
+        with open(baseline) as baseline_file:
+            saved = json.load(baseline_file)
+        regressions = compare(results, saved, threshold)
+        if regressions:
+            click.echo('Regressions:\n' + '\n'.join(f'  {regression}' for regression in regressions), err=True)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Synthetic data used by the benchmarks
+"""
+import random
+import shutil
+
+import pygit2
+
+MESSAGES = ['Fix bug {i}', 'Add feature {i}', 'Merge branch feature-{i}', 'feat: thing {i}', 'Bump version',
+            'chore(deps): update {i}']
+
+
+def make_git_repo(path: str, commits: int, tag_every: int, seed: int = 1, merge_every: int = 17) -> \
+        pygit2.Repository:
+    """
+    Create a repository with a linear history, a merged side branch every merge_every commits and a tag every
+    tag_every commits. Commit times repeat so the walks have to handle ties.
+
+    Args:
+        path: Path of the repository. Any existing directory is removed
+        commits: Number of commits
+        tag_every: Number of commits between tags
+        seed: Random seed
+        merge_every: Number of commits between merges, at least 2. Use 0 for a history without merges
+
+    Returns:
+        Repository
+    """
+    if merge_every == 1 or merge_every < 0:
+        raise ValueError(f'merge_every must be 0 or at least 2, not {merge_every}')
+    # fork the side branch at least one commit before the merge, so the merge joins two different lines
+    branch_at, merge_at = min(5, merge_every - 2), min(9, merge_every - 1)
+    shutil.rmtree(path, ignore_errors=True)
+    repo = pygit2.init_repository(path)
+    tree = repo.TreeBuilder().write()
+    rng = random.Random(seed)
+    parents, side = [], None
+    for i in range(commits):
+        signature = pygit2.Signature('Dev', 'dev@example.com', 1600000000 + (i // 3) * 60, 0)
+        message = rng.choice(MESSAGES).format(i=i) + '\n\nbody'
+        # only fork once there is a commit to fork from, otherwise the side branch would be a second root
+        if merge_every and i % merge_every == branch_at and parents:
+            side = parents[:]
+        if merge_every and i % merge_every == merge_at and side is not None:
+            parents = parents + [repo.create_commit(None, signature, signature, f'side {i}', tree, side)]
+            side = None
+        parents = [repo.create_commit('refs/heads/master', signature, signature, message, tree, parents)]
+        if i % tag_every == tag_every - 1:
+            repo.create_reference(f'refs/tags/v1.{i // tag_every:05d}.0', parents[0])
+    repo.set_head('refs/heads/master')
+    return repo
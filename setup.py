@@ -49,7 +49,8 @@ setup(
                 "git=autochangelog.gitlog_source:git",
                 "github=autochangelog.github_issues_source:github",
                 "json=autochangelog.json_output:json",
-                "markdown=autochangelog.markdown_output:markdown"
+                "markdown=autochangelog.markdown_output:markdown",
+                "merge=autochangelog.merge_sources:merge"
             ]
     },
     extras_require=extras,
@@ -0,0 +1,6 @@
+import os
+import tempfile
+
+# the caches are under the home directory, which is read when autochangelog is imported, so the tests never use the
+# caches of the user
+os.environ['HOME'] = tempfile.mkdtemp(prefix='autochangelog-tests-')
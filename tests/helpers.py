@@ -0,0 +1,88 @@
+"""
+Helpers to create git repositories for the tests
+"""
+from typing import Dict, List, Optional
+
+import pygit2
+
+START = 1600000000
+
+
+def commit(repo: pygit2.Repository, message: str, parents: List[pygit2.Oid], time: int = START,
+           ref: Optional[str] = 'refs/heads/master') -> pygit2.Oid:
+    """
+    Create an empty commit
+
+    Args:
+        repo: Repository
+        message: Commit message
+        parents: Parent commits
+        time: Commit time. Use the same time for several commits to create ties
+        ref: Reference to update. None to leave the references alone
+
+    Returns:
+        Id of the commit
+    """
+    signature = pygit2.Signature('Dev', 'dev@example.com', time, 0)
+    tree = repo.TreeBuilder().write()
+    return repo.create_commit(ref, signature, signature, message, tree, parents)
+
+
+def make_history(path: str, commits: int, tag_every: int, merge_every: int = 0) -> pygit2.Repository:
+    """
+    Create a repository with a tag every tag_every commits and a side branch merged every merge_every commits.
+    Three commits share each commit time
+
+    Args:
+        path: Path of the new repository
+        commits: Number of commits on the main line
+        tag_every: Commits between tags
+        merge_every: Commits between merges. 0 for a linear history
+
+    Returns:
+        Repository
+    """
+    repo = pygit2.init_repository(path)
+    head, side = [], None
+    for i in range(commits):
+        time = START + (i // 3) * 60
+        if merge_every and i % merge_every == 0:
+            side = head[:]
+        parents = head
+        if merge_every and i % merge_every == merge_every - 1 and side is not None:
+            parents = head + [commit(repo, f'Side {i}', side, time, ref=None)]
+        head = [commit(repo, f'Change {i}\n\nbody', parents, time)]
+        if i % tag_every == tag_every - 1:
+            repo.create_reference(f'refs/tags/v1.{i // tag_every}.0', head[0])
+    repo.set_head('refs/heads/master')
+    return repo
+
+
+def get_releases_by_reachability(repo: pygit2.Repository, targets: List[Optional[pygit2.Oid]],
+                                 names: List[str]) -> Dict[str, set]:
+    """
+    Assign each commit to the oldest release whose tag reaches it, by walking the parents of the tags from the
+    oldest to the newest. This is the definition of a release the git source must follow
+
+    Args:
+        repo: Repository
+        targets: Commit of each release from the newest to the oldest. None for HEAD
+        names: Name of each release
+
+    Returns:
+        Commit ids of each release that has commits
+    """
+    assigned = set()
+    releases = dict()
+    for target, name in reversed(list(zip(targets, names))):
+        pending, ids = [target if target is not None else repo.head.target], set()
+        while pending:
+            oid = pending.pop()
+            if oid in assigned:
+                continue
+            assigned.add(oid)
+            ids.add(str(oid))
+            pending.extend(repo[oid].parent_ids)
+        if ids:
+            releases[name] = ids
+    return releases
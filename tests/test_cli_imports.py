@@ -0,0 +1,35 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+# the plugins and their dependencies are only imported when their command runs
+HEAVY_MODULES = ('autochangelog.gitlog_source', 'autochangelog.github_issues_source', 'autochangelog.github_fetcher',
+                 'autochangelog.json_output', 'autochangelog.markdown_output', 'autochangelog.merge_sources',
+                 'autochangelog.source_runner', 'pygit2', 'github', 'requests', 'diskcache', 'dateutil', 'jinja2',
+                 'pkg_resources', 'asyncio')
+
+
+def get_imported_modules(code: str):
+    script = f'import json, sys\n{code}\nprint(json.dumps(sorted(sys.modules)))'
+    result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    return set(json.loads(result.stdout.splitlines()[-1]))
+
+
+@pytest.mark.parametrize('code', [
+    'import autochangelog.cli',
+    # records are shared by every source and output
+    'import autochangelog.data',
+])
+def test_import_does_not_load_plugins(code):
+    modules = get_imported_modules(code)
+    assert modules.isdisjoint(HEAVY_MODULES), sorted(modules.intersection(HEAVY_MODULES))
+
+
+@pytest.mark.parametrize('module', ['autochangelog.json_output', 'autochangelog.markdown_output',
+                                    'autochangelog.github_issues_source'])
+def test_plugins_without_git_do_not_load_pygit2(module):
+    assert 'pygit2' not in get_imported_modules(f'import {module}')
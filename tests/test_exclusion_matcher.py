@@ -0,0 +1,34 @@
+import pytest
+
+from autochangelog.exclusion_matcher import ExclusionMatcher
+
+
+@pytest.mark.parametrize('rules', [
+    [r'regex:(a)\1'],
+    # a rule with a group before it would renumber the group of the backreference
+    [r'regex:(fix|feat):', r'regex:(a)\1'],
+    ['Bump version', r'regex:(x)y', r'regex:(a)\1'],
+])
+def test_numbered_backreferences(rules):
+    matcher = ExclusionMatcher(rules)
+    assert matcher.matches('chaa')
+    assert not matcher.matches('chab')
+
+
+def test_references_by_name_and_conditionals():
+    matcher = ExclusionMatcher([r'regex:(?P<word>\b\w+) (?P=word)\b', r'regex:(?P<word>Revert) "', 'prefix:WIP',
+                                r'regex:^(<)?release(?(1)>)$'])
+    assert matcher.matches('Fix the the parser')
+    assert matcher.matches('Revert "Add parser"')
+    assert matcher.matches('WIP parser')
+    assert matcher.matches('<release>')
+    assert not matcher.matches('<release')
+    assert not matcher.matches('Fix the parser')
+
+
+def test_rules_without_references_are_joined():
+    matcher = ExclusionMatcher([r'regex:(fix|feat):', r'regex:\\1', r'\1', 'type:chore'])
+    assert matcher.separate == []
+    assert matcher.matches(r'a \1 b')
+    assert matcher.matches('chore(deps): update')
+    assert not matcher.matches('docs: update')
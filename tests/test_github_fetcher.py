@@ -0,0 +1,178 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+import requests
+
+from autochangelog import github_fetcher
+from autochangelog.github_fetcher import GithubFetcher, RateLimiter
+
+
+class FakeApi:
+    """
+    Local HTTP server whose responses are decided by a handler function of the test
+    """
+
+    def __init__(self, handle):
+        self.handle = handle
+        self.requests = []
+        self.lock = threading.Lock()
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def respond(self):
+                url = urlparse(self.path)
+                query = {name: values[0] for name, values in parse_qs(url.query).items()}
+                length = int(self.headers.get('Content-Length', 0))
+                body = json.loads(self.rfile.read(length)) if length else None
+                with api.lock:
+                    api.requests.append((self.command, url.path, query))
+                status, headers, data = api.handle(self.command, url.path, query, body)
+                payload = json.dumps(data).encode()
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = do_POST = respond
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture()
+def serve():
+    servers = []
+
+    def start(handle) -> FakeApi:
+        servers.append(FakeApi(handle))
+        return servers[-1]
+
+    yield start
+    for server in servers:
+        server.close()
+
+
+def test_pages_after_the_first_are_fetched_concurrently(serve):
+    in_flight, peak = [0], [0]
+    lock = threading.Lock()
+
+    def handle(method, path, query, body):
+        page = int(query.get('page', 1))
+        if page == 1:
+            return 200, {'Link': f'<{api.url}/items?per_page=100&page=8>; rel="last"'}, [1]
+        with lock:
+            in_flight[0] += 1
+            peak[0] = max(peak[0], in_flight[0])
+        # keep the request open long enough for the other workers to start theirs
+        time.sleep(0.05)
+        with lock:
+            in_flight[0] -= 1
+        return 200, {}, [page]
+
+    api = serve(handle)
+    fetcher = GithubFetcher(base_url=api.url, concurrency=4)
+    assert fetcher.get_all('items') == list(range(1, 9))
+    assert 1 < peak[0] <= 4
+    assert sorted(int(query.get('page', 1)) for _, _, query in api.requests) == list(range(1, 9))
+
+
+def test_pages_are_followed_without_a_last_link(serve):
+    def handle(method, path, query, body):
+        page = int(query.get('page', 1))
+        headers = {'Link': f'<{api.url}/items?page={page + 1}>; rel="next"'} if page < 3 else {}
+        return 200, headers, [page]
+
+    api = serve(handle)
+    assert GithubFetcher(base_url=api.url).get_all('items') == [1, 2, 3]
+
+
+def test_rate_limited_requests_wait_for_the_reset(serve, monkeypatch):
+    reset = int(time.time()) + 30
+    sleeps = []
+    monkeypatch.setattr(github_fetcher.time, 'sleep', sleeps.append)
+
+    def handle(method, path, query, body):
+        if len(api.requests) == 1:
+            return 403, {'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset': str(reset)}, {'message': 'limited'}
+        return 200, {'X-RateLimit-Remaining': '10', 'X-RateLimit-Reset': str(reset + 3600)}, {'ok': True}
+
+    api = serve(handle)
+    fetcher = GithubFetcher(base_url=api.url)
+    assert fetcher.get('resource')[0] == {'ok': True}
+    assert len(api.requests) == 2
+    assert len(sleeps) == 1 and 29 < sleeps[0] <= 31
+    assert fetcher.limiter.remaining == 10
+
+
+def test_rate_limited_requests_with_a_past_reset_back_off_and_fail(serve, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(github_fetcher.time, 'sleep', sleeps.append)
+
+    def handle(method, path, query, body):
+        return 403, {'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset': str(int(time.time()) - 60)}, {'message': 'x'}
+
+    api = serve(handle)
+    with pytest.raises(requests.HTTPError):
+        GithubFetcher(base_url=api.url).get('resource')
+    assert len(api.requests) == github_fetcher.RATE_LIMIT_RETRIES + 1
+    assert sleeps == [github_fetcher.RATE_LIMIT_BACKOFF * 2 ** attempt
+                      for attempt in range(github_fetcher.RATE_LIMIT_RETRIES)]
+
+
+def test_rate_limiter_waits_when_the_reserve_is_reached(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(github_fetcher.time, 'sleep', sleeps.append)
+    limiter = RateLimiter(reserve=1)
+    limiter.update({'X-RateLimit-Remaining': '3', 'X-RateLimit-Reset': str(time.time() + 10)})
+    limiter.acquire()
+    limiter.acquire()
+    assert sleeps == []
+    assert limiter.remaining == 1
+    limiter.acquire()
+    assert len(sleeps) == 1 and 9 < sleeps[0] <= 11
+    # the limit is unknown until the next response
+    assert limiter.remaining is None
+    # a reset in the past does not wait
+    limiter.update({'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset': str(time.time() - 10)})
+    limiter.acquire()
+    assert len(sleeps) == 1
+
+
+def test_errors_are_raised(serve):
+    def handle(method, path, query, body):
+        if path == '/missing':
+            return 404, {}, {'message': 'Not Found'}
+        if path == '/items' and int(query.get('page', 1)) == 1:
+            return 200, {'Link': f'<{api.url}/items?page=3>; rel="last"'}, [1]
+        if path == '/items':
+            return 500, {}, {'message': 'Server Error'}
+        if body['query'] == 'broken':
+            return 200, {}, {'errors': [{'message': 'Field is missing'}]}
+        return 502, {}, {'message': 'Bad Gateway'}
+
+    api = serve(handle)
+    fetcher = GithubFetcher(base_url=api.url, token='token', concurrency=2)
+    with pytest.raises(requests.HTTPError):
+        fetcher.get('missing')
+    # a failed page fails the whole list
+    with pytest.raises(requests.HTTPError):
+        fetcher.get_all('items')
+    with pytest.raises(ValueError, match='Field is missing'):
+        fetcher.graphql('broken')
+    with pytest.raises(requests.HTTPError):
+        fetcher.graphql('query')
@@ -0,0 +1,19 @@
+from datetime import datetime
+
+import pytest
+
+from autochangelog.data import IssueRecord, LabelRecord, parse_isoformat
+from autochangelog.github_snapshot import decode_issue, encode_issue
+
+
+@pytest.mark.parametrize('closed_at', [datetime(2020, 5, 1, 12, 30, 5), datetime(2020, 5, 1, 12, 30, 5, 1200), None])
+def test_issues_keep_their_close_date(closed_at):
+    issue = IssueRecord(number=7, title='Fix parser', state='closed', closed_at=closed_at,
+                        labels=(LabelRecord('bug'),), pull_request_url=None, html_url='https://github.com/o/r/issues/7',
+                        author='dev')
+    assert decode_issue(encode_issue(issue)).to_tuple() == issue.to_tuple()
+
+
+def test_parse_isoformat_matches_isoformat():
+    for date in (datetime(2021, 1, 2, 3, 4, 5), datetime(2021, 1, 2, 3, 4, 5, 678901), datetime.utcnow()):
+        assert parse_isoformat(date.isoformat()) == date
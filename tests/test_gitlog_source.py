@@ -0,0 +1,167 @@
+import random
+
+import diskcache
+import pygit2
+import pytest
+
+from autochangelog.gitlog_source import GitChangelogSource
+from helpers import START, commit, get_releases_by_reachability, make_history
+
+
+def get_release_ids(gcs: GitChangelogSource):
+    return {
+        name: {record.id for records in notes.values() for record in records}
+        for release in gcs.get_all_changes() for name, notes in release.items()
+    }
+
+
+def get_release_order(gcs: GitChangelogSource):
+    return [(name, message, [record.id for record in records])
+            for release in gcs.get_all_changes() for name, notes in release.items()
+            for message, records in notes.items()]
+
+
+def test_all_changes_match_reachability_with_thousands_of_tags(tmp_path):
+    repo = make_history(str(tmp_path / 'repo'), commits=4000, tag_every=2, merge_every=7)
+    gcs = GitChangelogSource(repo=repo)
+    index = gcs.get_tag_index()
+    assert len(index.tags) > 2000
+
+    expected = get_releases_by_reachability(repo, index.targets, index.names)
+    assert get_release_ids(gcs) == expected
+
+
+def test_all_changes_match_changes_since(tmp_path):
+    repo = make_history(str(tmp_path / 'repo'), commits=60, tag_every=7, merge_every=5)
+    gcs = GitChangelogSource(repo=repo, excluded_messages=['Side'])
+    expected = dict()
+    for tag in gcs.get_versions():
+        expected.update(gcs.get_changes_since(tag))
+    result = dict()
+    for release in gcs.get_all_changes():
+        result.update(release)
+    assert {name: {message: [record.id for record in records] for message, records in notes.items()}
+            for name, notes in result.items()} == \
+        {name: {message: [record.id for record in records] for message, records in notes.items()}
+         for name, notes in expected.items() if notes}
+
+
+def test_changes_since_leave_out_older_tags_of_merged_branches(tmp_path):
+    repo = pygit2.init_repository(str(tmp_path / 'repo'))
+    root = commit(repo, 'Root', [], START)
+    repo.create_reference('refs/tags/v1.0.0', root)
+    # a maintenance release of 1.0 that 2.0 does not contain, merged back for 3.0
+    fix = commit(repo, 'Fix', [root], START + 10, ref=None)
+    repo.create_reference('refs/tags/v1.1.0', fix)
+    feature = commit(repo, 'Feature', [root], START + 20)
+    repo.create_reference('refs/tags/v2.0.0', feature)
+    merge = commit(repo, 'Merge', [feature, fix], START + 30)
+    repo.create_reference('refs/tags/v3.0.0', merge)
+    repo.set_head('refs/heads/master')
+
+    gcs = GitChangelogSource(repo=repo)
+    assert list(gcs.get_changes_since('v3.0.0')['3.0.0']) == ['Merge']
+    assert list(gcs.get_changes_since('v1.1.0')['1.1.0']) == ['Fix']
+    for release in gcs.get_all_changes():
+        for name, notes in release.items():
+            assert list(notes) == list(gcs.get_changes_since(name)[name])
+
+
+def make_tied_history(path: str, seed: int):
+    """
+    Create a random history where most commits share their time with others and some are older than their parents,
+    then tag some of the commits
+    """
+    rng = random.Random(seed)
+    repo = pygit2.init_repository(path)
+    commits = []
+
+    def add(count: int):
+        for _ in range(count):
+            parents = list({rng.choice(commits[-6:]) if rng.random() < 0.7 else rng.choice(commits)
+                            for _ in range(rng.choice([1, 1, 2]))}) if commits else []
+            commits.append(commit(repo, f'Change {len(commits)}', parents, START + rng.randint(0, 3), ref=None))
+            if rng.random() < 0.3:
+                repo.create_reference(f'refs/tags/v1.{len(commits)}.0', commits[-1])
+        repo.create_reference('refs/heads/master', commits[-1], force=True)
+        repo.set_head('refs/heads/master')
+
+    return repo, add
+
+
+@pytest.mark.parametrize('seed', range(40))
+def test_warm_run_matches_cold_run_with_tied_commit_times(tmp_path, seed):
+    repo, add = make_tied_history(str(tmp_path / 'repo'), seed)
+    cache = diskcache.Cache(str(tmp_path / 'cache'))
+    add(12)
+    get_release_ids(GitChangelogSource(repo=repo, cache=cache))
+    # new commits merge old commits of indexed releases
+    add(10)
+
+    warm = GitChangelogSource(repo=repo, cache=cache)
+    assert get_release_ids(warm) == get_release_ids(GitChangelogSource(repo=repo))
+    index = warm.get_tag_index()
+    assert get_release_ids(warm) == get_releases_by_reachability(repo, index.targets, index.names)
+    # the order of the commits only depends on their release, not on the walk
+    cold = get_release_order(GitChangelogSource(repo=repo))
+    assert get_release_order(warm) == cold
+    assert get_release_order(GitChangelogSource(repo=repo, processes=3)) == cold
+
+
+def test_warm_run_skips_commits_of_indexed_releases_reached_by_new_merges(tmp_path):
+    repo = pygit2.init_repository(str(tmp_path / 'repo'))
+    root = commit(repo, 'Root', [], START)
+    old = commit(repo, 'Old', [root], START + 50)
+    # the tagged commit is older than its parent, so a walk ordered by time reaches Old from the new merge first
+    tagged = commit(repo, 'Tagged', [old], START + 10)
+    repo.create_reference('refs/tags/v1.0.0', tagged)
+    repo.set_head('refs/heads/master')
+    cache = diskcache.Cache(str(tmp_path / 'cache'))
+    get_release_ids(GitChangelogSource(repo=repo, cache=cache))
+
+    branch = commit(repo, 'Branch', [old], START + 50, ref=None)
+    commit(repo, 'Merge', [tagged, branch], START + 50)
+
+    warm = get_release_ids(GitChangelogSource(repo=repo, cache=cache))
+    assert warm == get_release_ids(GitChangelogSource(repo=repo))
+    assert {repo[pygit2.Oid(hex=oid)].message for oid in warm['Development']} == {'Branch', 'Merge'}
+
+
+def test_indexed_records_keep_the_author_and_not_the_path(tmp_path):
+    repo = make_history(str(tmp_path / 'repo'), commits=9, tag_every=3)
+    cache = diskcache.Cache(str(tmp_path / 'cache'))
+    cold = list(GitChangelogSource(repo=repo, cache=cache).get_all_changes())
+    warm = list(GitChangelogSource(repo=repo, cache=cache).get_all_changes())
+    for releases in (cold, warm):
+        records = [record for release in releases for notes in release.values() for records in notes.values()
+                   for record in records]
+        assert records
+        for record in records:
+            assert (record.author.name, record.author.email) == ('Dev', 'dev@example.com')
+            assert record.short_id == repo[record.id].short_id
+    for key in cache:
+        if isinstance(cache[key], list):
+            assert all(repo.path not in value for value in cache[key])
+
+
+def test_processes_give_byte_identical_output(tmp_path):
+    from autochangelog.cli import cli, generate
+    from autochangelog.gitlog_source import git
+    from autochangelog.markdown_output import markdown
+    generate.add_command(git)
+    generate.add_command(markdown)
+    repo = make_history(str(tmp_path / 'repo'), commits=3000, tag_every=2, merge_every=7)
+
+    def render(name: str, *options: str) -> bytes:
+        output = str(tmp_path / f'{name}.md')
+        cli.main(['--no-progress', 'generate', 'git', *options, repo.workdir, 'markdown', '--output', output],
+                 standalone_mode=False)
+        with open(output, 'rb') as output_file:
+            return output_file.read()
+
+    serial = render('serial', '--no-cache')
+    assert serial.count(b'\n* [1.') > 1000
+    assert render('parallel', '--no-cache', '--processes', '3') == serial
+    # the releases the processes walk are indexed like the ones of the serial path
+    assert render('indexed', '--processes', '4') == serial
+    assert render('warm') == serial
@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta
+
+from autochangelog.data import IssueRecord, LabelRecord
+from autochangelog.issue_store import IssueStore
+
+START = datetime(2020, 1, 1)
+
+
+def make_issue(number: int, closed_at=None, title: str = None) -> IssueRecord:
+    return IssueRecord(number=number, title=title or f'Issue {number}', state='closed', closed_at=closed_at,
+                       labels=(LabelRecord('bug'),), pull_request_url=None,
+                       html_url=f'https://github.com/o/r/issues/{number}', author='dev')
+
+
+def make_store(path: str, count: int) -> (IssueStore, list):
+    # two issues are closed at each time
+    issues = [make_issue(number, START + timedelta(hours=number // 2)) for number in range(count)]
+    store = IssueStore(path)
+    store.write(issues, listed_at=START.isoformat())
+    return store, issues
+
+
+def test_issues_in_a_range_are_read(tmp_path):
+    store, issues = make_store(str(tmp_path), 20)
+    stored = store.get_issues(START + timedelta(hours=2), START + timedelta(hours=4))
+    assert [issue.number for issue in stored] == [4, 5, 6, 7, 8, 9]
+    assert [issue.to_tuple() for issue in store.get_issues()] == [issue.to_tuple() for issue in issues]
+
+
+def test_contains_all_opens_the_store_once(tmp_path, monkeypatch):
+    store, issues = make_store(str(tmp_path), 200)
+    opened = []
+    open_index = IssueStore.open_index
+    monkeypatch.setattr(IssueStore, 'open_index', lambda self, meta: opened.append(meta) or open_index(self, meta))
+    assert store.contains_all(issues[::3])
+    assert len(opened) == 1
+    assert store.contains_all([])
+
+
+def test_contains_all_detects_changed_and_missing_issues(tmp_path):
+    store, issues = make_store(str(tmp_path), 20)
+    changed = make_issue(5, issues[5].closed_at, title='Renamed')
+    assert not store.contains_all(issues[:4] + [changed])
+    assert not store.contains_all([make_issue(100, START + timedelta(days=30))])
+    assert not store.contains_all([make_issue(3)])
+    # an issue closed at another time is another version of the issue
+    assert not store.contains_all([make_issue(3, issues[4].closed_at)])
+    assert not IssueStore(str(tmp_path / 'missing')).contains_all(issues)
@@ -0,0 +1,64 @@
+from autochangelog.data import LabelRecord
+from autochangelog.label_router import LabelRouter, compile_rule
+
+
+def labels(*names):
+    return tuple(LabelRecord(name) for name in names)
+
+
+def test_rules_are_exact_unless_they_have_a_kind():
+    assert compile_rule('bug') is None
+    assert compile_rule('type:bug') is None
+    assert compile_rule('glob:type/*').match('type/bug')
+    assert not compile_rule('glob:type/*').search('area/type/bug')
+    assert compile_rule('regex:^feat').search('feature')
+
+
+def test_glob_and_regex_rules():
+    router = LabelRouter({'glob:type/*': 'Types', 'regex:^(fix|bug)': 'Fixes', 'docs': 'Docs'})
+    assert router.route('type/feature') == (0, 'Types')
+    assert router.route('bugfix') == (1, 'Fixes')
+    assert router.route('docs') == (2, 'Docs')
+    # exact rules are not searched
+    assert router.route('docs/api') is None
+    # globs match the whole label
+    assert router.route('old/type/feature') is None
+
+
+def test_earlier_rules_take_precedence():
+    router = LabelRouter({'regex:bug': 'Fixes', 'bug': 'Bugs', 'glob:*': 'Other'})
+    assert router.route('bug') == (0, 'Fixes')
+    router = LabelRouter({'bug': 'Bugs', 'regex:bug': 'Fixes', 'glob:*': 'Other'})
+    assert router.route('bug') == (0, 'Bugs')
+    assert router.route('bugfix') == (1, 'Fixes')
+    assert router.route('question') == (2, 'Other')
+    # without splitting, an issue goes to the topic of its rule with the highest priority
+    assert router.get_topics(labels('question', 'bugfix', 'bug'), False) == ('Bugs',)
+    assert router.get_topics(labels('question', 'bugfix', 'bug')) == ('Other', 'Fixes', 'Bugs')
+
+
+def test_ignored_labels():
+    router = LabelRouter({'bug': 'Fixes', 'glob:*': 'Other'}, ['wontfix', 'glob:status/*', 'regex:^dup'])
+    assert router.route('wontfix') is None
+    assert router.route('status/blocked') is None
+    assert router.route('duplicate') is None
+    assert router.get_topics(labels('bug', 'status/blocked', 'docs')) == ('Fixes', 'Other')
+    # an ignored label keeps the whole issue out when it is not split between topics
+    assert router.get_topics(labels('bug', 'duplicate'), False) == ()
+    # without a label map the labels are the topics
+    router = LabelRouter(None, ['glob:status/*'])
+    assert router.get_topics(labels('bug', 'status/blocked', 'docs')) == ('bug', 'docs')
+    assert router.get_topics(labels('status/blocked', 'bug'), False) == ('status/blocked',)
+
+
+def test_topics_are_computed_once_per_label_set():
+    router = LabelRouter({'glob:type/*': 'Types', 'bug': 'Fixes'})
+    routed = []
+    route = router.route
+    router.route = lambda label: routed.append(label) or route(label)
+    for _ in range(3):
+        assert router.get_topics(labels('bug', 'type/feature')) == ('Fixes', 'Types')
+        assert router.get_topics(labels('bug', 'type/feature'), False) == ('Types',)
+    assert routed == ['bug', 'type/feature'] * 2
+    assert router.get_topics(labels('type/feature', 'bug')) == ('Types', 'Fixes')
+    assert len(router.assignments) == 3
@@ -0,0 +1,61 @@
+import re
+import threading
+
+from autochangelog.data import CommitRecord, IssueRecord, SrcData
+from autochangelog.merge_sources import SourceMerger, merge_stream
+from autochangelog.source_runner import build_stream
+from autochangelog.utils import generator
+
+
+def issue(number: int) -> IssueRecord:
+    return IssueRecord(number=number, title=f'Issue {number}', state='closed', closed_at=None, labels=(),
+                       pull_request_url=None, html_url=f'https://github.com/o/r/issues/{number}', author='dev')
+
+
+def commit(message: str) -> CommitRecord:
+    return CommitRecord(id='0' * 40, message=message, author=None, commit_time=0, path=None)
+
+
+def merged_messages(merger: SourceMerger, *commits: CommitRecord):
+    merger.add(SrcData(items={'v1.0': {'Fixes': [issue(12)]}}, src='github'))
+    merger.add(SrcData(items={'1.0': {c.message: [c] for c in commits}}, src='git'))
+    (_, topics), = merger.get_releases()
+    return [record.message for record in topics.get(merger.commit_topic, [])]
+
+
+def test_commits_referencing_an_issue_of_the_release_are_dropped():
+    messages = merged_messages(SourceMerger(), commit('Fix parser (#12)'), commit('Fix docs (#13)'),
+                               commit('See owner/repo#12'))
+    assert messages == ['Fix docs (#13)', 'See owner/repo#12']
+
+
+def test_reference_number_is_read_from_its_group():
+    # the first group is the prefix, so the number has to be named
+    merger = SourceMerger(reference_pattern=re.compile(r'(GH-|#)(?P<number>\d+)'))
+    assert merged_messages(merger, commit('Fix parser GH-12'), commit('Fix docs GH-13')) == ['Fix docs GH-13']
+    merger = SourceMerger(reference_pattern=re.compile(r'GH-(\d+)(-\w+)?'))
+    assert merged_messages(merger, commit('Fix parser GH-12-a'), commit('Fix docs GH-13')) == ['Fix docs GH-13']
+
+
+def test_merged_sources_run_concurrently_only_when_asked():
+    threads = []
+
+    @generator
+    def source(name, src, entries):
+        threads.append(threading.current_thread())
+        yield SrcData(items={name: entries}, src=src)
+
+    def run(concurrent_sources):
+        threads.clear()
+        processors = [source('1.0', 'git', {'Fix parser (#12)': [commit('Fix parser (#12)')]}),
+                      source('v1.0', 'github', {'Fixes': [issue(12)]}),
+                      lambda stream: merge_stream(stream, SourceMerger())]
+        return [data.items for data in build_stream(processors, concurrent_sources)]
+
+    sequential = run(False)
+    assert threads == [threading.main_thread()] * 2
+    concurrent = run(True)
+    assert len(threads) == 2 and threading.main_thread() not in threads
+    assert repr(concurrent) == repr(sequential)
+    # the commit references the issue of the same release
+    assert list(sequential[0]) == ['1.0'] and list(sequential[0]['1.0']) == ['Fixes']
@@ -0,0 +1,119 @@
+import json as js
+
+import os
+
+import click
+import pytest
+from click.utils import LazyFile
+
+from autochangelog import markdown_output
+from autochangelog.changelog_context import ChangelogContext
+from autochangelog.data import IssueRecord, SrcData
+from autochangelog.json_output import json
+from autochangelog.markdown_output import markdown
+from autochangelog.metrics import reset_metrics
+
+
+def run(command: click.Command, stream, **params):
+    """
+    Run an output command on a stream like the generate command does
+    """
+    ctx = click.Context(command, obj=ChangelogContext(src=None))
+    with ctx:
+        values = {param.name: param.get_default(ctx) for param in command.params}
+        values.update(params)
+        return list(command.callback(**values)(iter(stream)))
+
+
+def sources(*names):
+    return [
+        SrcData(items={name: {'Fixes': [
+            IssueRecord(number=number, title=f'{name} fix', state='closed', closed_at=None, labels=(),
+                        pull_request_url=None, html_url=f'https://github.com/o/r/issues/{number}', author='dev')
+        ]}}, src='github')
+        for number, name in ((int(name.strip('v')), name) for name in names)
+    ]
+
+
+def test_streamed_json_matches_json(tmp_path):
+    for name, streaming in (('streamed.json', True), ('dumped.json', False)):
+        with open(tmp_path / name, 'w') as output:
+            run(json, sources('v2', 'v1'), output=output, streaming=streaming, indent=2)
+    assert (tmp_path / 'streamed.json').read_text() == (tmp_path / 'dumped.json').read_text()
+    assert js.loads((tmp_path / 'streamed.json').read_text()) == \
+        {'v2': {'Fixes': ['v2 fix']}, 'v1': {'Fixes': ['v1 fix']}}
+
+
+def test_streamed_json_rejects_versions_received_twice(tmp_path):
+    with open(tmp_path / 'changelog.json', 'w') as output, pytest.raises(ValueError, match='v1 was received twice'):
+        run(json, sources('v2', 'v1', 'v1'), output=output, streaming=True)
+
+
+def test_streamed_markdown_is_closed_when_a_source_fails(tmp_path, monkeypatch):
+    opened = []
+
+    def open_file(*args, **kwargs):
+        opened.append(open(*args, **kwargs))
+        return opened[-1]
+
+    def failing_source():
+        yield from sources('v1')
+        raise RuntimeError('source failed')
+
+    monkeypatch.setattr(markdown_output, 'open', open_file, raising=False)
+    with pytest.raises(RuntimeError, match='source failed'):
+        run(markdown, failing_source(), output=str(tmp_path / 'changelog.md'), streaming=True)
+    assert len(opened) == 1 and opened[0].closed
+    assert 'v1 fix' in (tmp_path / 'changelog.md').read_text()
+
+
+def render_split(output: str, names) -> int:
+    """
+    Render a changelog split by versions and get the number of files that were skipped
+    """
+    metrics = reset_metrics()
+    run(markdown, sources(*names), output=output, split_versions=True)
+    return metrics.counters['markdown.versions_skipped']
+
+
+def test_split_markdown_skips_unchanged_versions(tmp_path):
+    output = str(tmp_path / 'changelog')
+    assert render_split(output, ['v2', 'v1']) == 0
+    # the index is skipped too
+    assert render_split(output, ['v2', 'v1']) == 3
+    assert render_split(output, ['v3', 'v2', 'v1']) == 2
+    assert sorted(os.listdir(output)) == ['.changelog_manifest.json', 'changelog.md', 'changelog_v1.md',
+                                          'changelog_v2.md', 'changelog_v3.md']
+
+
+def test_split_markdown_renders_versions_edited_by_hand(tmp_path):
+    output = str(tmp_path / 'changelog')
+    render_split(output, ['v2', 'v1'])
+    path = tmp_path / 'changelog' / 'changelog_v1.md'
+    rendered = path.read_text()
+    path.write_text('edited')
+    assert render_split(output, ['v2', 'v1']) == 2
+    assert path.read_text() == rendered
+
+
+def test_split_markdown_renders_versions_after_a_template_change(tmp_path, monkeypatch):
+    output, template = str(tmp_path / 'changelog'), tmp_path / 'version.md.tmpl'
+    monkeypatch.setattr(markdown_output, 'DEFAULT_GITHUB_VERSION', str(template))
+    template.write_text('{{ version }}')
+    render_split(output, ['v2', 'v1'])
+    assert render_split(output, ['v2', 'v1']) == 3
+    template.write_text('# {{ version }}')
+    # the index uses its own template
+    assert render_split(output, ['v2', 'v1']) == 1
+    assert (tmp_path / 'changelog' / 'changelog_v1.md').read_text() == '# v1'
+
+
+def test_json_output_is_not_written_when_unchanged(tmp_path):
+    path = str(tmp_path / 'changelog.json')
+    run(json, sources('v1'), output=LazyFile(path, 'w'))
+    os.utime(path, ns=(0, 0))
+    run(json, sources('v1'), output=LazyFile(path, 'w'))
+    assert os.stat(path).st_mtime_ns == 0
+    run(json, sources('v2', 'v1'), output=LazyFile(path, 'w'))
+    assert os.stat(path).st_mtime_ns != 0
+    assert list(js.loads(open(path).read())) == ['v2', 'v1']
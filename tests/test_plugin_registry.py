@@ -0,0 +1,23 @@
+import os
+
+from autochangelog.plugin_registry import get_distributions_fingerprint
+
+
+def test_fingerprint_changes_with_entry_points_and_path(tmp_path, monkeypatch):
+    metadata = tmp_path / 'plugin-1.0.dist-info'
+    metadata.mkdir()
+    entry_points = metadata / 'entry_points.txt'
+    entry_points.write_text('[autochangelog.cli_src_plugins]\n')
+    monkeypatch.setattr('sys.path', [str(tmp_path)])
+    fingerprint = get_distributions_fingerprint()
+    assert get_distributions_fingerprint() == fingerprint
+
+    # editable installs rewrite the entry points in place, which does not change the directory
+    directory_times = (os.stat(metadata).st_atime_ns, os.stat(metadata).st_mtime_ns)
+    entry_points.write_text('[autochangelog.cli_src_plugins]\nplugin = plugin.cli\n')
+    os.utime(metadata, ns=directory_times)
+    changed = get_distributions_fingerprint()
+    assert changed != fingerprint
+
+    monkeypatch.setattr('sys.path', [str(tmp_path), str(tmp_path / 'missing')])
+    assert get_distributions_fingerprint() != changed
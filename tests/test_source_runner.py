@@ -0,0 +1,80 @@
+import subprocess
+import sys
+import textwrap
+import threading
+
+import pytest
+
+from autochangelog.source_runner import SourceRunner, build_stream
+
+
+def sync_source(*items):
+    def releases():
+        yield from items
+    return releases
+
+
+def failing_source():
+    yield 'before'
+    raise ValueError('broken source')
+
+
+def test_items_are_yielded_in_source_order():
+    runner = SourceRunner([sync_source(1, 2), sync_source(), sync_source(3, 4), sync_source(5)])
+    assert list(runner) == [1, 2, 3, 4, 5]
+
+
+def test_failure_stops_the_run_without_waiting_for_blocked_sources():
+    blocked = threading.Event()
+
+    def blocked_source():
+        blocked.wait()
+        yield 'never'
+
+    runner = SourceRunner([lambda: failing_source(), blocked_source])
+    items = []
+    with pytest.raises(ValueError, match='broken source'):
+        for item in runner:
+            items.append(item)
+    assert items == ['before']
+    assert runner.stop.is_set()
+    blocked.set()
+
+
+def test_interpreter_exits_with_blocked_sources():
+    script = textwrap.dedent('''
+        import threading
+        from autochangelog.source_runner import SourceRunner
+
+        def failing():
+            raise ValueError('broken source')
+            yield
+
+        def blocked():
+            threading.Event().wait()
+            yield
+
+        try:
+            list(SourceRunner([blocked, failing]))
+        except ValueError:
+            pass
+        for item in SourceRunner([failing, blocked]):
+            pass
+    ''')
+    result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, timeout=30)
+    assert 'broken source' in result.stderr
+
+
+def test_sources_run_one_after_another_by_default():
+    def source(*items):
+        def processor(stream):
+            yield from stream
+            yield from items
+        processor.releases = sync_source(*items)
+        return processor
+
+    threads = threading.active_count()
+    stream = build_stream([source(1), source(2)])
+    assert list(stream) == [1, 2]
+    assert threading.active_count() == threads
+    assert list(build_stream([source(1), source(2)], concurrent_sources=True)) == [1, 2]
@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+from pygit2 import GIT_SORT_TOPOLOGICAL
+
+# the benchmarks are scripts run from their directory, not a package
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+from synthetic import make_git_repo  # noqa: E402
+
+
+@pytest.mark.parametrize('merge_every', [0, 2, 3, 17])
+def test_synthetic_history_has_a_single_root(tmp_path, merge_every):
+    repo = make_git_repo(str(tmp_path / 'repo'), commits=40, tag_every=5, merge_every=merge_every)
+    commits = list(repo.walk(repo.head.target, GIT_SORT_TOPOLOGICAL))
+    assert len([commit for commit in commits if not commit.parent_ids]) == 1
+    merges = [commit for commit in commits if len(commit.parent_ids) > 1]
+    assert bool(merges) == bool(merge_every)
+    assert len(commits) == 40 + len(merges)
@@ -0,0 +1,80 @@
+import diskcache
+import pygit2
+import pytest
+
+from autochangelog.tag_index import DEVELOPMENT_RELEASE, TagIndex, version_key
+from helpers import START, commit
+
+
+@pytest.mark.parametrize('older,newer', [
+    ('1.2.0', '1.10.0'),
+    ('1.9', '1.10'),
+    ('1.2.0-rc.1', '1.2.0'),
+    ('1.2.0-alpha', '1.2.0-beta'),
+    ('1.2.0-rc.2', '1.2.0-rc.10'),
+    # numeric identifiers come before alphanumeric ones
+    ('1.2.0-1', '1.2.0-alpha'),
+    ('1.2.0-alpha', '1.2.0-alpha.1'),
+    ('1.2.0', '1.2.1-rc.1'),
+])
+def test_versions_are_ordered_by_precedence(older, newer):
+    assert version_key(older) < version_key(newer)
+
+
+@pytest.mark.parametrize('version,same', [('1.2', '1.2.0'), ('1', '1.0.0'), ('1.2.0+build.5', '1.2.0')])
+def test_equivalent_versions_have_the_same_key(version, same):
+    assert version_key(version) == version_key(same)
+
+
+def make_tagged_repo(path: str, tags):
+    repo = pygit2.init_repository(path)
+    parents = []
+    for i, tag in enumerate(tags):
+        parents = [commit(repo, f'Change {i}', parents, START + i)]
+        if tag:
+            repo.create_reference(f'refs/tags/{tag}', parents[0])
+    repo.set_head('refs/heads/master')
+    return repo
+
+
+def test_tags_are_ordered_by_version_from_newest(tmp_path):
+    # tags are created in an order unrelated to their versions
+    repo = make_tagged_repo(str(tmp_path / 'repo'), ['v1.2.0', 'v1.10.0-rc.1', 'latest', 'v1.10.0', 'v1.9.1'])
+    index = TagIndex.build(repo)
+    assert index.tags == ['HEAD', 'refs/tags/v1.10.0', 'refs/tags/v1.10.0-rc.1', 'refs/tags/v1.9.1',
+                          'refs/tags/v1.2.0']
+    assert index.names == [DEVELOPMENT_RELEASE, '1.10.0', '1.10.0-rc.1', '1.9.1', '1.2.0']
+    assert index.targets[0] is None
+    assert [str(target) for target in index.targets[1:]] == [
+        str(repo.revparse_single(tag).id) for tag in index.tags[1:]]
+
+
+def test_custom_tag_pattern(tmp_path):
+    repo = make_tagged_repo(str(tmp_path / 'repo'), ['release-2', 'v1.0.0', 'release-10', 'release-'])
+    index = TagIndex.build(repo, r'^release-(\d*)$')
+    assert index.names == [DEVELOPMENT_RELEASE, '10', '2']
+    with pytest.raises(ValueError, match='must have a group'):
+        TagIndex.build(repo, r'^release-\d+$')
+
+
+def test_find_and_previous(tmp_path):
+    repo = make_tagged_repo(str(tmp_path / 'repo'), ['v1.0.0', 'v1.1.0', None, 'v2.0.0'])
+    index = TagIndex.build(repo)
+    position = index.find('v1.1.0')
+    assert position == index.find('refs/tags/v1.1.0') == index.find('1.1.0') == 2
+    assert index.find('v3.0.0') is None
+    assert index.names[index.previous(position)] == '1.0.0'
+    assert index.previous(index.find('v1.0.0')) is None
+    assert index.names[index.previous(0)] == '2.0.0'
+
+
+def test_peeled_targets_are_cached(tmp_path):
+    repo = make_tagged_repo(str(tmp_path / 'repo'), ['v1.0.0', 'v1.1.0'])
+    signature = pygit2.Signature('Dev', 'dev@example.com', START, 0)
+    repo.create_tag('v2.0.0', repo.head.target, pygit2.GIT_OBJ_COMMIT, signature, 'Release 2.0.0')
+    cache = diskcache.Cache(str(tmp_path / 'cache'))
+    index = TagIndex.build(repo, cache=cache)
+    assert index.targets[1] == repo.head.target
+    (peeled,) = (cache[key] for key in cache if key[0] == 'peeled_tags')
+    assert peeled[str(repo.references['refs/tags/v2.0.0'].target)] == str(repo.head.target)
+    assert TagIndex.build(repo, cache=cache) == index